@@ -0,0 +1,199 @@
+"""Admission control for the endpoints that wait on Gemini.
+
+Each expensive request is admitted only if the Gemini work already admitted
+in this process would still let it finish within ADMISSION_LATENCY_TARGET_SECONDS.
+Otherwise it is refused up front with 503 and Retry-After, before any
+authentication, storage or Gemini work is spent on it. Every other route
+passes straight through, so cheap reads keep flowing during a spike.
+
+The estimate for a request of a given kind is
+
+    its own service time + the wait for its last Gemini call to start
+
+where the calls ahead of that one are the backlog (calls admitted requests
+have yet to start: learned per kind, minus the calls each has already
+started, and never less than the calls queued in the limiter) plus the
+request's own. The limiter turns them into a wait for one of
+GEMINI_CONCURRENCY threads at the observed seconds per call, and for the
+GEMINI_REQUESTS_PER_MINUTE window to make room. If a call has already been
+queued longer than that, its wait is used instead, which covers requests that
+fan out further than expected and background work. Service times are learned
+only from requests admitted with no wait, so queueing is not counted twice.
+Background work yields to requests in the limiter, so it is not counted.
+"""
+import os
+import math
+import time
+from typing import Any, Dict, Optional
+from starlette.responses import JSONResponse
+from .services.gemini_limiter import gemini_limiter
+from . import metrics
+
+# (method, path) -> kind of expensive request
+EXPENSIVE_ROUTES = {
+    ("POST", "/api/videos/process"): "videos",
+    ("POST", "/api/quiz/generate"): "quizzes",
+    ("POST", "/api/quiz/generate/stream"): "quizzes",
+    ("POST", "/api/chat/send"): "chat",
+}
+
+# Starting estimates per kind until requests have been observed: Gemini calls
+# made by a request that needs Gemini, and seconds of service
+_DEFAULT_COSTS = {
+    "videos": (6.0, 6.0),
+    "quizzes": (6.0, 8.0),
+    "chat": (1.0, 2.0),
+}
+
+# Weight of each finished request in the smoothed costs
+_SMOOTHING = 0.1
+
+
+class Cost:
+    """Smoothed cost of one kind of request
+
+    Calls are averaged over requests that called Gemini at all and every
+    admitted request is assumed to need that many. A video that is already
+    processed, or a quiz served from the question bank, makes no calls, but
+    it also finishes within milliseconds and releases its share of the
+    backlog; assuming the average would let a burst of new videos through.
+    """
+
+    __slots__ = ("calls", "seconds")
+
+    def __init__(self, calls: float, seconds: float):
+        self.calls = calls
+        self.seconds = seconds
+
+    def observe(self, ticket: "Ticket", service_seconds: Optional[float]) -> None:
+        if ticket.gemini_calls:
+            self.calls += _SMOOTHING * (ticket.gemini_calls - self.calls)
+        if service_seconds is not None:
+            self.seconds += _SMOOTHING * (service_seconds - self.seconds)
+
+
+class Ticket:
+    """One admitted request; the Gemini limiter counts its calls and queueing time"""
+
+    __slots__ = ("kind", "gemini_calls", "waited", "started", "queued")
+
+    def __init__(self, kind: str, queued: bool):
+        self.kind = kind
+        self.gemini_calls = 0
+        self.waited = 0.0
+        self.started = time.monotonic()
+        # Admitted behind a backlog, so its duration includes queueing
+        self.queued = queued
+
+
+class AdmissionController:
+    """Tracks admitted Gemini-bound requests and predicts the latency of the next one"""
+
+    def __init__(self, limiter=gemini_limiter):
+        self.limiter = limiter
+        # 0 turns shedding off; requests are still tracked
+        self.target_seconds = float(os.getenv("ADMISSION_LATENCY_TARGET_SECONDS", "30"))
+        self.costs = {kind: Cost(*cost) for kind, cost in _DEFAULT_COSTS.items()}
+        self._tickets = set()
+        self.admitted = {kind: 0 for kind in self.costs}
+        self.shed = {kind: 0 for kind in self.costs}
+
+    def backlog_calls(self) -> float:
+        """Gemini calls admitted requests have yet to start"""
+        expected = sum(max(self.costs[ticket.kind].calls - ticket.gemini_calls, 0.0) for ticket in self._tickets)
+        # Requests that fan out further than expected already show up in the limiter's queue
+        return max(expected, float(self.limiter.waiting()))
+
+    def queue_seconds(self, kind: str) -> float:
+        """Time a new request's last Gemini call would wait for quota and a thread"""
+        expected = self.limiter.wait_seconds(self.backlog_calls() + self.costs[kind].calls)
+        # Calls already queued longer than that mean the backlog is deeper than estimated
+        return max(expected, self.limiter.longest_wait())
+
+    def expected_latency(self, kind: str) -> float:
+        return self.costs[kind].seconds + self.queue_seconds(kind)
+
+    def admit(self, kind: str) -> Optional[Ticket]:
+        """A ticket for the request, or None if it would miss the latency target"""
+        queue_seconds = self.queue_seconds(kind)
+        # Only a backlog sheds; a request that is slow on its own is always admitted when idle
+        expected = self.costs[kind].seconds + queue_seconds
+        if self.target_seconds > 0 and queue_seconds > 0 and expected > self.target_seconds:
+            self.shed[kind] += 1
+            metrics.admission_shed.inc(kind)
+            return None
+        ticket = Ticket(kind, queued=queue_seconds > 0)
+        self._tickets.add(ticket)
+        self.admitted[kind] += 1
+        return ticket
+
+    def retry_after(self, kind: str) -> int:
+        """Seconds until enough of the backlog has drained to admit the request"""
+        return max(1, math.ceil(self.expected_latency(kind) - self.target_seconds))
+
+    def finish(self, ticket: Ticket, succeeded: bool) -> None:
+        self._tickets.discard(ticket)
+        if not succeeded:
+            return
+        service = None
+        if not ticket.queued:
+            # Time spent waiting for quota is the backlog's, not the request's
+            service = max(time.monotonic() - ticket.started - ticket.waited, 0.0)
+        self.costs[ticket.kind].observe(ticket, service)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "target_seconds": self.target_seconds,
+            "in_flight": len(self._tickets),
+            "backlog_calls": round(self.backlog_calls(), 2),
+            "expected_latency_seconds": {kind: round(self.expected_latency(kind), 2) for kind in self.costs},
+            "expected_gemini_calls": {kind: round(cost.calls, 2) for kind, cost in self.costs.items()},
+            "admitted": dict(self.admitted),
+            "shed": dict(self.shed),
+        }
+
+
+# Global controller; each worker process admits against its own limiter
+admission_controller = AdmissionController()
+
+metrics.registry.register(metrics.Gauge(
+    "admission_backlog_gemini_calls", "Gemini calls still expected from admitted requests",
+    callback=admission_controller.backlog_calls))
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that sheds expensive requests with 503 when the backlog is too deep"""
+
+    def __init__(self, app, controller: AdmissionController = admission_controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        kind = EXPENSIVE_ROUTES.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if kind is None:
+            await self.app(scope, receive, send)
+            return
+
+        ticket = self.controller.admit(kind)
+        if ticket is None:
+            retry_after = self.controller.retry_after(kind)
+            response = JSONResponse(
+                {"detail": f"Server is busy, retry in {retry_after} seconds"},
+                status_code=503,
+                headers={"Retry-After": str(retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            with self.controller.limiter.tracking(ticket):
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            self.controller.finish(ticket, status["code"] < 400)
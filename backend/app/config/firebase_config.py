@@ -1,17 +1,29 @@
 import os
-import firebase_admin
-from firebase_admin import credentials, auth, firestore
-from typing import Optional
 import json
+import time
+import hashlib
+import threading
+from typing import Optional, Any
 
 class FirebaseConfig:
+    """Firebase Admin SDK, initialized on first use rather than at import time"""
+
     def __init__(self):
-        self.app: Optional[firebase_admin.App] = None
-        self.db: Optional[firestore.Client] = None
-        self._initialize_firebase()
+        self.app: Optional[Any] = None
+        self.db: Optional[Any] = None
+        self._lock = threading.Lock()
+    
+    def _ensure_initialized(self):
+        if self.db is None:
+            with self._lock:
+                if self.db is None:
+                    self._initialize_firebase()
     
     def _initialize_firebase(self):
         """Initialize Firebase Admin SDK"""
+        # Deferred so importing the app does not load the Admin SDK
+        import firebase_admin
+        from firebase_admin import credentials, firestore
         try:
             # Check if Firebase is already initialized
             if firebase_admin._apps:
@@ -55,20 +67,40 @@ class FirebaseConfig:
     
     def get_auth(self):
         """Get Firebase Auth instance"""
+        self._ensure_initialized()
+        from firebase_admin import auth
         return auth
     
     def get_firestore(self):
         """Get Firestore client"""
+        self._ensure_initialized()
         return self.db
     
     def verify_token(self, id_token: str):
-        """Verify Firebase ID token"""
+        """Verify Firebase ID token
+
+        Verified tokens are kept in the shared cache for TOKEN_CACHE_TTL_SECONDS
+        (never past their expiry), so a client is verified once per host rather
+        than once per worker and request.
+        """
+        from ..container import container
+        cache = container.shared_cache()
+        key = hashlib.sha256(id_token.encode()).hexdigest()
+        cached = cache.get("verified_tokens", key)
+        if cached is not None:
+            return json.loads(cached)
+
+        auth = self.get_auth()
         try:
             decoded_token = auth.verify_id_token(id_token)
-            return decoded_token
         except Exception as e:
             print(f"Token verification failed: {e}")
             return None
 
+        ttl = min(float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300")), decoded_token.get("exp", 0) - time.time())
+        if ttl > 0:
+            cache.set("verified_tokens", key, json.dumps(decoded_token), ttl)
+        return decoded_token
+
 # Global Firebase instance
 firebase_config = FirebaseConfig() 
\ No newline at end of file
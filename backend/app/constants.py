@@ -1,3 +1,6 @@
 # Example videos that are accessible to all users without library membership
 EXAMPLE_VIDEO_IDS = ['JxgmHe2NyeY', 'If1Lw4pLLEo', 'iInUBOVeBCc']
 
+# Largest quiz a user can request
+MAX_QUIZ_QUESTIONS = 20
+
@@ -0,0 +1,171 @@
+import os
+import threading
+from typing import Any, Callable, Dict
+from fastapi import HTTPException
+
+
+def metrics_enabled() -> bool:
+    return os.getenv("METRICS_ENABLED", "true").lower() != "false"
+
+
+def tracing_enabled() -> bool:
+    return os.getenv("TRACING_ENABLED", "true").lower() != "false"
+
+
+class ServiceContainer:
+    """Process-wide clients and services, built on first use and shared
+
+    Nothing is constructed at import time and heavy SDKs (Firebase Admin,
+    google-genai) are imported inside the factories, so a cold start only pays
+    for what the first requests actually use. Every service gets the same
+    Firestore client and Gemini client.
+    """
+
+    def __init__(self):
+        self._instances: Dict[str, Any] = {}
+        # Re-entrant because factories resolve their own dependencies
+        self._lock = threading.RLock()
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = factory()
+                    self._instances[name] = instance
+        return instance
+
+    def override(self, name: str, instance: Any) -> None:
+        """Replace a client or service, e.g. with a fake in benchmarks"""
+        with self._lock:
+            self._instances[name] = instance
+
+    def reset(self) -> None:
+        with self._lock:
+            self._instances.clear()
+
+    def firestore(self):
+        """Document store used by every service, chosen by STORAGE_BACKEND
+
+        "firestore" (default) is the Cloud Firestore client. "sqlite" keeps
+        documents in a local WAL-mode database at SQLITE_PATH and "memory" in
+        process, both behind the same Firestore-compatible API (app.storage).
+        """
+        def build():
+            backend = os.getenv("STORAGE_BACKEND", "firestore").lower()
+            if backend == "sqlite":
+                from .storage import SQLiteDocumentStore
+                return SQLiteDocumentStore(os.getenv("SQLITE_PATH", "mercurious.db"))
+            if backend == "memory":
+                from .storage import MemoryDocumentStore
+                return MemoryDocumentStore()
+
+            from .config.firebase_config import firebase_config
+            from .metrics import instrument_firestore
+            instrument_firestore(count=metrics_enabled(), trace=tracing_enabled())
+            return firebase_config.get_firestore()
+        return self._get("firestore", build)
+
+    def shared_cache(self):
+        """Cache shared by all worker processes on this host (app.utils.shared_cache)"""
+        def build():
+            from .utils.shared_cache import SharedCache
+            return SharedCache()
+        return self._get("shared_cache", build)
+
+    def genai_client(self):
+        def build():
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise HTTPException(
+                    status_code=500,
+                    detail="GEMINI_API_KEY not found in environment variables"
+                )
+            import google.genai as genai
+            client = genai.Client(api_key=api_key)
+            if metrics_enabled():
+                from .metrics import instrument_genai_client
+                instrument_genai_client(client)
+            if tracing_enabled():
+                from . import tracing
+                tracing.instrument_genai_client(client)
+            return client
+        return self._get("genai_client", build)
+
+    def bulk_deleter(self):
+        """One deleter for every service, so BULK_DELETE_PARALLELISM caps the whole process"""
+        def build():
+            from .services.bulk_delete import BulkDeleter
+            return BulkDeleter(self.firestore())
+        return self._get("bulk_deleter", build)
+
+    def video_db(self):
+        def build():
+            from .services.video_database_service import VideoDatabase
+            return VideoDatabase(self.firestore())
+        return self._get("video_db", build)
+
+    def transcript_service(self):
+        def build():
+            from .services.transcript_services import TranscriptService
+            return TranscriptService(self.genai_client())
+        return self._get("transcript_service", build)
+
+    def video_service(self):
+        def build():
+            from .services.video_services import VideoService
+            return VideoService(self.video_db(), bulk_deleter=self.bulk_deleter())
+        return self._get("video_service", build)
+
+    def chat_service(self):
+        def build():
+            from .services.chat_service import ChatService
+            return ChatService(self.genai_client())
+        return self._get("chat_service", build)
+
+    def quiz_service(self):
+        def build():
+            from .services.quiz_service import QuizService
+            return QuizService(self.genai_client(), self.video_db(), self.bulk_deleter())
+        return self._get("quiz_service", build)
+
+    def rate_limiter(self):
+        def build():
+            from .services.rate_limiter import RateLimiter
+            return RateLimiter(self.firestore(), self.shared_cache())
+        return self._get("rate_limiter", build)
+
+    def auth_service(self):
+        def build():
+            from .services.auth_service import AuthService
+            return AuthService(self.firestore(), self.bulk_deleter())
+        return self._get("auth_service", build)
+
+
+# Global container shared by routers, background workers and jobs
+container = ServiceContainer()
+
+
+# FastAPI dependencies
+def get_video_db():
+    return container.video_db()
+
+def get_video_service():
+    return container.video_service()
+
+def get_chat_service():
+    return container.chat_service()
+
+def get_auth_service():
+    return container.auth_service()
+
+def get_rate_limiter():
+    return container.rate_limiter()
+
+def get_quiz_service():
+    try:
+        return container.quiz_service()
+    except Exception as e:
+        print(f"Error initializing QuizService: {e}")
+        raise HTTPException(status_code=500, detail="Quiz service is not available")
@@ -1,7 +1,12 @@
+import os
+import hmac
+import asyncio
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
 from .config.firebase_config import firebase_config
+from .container import container
+from . import tracing
 from .models.user import UserResponse
 
 # Security scheme for Bearer token
@@ -14,7 +19,8 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         token = credentials.credentials
         
         # Verify Firebase token
-        decoded_token = firebase_config.verify_token(token)
+        with tracing.span("auth.verify_token"):
+            decoded_token = firebase_config.verify_token(token)
         if not decoded_token:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -43,6 +49,30 @@ async def get_current_user_optional(credentials: Optional[HTTPAuthorizationCrede
     except:
         return None
 
+async def get_admin_user(current_user: dict = Depends(get_current_user)) -> dict:
+    #Dependency for operator-only endpoints: an "admin" custom claim or a uid listed in ADMIN_UIDS
+    admin_uids = {uid.strip() for uid in os.getenv("ADMIN_UIDS", "").split(",") if uid.strip()}
+    if current_user.get("admin") is True or current_user.get("uid") in admin_uids:
+        return current_user
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+
+async def get_metrics_reader(credentials: HTTPAuthorizationCredentials = Depends(security)) -> None:
+    #Dependency for /metrics: a scraper sending METRICS_TOKEN as its bearer token, otherwise an admin user
+    metrics_token = os.getenv("METRICS_TOKEN")
+    if metrics_token and hmac.compare_digest(credentials.credentials.encode("utf-8"), metrics_token.encode("utf-8")):
+        return
+    await get_admin_user(await get_current_user(credentials))
+
+def rate_limited(budget: str):
+    #Dependency for endpoints that call Gemini: the current user, after taking one request from their budget (429 when empty)
+    async def check(current_user: dict = Depends(get_current_user)) -> dict:
+        user_id = current_user.get("uid")
+        if user_id:
+            # The bucket transaction blocks, so it runs off the event loop
+            await asyncio.to_thread(container.rate_limiter().consume, user_id, budget)
+        return current_user
+    return check
+
 def get_firestore_db():
     #Dependency to get Firestore database instance
-    return firebase_config.get_firestore() 
\ No newline at end of file
+    return container.firestore() 
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""Backfill chat statistics counters for conversations created before they existed.
+
+Usage (from the backend directory):
+    python -m app.jobs.backfill_chat_stats [user_id ...]
+
+Without arguments every user is processed.
+"""
+import asyncio
+import sys
+from ..services.video_database_service import VideoDatabase
+
+
+async def backfill(user_ids=None):
+    video_db = VideoDatabase()
+    if not user_ids:
+        user_ids = [doc.id for doc in video_db.db.collection('users').list_documents()]
+    
+    total_conversations = 0
+    for user_id in user_ids:
+        conversations = await video_db.backfill_chat_stats(user_id)
+        total_conversations += conversations
+        print(f"Backfilled chat stats for user {user_id}: {conversations} conversations")
+    
+    print(f"Done: {len(user_ids)} users, {total_conversations} conversations")
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill(sys.argv[1:]))
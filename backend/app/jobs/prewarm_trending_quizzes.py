@@ -0,0 +1,39 @@
+"""Pre-generate question banks for the most processed videos.
+
+Videos that already have a fresh bank are skipped. Gemini calls run at
+background priority, within GEMINI_BACKGROUND_SHARE of the quota.
+
+Usage (from the backend directory):
+    python -m app.jobs.prewarm_trending_quizzes [limit]
+
+limit defaults to 50.
+"""
+import asyncio
+import sys
+from google.cloud import firestore
+from ..container import container
+from ..services.gemini_limiter import gemini_limiter
+
+
+async def prewarm(limit: int = 50):
+    quiz_service = container.quiz_service()
+    query = (quiz_service.video_db.db.collection('videos')
+             .order_by('metadata.processed_count', direction=firestore.Query.DESCENDING)
+             .limit(limit))
+    video_ids = [doc.id for doc in query.select(['metadata.processed_count']).stream()]
+
+    generated = 0
+    for video_id in video_ids:
+        try:
+            with gemini_limiter.background():
+                if await quiz_service.prewarm_question_bank(video_id):
+                    generated += 1
+                    print(f"Generated question bank for video {video_id}")
+        except Exception as e:
+            print(f"Failed to pre-generate quiz for video {video_id}: {e}")
+
+    print(f"Done: {generated} of {len(video_ids)} videos needed a question bank")
+
+
+if __name__ == "__main__":
+    asyncio.run(prewarm(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
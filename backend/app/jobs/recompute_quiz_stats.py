@@ -0,0 +1,31 @@
+"""Rebuild materialized quiz statistics from per-video statistics and attempts.
+
+Repairs drift in users/{uid}/quiz_stats/summary.
+
+Usage (from the backend directory):
+    python -m app.jobs.recompute_quiz_stats [user_id ...]
+
+Without arguments every user is processed.
+"""
+import asyncio
+import sys
+from ..container import container
+from ..services.quiz_statistics import QuizStatisticsStore
+
+
+async def recompute(user_ids=None):
+    db = container.firestore()
+    statistics_store = QuizStatisticsStore(db)
+    if not user_ids:
+        user_ids = [doc.id for doc in db.collection('users').list_documents()]
+    
+    for user_id in user_ids:
+        summary = statistics_store.recompute(user_id)
+        print(f"Recomputed quiz stats for user {user_id}: {summary['total_attempts']} attempts, "
+              f"{summary['total_questions']} questions")
+    
+    print(f"Done: {len(user_ids)} users")
+
+
+if __name__ == "__main__":
+    asyncio.run(recompute(sys.argv[1:]))
@@ -1,8 +1,18 @@
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import videos_router, chat_router, quiz_router
+from fastapi.responses import PlainTextResponse
+from .routers import videos_router, chat_router, quiz_router, jobs_router, debug_router, limits_router
 from .routers.auth import router as auth_router
+from .container import metrics_enabled, tracing_enabled
+from .dependencies import get_metrics_reader
+from .utils.serialization import FastJSONResponse
+from .admission import AdmissionMiddleware
+from .services.question_bank import quiz_id_secret
+from . import metrics, tracing
+
+# Fail at startup rather than on the first quiz request
+quiz_id_secret()
 
 
 app = FastAPI(
@@ -10,7 +20,8 @@ app = FastAPI(
     description="AI-Powered Video Learning Assistant API",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse
 )
 
 # Configure CORS for frontend
@@ -25,19 +36,34 @@ else:
     # Also strip whitespace from each URL
     allow_origins = [url.strip() for url in frontend_urls.split(",")]
 
+# Inside CORS, so 503s from load shedding still carry CORS headers
+app.add_middleware(AdmissionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allow_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the frontend back off on 429 and 503
+    expose_headers=["Retry-After"],
 )
 
+if tracing_enabled():
+    app.add_middleware(tracing.TracingMiddleware)
+
+# Outermost, so latency includes the other middleware
+if metrics_enabled():
+    app.add_middleware(metrics.MetricsMiddleware)
+
 
 app.include_router(auth_router)
 app.include_router(videos_router)
 app.include_router(chat_router)
 app.include_router(quiz_router)
+app.include_router(jobs_router)
+app.include_router(debug_router)
+app.include_router(limits_router)
 
 
 @app.get("/")
@@ -56,4 +82,9 @@ async def health():
         "status": "healthy",
         "service": "mercurious_ai_api", 
         "message": "API is running successfully"
-    }
\ No newline at end of file
+    }
+
+# Prometheus scrape endpoint, for scrapers holding METRICS_TOKEN and admins
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(get_metrics_reader)])
+async def get_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
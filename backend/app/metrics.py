@@ -0,0 +1,372 @@
+"""Prometheus-style metrics kept in process and exported at /metrics.
+
+Hot-path cost is a dict lookup, a lock and a bisect per observation. Per-request
+Firestore and Gemini call counts are kept in a context variable set by
+MetricsMiddleware, so they need no locking.
+"""
+import time
+import asyncio
+import threading
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from . import tracing
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+TOKEN_BUCKETS = (100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+# Calls made while handling the current request: {"firestore": n, "gemini": n}
+_request_calls: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar(
+    "request_calls", default=None
+)
+# Pipeline stage the current code runs in, used to label Gemini calls
+_current_stage = contextvars.ContextVar("metrics_stage", default="other")
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {value}" for labels, value in values
+        ]
+
+
+class Gauge(_Metric):
+    """Gauge set directly, or read from a callback at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 callback: Optional[Callable[[], float]] = None):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    @contextmanager
+    def track(self, *labels: str):
+        """Count the block as in flight while it runs"""
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+    def render(self) -> List[str]:
+        if self._callback is not None:
+            try:
+                return self.header() + [f"{self.name} {self._callback()}"]
+            except Exception:
+                return self.header()
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {value}" for labels, value in values
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def totals(self) -> Dict[Tuple[str, ...], Tuple[float, int]]:
+        """(sum, count) of every label set"""
+        with self._lock:
+            return {labels: (total, count) for labels, (_, total, count) in self._series.items()}
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        lines = self.header()
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{float(bound)!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route, method and status", ("route", "method", "status")))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("route", "method")))
+http_firestore_calls = registry.register(Histogram(
+    "http_request_firestore_calls", "Firestore RPCs per HTTP request", ("route",), COUNT_BUCKETS))
+http_gemini_calls = registry.register(Histogram(
+    "http_request_gemini_calls", "Gemini calls per HTTP request", ("route",), COUNT_BUCKETS))
+stage_latency = registry.register(Histogram(
+    "stage_duration_seconds", "Latency of individual pipeline stages", ("stage",)))
+firestore_rpcs = registry.register(Counter(
+    "firestore_rpcs_total", "Firestore RPCs by method", ("method",)))
+firestore_latency = registry.register(Histogram(
+    "firestore_rpc_duration_seconds", "Latency of unary Firestore RPCs", ("method",)))
+gemini_requests = registry.register(Counter(
+    "gemini_requests_total", "Gemini generation calls by stage and outcome", ("stage", "outcome")))
+gemini_latency = registry.register(Histogram(
+    "gemini_request_duration_seconds", "Gemini generation latency by stage", ("stage",)))
+gemini_tokens = registry.register(Histogram(
+    "gemini_tokens", "Tokens per Gemini call by stage and kind", ("stage", "kind"), TOKEN_BUCKETS))
+rate_limited = registry.register(Counter(
+    "rate_limited_requests_total", "Requests refused by per-user rate limits by endpoint class", ("budget",)))
+admission_shed = registry.register(Counter(
+    "admission_shed_requests_total", "Expensive requests refused by admission control by kind", ("kind",)))
+ingestions_in_flight = registry.register(Gauge(
+    "video_ingestions_in_flight", "New videos currently being processed"))
+
+
+def _executor_queue_depth() -> float:
+    # Gemini, transcript and bulk-delete calls run in the loop's default executor
+    executor = getattr(asyncio.get_event_loop(), "_default_executor", None)
+    work_queue = getattr(executor, "_work_queue", None)
+    return work_queue.qsize() if work_queue is not None else 0
+
+
+executor_queue_depth = registry.register(Gauge(
+    "executor_queue_depth", "Tasks waiting for a thread in the default executor",
+    callback=_executor_queue_depth))
+
+
+def count_call(kind: str) -> None:
+    """Attribute one Firestore or Gemini call to the current request"""
+    calls = _request_calls.get()
+    if calls is not None:
+        calls[kind] = calls.get(kind, 0) + 1
+
+
+@contextmanager
+def stage(name: str):
+    """Time a pipeline stage; Gemini calls inside it are labeled with the stage
+
+    The stage is also recorded as a span of the current request trace.
+    """
+    token = _current_stage.set(name)
+    started = time.perf_counter()
+    try:
+        with tracing.span(name):
+            yield
+    finally:
+        stage_latency.observe(time.perf_counter() - started, name)
+        _current_stage.reset(token)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and per-request call counts by route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        calls: Dict[str, int] = {}
+        token = _request_calls.set(calls)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_calls.reset(token)
+            route = scope.get("route")
+            # Route templates keep label cardinality bounded; unmatched paths share one label
+            route_path = getattr(route, "path", "unmatched")
+            method = scope.get("method", "")
+            http_requests.inc(route_path, method, str(status["code"]))
+            http_latency.observe(elapsed, route_path, method)
+            http_firestore_calls.observe(calls.get("firestore", 0), route_path)
+            http_gemini_calls.observe(calls.get("gemini", 0), route_path)
+
+
+# Server-streaming RPCs return before the work is done, so they are counted but not timed
+_STREAMING_FIRESTORE_RPCS = {"batch_get_documents", "run_query", "run_aggregation_query"}
+_FIRESTORE_RPCS = (
+    "batch_get_documents", "batch_write", "begin_transaction", "commit", "create_document",
+    "delete_document", "get_document", "list_collection_ids", "list_documents", "rollback",
+    "run_aggregation_query", "run_query", "update_document",
+)
+_firestore_instrumented = False
+
+
+def instrument_firestore(count: bool = True, trace: bool = False) -> None:
+    """Count and trace every Firestore RPC by wrapping the generated API client once per process
+
+    One wrapper does both, like DocumentStore.rpc for the local storage backends:
+    counting feeds the RPC counters, latency histogram and per-request call
+    counts, and tracing opens a span per RPC under the current request.
+    """
+    global _firestore_instrumented
+    if _firestore_instrumented or not (count or trace):
+        return
+    from google.cloud.firestore_v1.services.firestore.client import FirestoreClient
+
+    def wrap(method_name: str, original):
+        streaming = method_name in _STREAMING_FIRESTORE_RPCS
+
+        def wrapper(*args, **kwargs):
+            if count:
+                firestore_rpcs.inc(method_name)
+                count_call("firestore")
+            rpc_span = tracing.start_firestore_span(method_name, args, kwargs) if trace else None
+            started = time.perf_counter()
+            try:
+                result = original(*args, **kwargs)
+            except Exception as e:
+                if rpc_span is not None:
+                    rpc_span.finish(e)
+                raise
+            finally:
+                if count and not streaming:
+                    firestore_latency.observe(time.perf_counter() - started, method_name)
+            if rpc_span is None:
+                return result
+            if streaming:
+                return tracing.TracedStream(result, rpc_span)
+            rpc_span.finish()
+            return result
+        return wrapper
+
+    for method_name in _FIRESTORE_RPCS:
+        original = getattr(FirestoreClient, method_name, None)
+        if original is not None:
+            setattr(FirestoreClient, method_name, wrap(method_name, original))
+    _firestore_instrumented = True
+
+
+def _record_usage(stage_name: str, usage) -> None:
+    if usage is None:
+        return
+    for kind, attribute in (("prompt", "prompt_token_count"), ("output", "candidates_token_count")):
+        value = getattr(usage, attribute, None)
+        if value:
+            gemini_tokens.observe(value, stage_name, kind)
+
+
+def instrument_genai_client(client) -> None:
+    """Record latency, outcome and token usage of a client's generate calls"""
+    models = client.models
+    generate_content = models.generate_content
+    generate_content_stream = models.generate_content_stream
+
+    def instrumented_generate(*args, **kwargs):
+        stage_name = _current_stage.get()
+        count_call("gemini")
+        started = time.perf_counter()
+        try:
+            response = generate_content(*args, **kwargs)
+        except Exception:
+            gemini_requests.inc(stage_name, "error")
+            raise
+        finally:
+            gemini_latency.observe(time.perf_counter() - started, stage_name)
+        gemini_requests.inc(stage_name, "ok")
+        _record_usage(stage_name, getattr(response, "usage_metadata", None))
+        return response
+
+    def instrumented_stream(*args, **kwargs):
+        stage_name = _current_stage.get()
+        count_call("gemini")
+        started = time.perf_counter()
+        usage = None
+        outcome = "error"
+        try:
+            for chunk in generate_content_stream(*args, **kwargs):
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                yield chunk
+            outcome = "ok"
+        finally:
+            gemini_latency.observe(time.perf_counter() - started, stage_name)
+            gemini_requests.inc(stage_name, outcome)
+            _record_usage(stage_name, usage)
+
+    models.generate_content = instrumented_generate
+    models.generate_content_stream = instrumented_stream
@@ -14,6 +14,8 @@ from .video import (
     VideoInfo,
     VideoContent,
     VideoResponse,
+    VideoResponseGlobal,
+    VideoResponseUser,
     VideoProgressUpdate,
     VideoNotes,
     VideoMetadata,
@@ -38,10 +40,17 @@ from .quiz import (
     QuizQuestion,
     QuizGenerateRequest,
     QuizResponse,
+    QuestionBank,
     QuizAnswer,
     QuizSubmission,
     QuizResult,
-    QuizResultResponse
+    QuizResultResponse,
+    ReviewItem,
+    ReviewSession,
+    ReviewAnswer,
+    ReviewSubmission,
+    ReviewResult,
+    ReviewResultResponse
 )
 
 __all__ = [
@@ -49,12 +58,15 @@ __all__ = [
     "UserBase", "UserCreate", "UserResponse", "UserLogin", "UserUpdate", "UserSettings",
     # Video
     "VideoProcessRequest", "VideoInfo", "VideoContent", "VideoResponse", 
+    "VideoResponseGlobal", "VideoResponseUser",
     "VideoProgressUpdate", "VideoNotes", "VideoMetadata", "GlobalVideo",
     "UserVideoMetadata", "UserVideoReference", "VideoLibraryItem",
     "VideoFavoriteUpdate", "VideoNotesUpdate",
     # Chat
     "ChatMessage", "ChatRequest", "ChatResponse", "ChatHistory",
     # Quiz
-    "QuizQuestion", "QuizGenerateRequest", "QuizResponse", "QuizAnswer", 
-    "QuizSubmission", "QuizResult", "QuizResultResponse"
+    "QuizQuestion", "QuizGenerateRequest", "QuizResponse", "QuestionBank", "QuizAnswer", 
+    "QuizSubmission", "QuizResult", "QuizResultResponse",
+    "ReviewItem", "ReviewSession", "ReviewAnswer", "ReviewSubmission", "ReviewResult",
+    "ReviewResultResponse"
 ]
@@ -14,6 +14,7 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     response: str
     timestamp: datetime
+    tokens_used: int = 0
 
 class ChatHistory(BaseModel):
     video_id: str
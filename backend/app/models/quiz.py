@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 class QuizOption(BaseModel):
@@ -11,6 +11,7 @@ class QuizQuestion(BaseModel):
     options: List[str]  
     correct_answer: str
     explanation: str
+    topic: Optional[str] = None  # main point or key concept the question covers
 
 class QuizGenerateRequest(BaseModel):
     video_id: str
@@ -20,6 +21,16 @@ class QuizResponse(BaseModel):
     questions: List[QuizQuestion]
     video_id: str
     generated_at: datetime
+    quiz_id: Optional[str] = None
+
+# Per-video pool of generated questions that quizzes are sampled from
+class QuestionBank(BaseModel):
+    video_id: str
+    version: str
+    questions: List[QuizQuestion]
+    generated_at: datetime
+    # Generated ahead of the first quiz request rather than on demand
+    prewarmed: bool = False
 
 class QuizAnswer(BaseModel):
     question_index: int
@@ -28,6 +39,7 @@ class QuizAnswer(BaseModel):
 class QuizSubmission(BaseModel):
     video_id: str
     answers: List[QuizAnswer]
+    quiz_id: Optional[str] = None  # defaults to the quiz matching the number of answers
 
 class QuizResult(BaseModel):
     video_id: str
@@ -41,3 +53,38 @@ class QuizResult(BaseModel):
 class QuizResultResponse(BaseModel):
     result: QuizResult
     questions: List[QuizQuestion]  # Include questions for review
+
+# Spaced-repetition item for a missed question, stored in users/{user_id}/review_items/{item_id}
+class ReviewItem(BaseModel):
+    item_id: str
+    video_id: str
+    question: QuizQuestion
+    repetitions: int = 0  # consecutive correct reviews
+    interval_days: float = 0
+    ease_factor: float = 2.5
+    lapses: int = 0
+    due_at: datetime
+    last_reviewed_at: Optional[datetime] = None
+
+class ReviewSession(BaseModel):
+    items: List[ReviewItem]
+    due_count: int  # all items due now, including ones beyond this session
+
+class ReviewAnswer(BaseModel):
+    item_id: str
+    selected_answer: str
+
+class ReviewSubmission(BaseModel):
+    answers: List[ReviewAnswer]
+
+class ReviewResult(BaseModel):
+    item_id: str
+    correct: bool
+    correct_answer: str
+    explanation: str
+    next_due_at: datetime
+
+class ReviewResultResponse(BaseModel):
+    results: List[ReviewResult]
+    score: int
+    total_questions: int
@@ -62,6 +62,20 @@ class VideoResponse(BaseModel):
     is_favorite: bool = False
     notes: str = ""
 
+# The two halves of VideoResponse, serialized separately so the global half
+# can be cached and shared by every user
+class VideoResponseGlobal(BaseModel):
+    video_id: str
+    info: VideoInfo
+    content: VideoContent
+    created_at: datetime
+
+class VideoResponseUser(BaseModel):
+    progress: float = 0.0
+    last_watched: Optional[datetime] = None
+    is_favorite: bool = False
+    notes: str = ""
+
 # Video library item (for user's library view)
 class VideoLibraryItem(BaseModel):
     video_id: str
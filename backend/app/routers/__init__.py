@@ -1,5 +1,8 @@
 from .videos import app as videos_router
 from .chat import app as chat_router
 from .quiz import app as quiz_router
+from .jobs import app as jobs_router
+from .debug import app as debug_router
+from .limits import app as limits_router
 
-__all__ = ["videos_router", "chat_router", "quiz_router"]
\ No newline at end of file
+__all__ = ["videos_router", "chat_router", "quiz_router", "jobs_router", "debug_router", "limits_router"]
\ No newline at end of file
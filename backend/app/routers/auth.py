@@ -3,12 +3,12 @@ from typing import Dict, Any
 from ..models.user import UserCreate, UserResponse, UserLogin, UserUpdate
 from ..services.auth_service import AuthService
 from ..dependencies import get_current_user, get_firestore_db
+from ..container import get_auth_service
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
-auth_service = AuthService()
 
 @router.post("/register", response_model=UserResponse)
-async def register_user(user_data: UserCreate):
+async def register_user(user_data: UserCreate, auth_service: AuthService = Depends(get_auth_service)):
     #Register a new user with Firebase Auth
     try:
         user = await auth_service.create_user(user_data)
@@ -22,7 +22,7 @@ async def register_user(user_data: UserCreate):
         )
 
 @router.post("/verify-token")
-async def verify_token(current_user: dict = Depends(get_current_user)):
+async def verify_token(current_user: dict = Depends(get_current_user), auth_service: AuthService = Depends(get_auth_service)):
     #Verify Firebase token and return user information
     #This endpoint is called by the frontend after Firebase auth
     try:
@@ -58,7 +58,7 @@ async def verify_token(current_user: dict = Depends(get_current_user)):
         )
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: dict = Depends(get_current_user)):
+async def get_current_user_info(current_user: dict = Depends(get_current_user), auth_service: AuthService = Depends(get_auth_service)):
     #Get current authenticated user information
     try:
         user = await auth_service.get_user_by_uid(current_user['uid'])
@@ -79,7 +79,8 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user)):
 @router.put("/me", response_model=UserResponse)
 async def update_current_user(
     user_update: UserUpdate, 
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     #Update current authenticated user information
     try:
@@ -94,11 +95,15 @@ async def update_current_user(
         )
 
 @router.delete("/me")
-async def delete_current_user(current_user: dict = Depends(get_current_user)):
+async def delete_current_user(current_user: dict = Depends(get_current_user), auth_service: AuthService = Depends(get_auth_service)):
     #Delete current authenticated user account
     try:
-        await auth_service.delete_user(current_user['uid'])
-        return {"success": True, "message": "User account deleted successfully"}
+        job_id = await auth_service.delete_user(current_user['uid'])
+        return {
+            "success": True,
+            "message": "User account deleted successfully; stored data is being removed in the background",
+            "job_id": job_id
+        }
     except HTTPException:
         raise
     except Exception as e:
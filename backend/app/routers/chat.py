@@ -3,14 +3,14 @@ from typing import Dict, Any, Optional, List
 from ..models.chat import ChatRequest, ChatResponse, ChatHistory, ChatMessage
 from ..services.chat_service import ChatService
 from ..services.video_database_service import VideoDatabase
-from ..dependencies import get_current_user
+from ..dependencies import get_current_user, rate_limited
+from ..services.rate_limiter import CHAT
+from ..container import get_chat_service, get_video_db
 
 app = APIRouter()
-chat_service = ChatService()
-video_db = VideoDatabase()
 
 @app.post("/api/chat/send", response_model=ChatResponse)
-async def send_chat_message(request: ChatRequest, current_user: dict = Depends(get_current_user)):
+async def send_chat_message(request: ChatRequest, current_user: dict = Depends(rate_limited(CHAT)), chat_service: ChatService = Depends(get_chat_service), video_db: VideoDatabase = Depends(get_video_db)):
     """Send a message to the chat assistant with persistent history"""
     try:
         user_id = current_user.get("uid")
@@ -47,28 +47,27 @@ async def send_chat_message(request: ChatRequest, current_user: dict = Depends(g
         # Send message using chat service
         response = await chat_service.send_message(request, video_context, chat_history)
         
-        # Save user message to Firestore
+        # Save both messages and update chat counters in one write
         user_message = {
             "role": "user",
             "content": request.message,
             "timestamp": response.timestamp.isoformat()
         }
-        await video_db.save_chat_message(user_id, request.video_id, user_message)
-        
-        # Save AI response to Firestore
         ai_message = {
             "role": "assistant",
             "content": response.response,
             "timestamp": response.timestamp.isoformat()
         }
-        await video_db.save_chat_message(user_id, request.video_id, ai_message)
+        await video_db.save_chat_messages(
+            user_id, request.video_id, [user_message, ai_message], response.tokens_used
+        )
         
         return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/chat/history/{video_id}")
-async def get_chat_history(video_id: str, current_user: dict = Depends(get_current_user)):
+async def get_chat_history(video_id: str, current_user: dict = Depends(get_current_user), video_db: VideoDatabase = Depends(get_video_db)):
     """Get chat history for a specific video"""
     try:
         user_id = current_user.get("uid")
@@ -91,7 +90,7 @@ async def get_chat_history(video_id: str, current_user: dict = Depends(get_curre
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/api/chat/history/{video_id}")
-async def clear_chat_history(video_id: str, current_user: dict = Depends(get_current_user)):
+async def clear_chat_history(video_id: str, current_user: dict = Depends(get_current_user), video_db: VideoDatabase = Depends(get_video_db)):
     """Clear chat history for a specific video"""
     try:
         user_id = current_user.get("uid")
@@ -112,33 +111,55 @@ async def clear_chat_history(video_id: str, current_user: dict = Depends(get_cur
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/chat/cache/stats")
+async def get_answer_cache_stats(current_user: dict = Depends(get_current_user), chat_service: ChatService = Depends(get_chat_service)):
+    """Get hit-rate metrics for the shared answer cache"""
+    return chat_service.answer_cache.stats()
+
+@app.get("/api/chat/stats")
+async def get_user_chat_stats(current_user: dict = Depends(get_current_user), video_db: VideoDatabase = Depends(get_video_db)):
+    """Get lifetime chat statistics for the current user"""
+    try:
+        user_id = current_user.get("uid")
+        if not user_id:
+            raise HTTPException(status_code=401, detail="User ID not found in token")
+        
+        stats = await video_db.get_user_chat_stats(user_id)
+        return {
+            "total_messages": stats["total_messages"],
+            "user_messages": stats["user_messages"],
+            "ai_messages": stats["assistant_messages"],
+            "total_tokens": stats["total_tokens"],
+            "last_activity": stats["last_activity"]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/chat/stats/{video_id}")
-async def get_chat_stats(video_id: str, current_user: dict = Depends(get_current_user)):
+async def get_chat_stats(video_id: str, current_user: dict = Depends(get_current_user), video_db: VideoDatabase = Depends(get_video_db)):
     """Get chat statistics for a specific video"""
     try:
         user_id = current_user.get("uid")
         if not user_id:
             raise HTTPException(status_code=401, detail="User ID not found in token")
         
-        # Check if user has this video in their library
-        video_exists = await video_db.check_video_in_user_library(user_id, video_id)
-        if not video_exists:
+        # Counters are maintained at write time, so this is a single small read
+        stats = await video_db.get_chat_stats(user_id, video_id)
+        if stats is None:
             raise HTTPException(status_code=404, detail="Video not found in user's library")
         
-        # Get chat history from Firestore
-        chat_history = await video_db.get_chat_history(user_id, video_id)
-        
-        # Calculate stats
-        total_messages = len(chat_history)
-        user_messages = sum(1 for msg in chat_history if msg.get("role") == "user")
-        ai_messages = sum(1 for msg in chat_history if msg.get("role") == "assistant")
-        
         return {
             "video_id": video_id,
-            "total_messages": total_messages,
-            "user_messages": user_messages,
-            "ai_messages": ai_messages,
-            "has_history": total_messages > 0
+            "total_messages": stats["total_messages"],
+            "user_messages": stats["user_messages"],
+            "ai_messages": stats["assistant_messages"],
+            "total_tokens": stats["total_tokens"],
+            "last_activity": stats["last_activity"],
+            "has_history": stats["total_messages"] > 0
         }
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
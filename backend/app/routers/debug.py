@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
+from ..dependencies import get_admin_user
+from ..tracing import trace_buffer
+
+app = APIRouter()
+
+@app.get("/api/debug/traces")
+async def list_slowest_traces(
+    limit: int = Query(20, ge=1, le=200),
+    name: Optional[str] = None,
+    current_user: dict = Depends(get_admin_user)
+):
+    """Slowest recent request traces, optionally filtered by route (e.g. "/api/chat/send")"""
+    return {
+        "buffered": len(trace_buffer),
+        "traces": [trace.summary() for trace in trace_buffer.slowest(limit, name)]
+    }
+
+@app.get("/api/debug/traces/{trace_id}")
+async def get_trace(trace_id: str, current_user: dict = Depends(get_admin_user)):
+    """Full span tree of a buffered trace"""
+    trace = trace_buffer.get(trace_id)
+    if not trace:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace.to_dict()
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, HTTPException, Depends
+from ..services.job_manager import job_manager
+from ..dependencies import get_current_user
+
+app = APIRouter()
+
+@app.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Get progress of a background job started by the current user"""
+    try:
+        user_id = current_user.get("uid")
+        if not user_id:
+            raise HTTPException(status_code=401, detail="User ID not found in token")
+        
+        job = job_manager.get(job_id)
+        if not job or job["user_id"] != user_id:
+            raise HTTPException(status_code=404, detail="Job not found")
+        
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
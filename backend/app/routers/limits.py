@@ -0,0 +1,20 @@
+from fastapi import APIRouter, HTTPException, Depends
+from ..services.rate_limiter import RateLimiter
+from ..dependencies import get_current_user
+from ..container import get_rate_limiter
+
+app = APIRouter()
+
+@app.get("/api/limits")
+async def get_rate_limits(current_user: dict = Depends(get_current_user), rate_limiter: RateLimiter = Depends(get_rate_limiter)):
+    """Get the current user's remaining requests per endpoint class (videos, quizzes, chat)"""
+    try:
+        user_id = current_user.get("uid")
+        if not user_id:
+            raise HTTPException(status_code=401, detail="User ID not found in token")
+        
+        return rate_limiter.usage(user_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,53 +1,58 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any, List
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, List, Optional
 from ..models.quiz import (
     QuizGenerateRequest, QuizResponse, QuizSubmission, 
-    QuizResult, QuizResultResponse
+    QuizResult, QuizResultResponse, ReviewSession, ReviewSubmission,
+    ReviewResultResponse
 )
 from ..services.quiz_service import QuizService
-from ..dependencies import get_current_user
+from ..dependencies import get_current_user, rate_limited
+from ..services.rate_limiter import QUIZZES
+from ..container import get_quiz_service
+from ..utils.serialization import FastJSONResponse, dumps
+from ..constants import MAX_QUIZ_QUESTIONS
 
 app = APIRouter()
 
-# Initialize quiz service with error handling
-quiz_service = None
-try:
-    quiz_service = QuizService()
-    print("QuizService initialized successfully")
-except Exception as e:
-    print(f"Error initializing QuizService: {e}")
-    # Don't fail the entire router if QuizService fails to initialize
-
 # Test endpoint to verify router is working
 @app.get("/api/quiz/health")
 async def quiz_health():
     """Health check for quiz service"""
+    try:
+        get_quiz_service()
+        quiz_service_available = True
+    except HTTPException:
+        quiz_service_available = False
     return {
         "status": "ok",
         "service": "quiz_router",
-        "quiz_service_available": quiz_service is not None
+        "quiz_service_available": quiz_service_available
     }
 
+@app.get("/api/quiz/cache/stats")
+async def get_quiz_cache_stats(current_user: dict = Depends(get_current_user), quiz_service: QuizService = Depends(get_quiz_service)):
+    """Get question bank freshness, generation and pre-generation metrics"""
+    return quiz_service.cache_stats()
+
 @app.post("/api/quiz/generate", response_model=QuizResponse)
 async def generate_quiz(
     request: QuizGenerateRequest, 
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(rate_limited(QUIZZES)),
+    quiz_service: QuizService = Depends(get_quiz_service)
 ):
     """Generate AI-powered quiz for a video"""
     try:
-        if quiz_service is None:
-            raise HTTPException(status_code=500, detail="Quiz service is not available")
-            
         user_id = current_user.get("uid")
         if not user_id:
             raise HTTPException(status_code=401, detail="User ID not found in token")
         
         # Validate request
-        if request.num_questions < 1 or request.num_questions > 20:
-            raise HTTPException(status_code=400, detail="Number of questions must be between 1 and 20")
+        if request.num_questions < 1 or request.num_questions > MAX_QUIZ_QUESTIONS:
+            raise HTTPException(status_code=400, detail=f"Number of questions must be between 1 and {MAX_QUIZ_QUESTIONS}")
         
         quiz_response = await quiz_service.generate_quiz(request, user_id)
-        return quiz_response
+        return FastJSONResponse(quiz_response)
         
     except HTTPException:
         raise
@@ -58,10 +63,41 @@ async def generate_quiz(
         print(f"Full traceback: {error_details}")
         raise HTTPException(status_code=500, detail=f"Error generating quiz: {str(e)}")
 
+@app.post("/api/quiz/generate/stream")
+async def generate_quiz_stream(
+    request: QuizGenerateRequest,
+    current_user: dict = Depends(rate_limited(QUIZZES)),
+    quiz_service: QuizService = Depends(get_quiz_service)
+):
+    """Generate a quiz as server-sent events, one "question" event per question
+    
+    A final "complete" event carries the persisted quiz and its quiz_id for submission;
+    failures after the stream has started are sent as an "error" event.
+    """
+    user_id = current_user.get("uid")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="User ID not found in token")
+    
+    if request.num_questions < 1 or request.num_questions > MAX_QUIZ_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"Number of questions must be between 1 and {MAX_QUIZ_QUESTIONS}")
+    
+    events = await quiz_service.open_quiz_stream(request, user_id)
+    
+    async def event_stream():
+        async for event in events:
+            yield f"event: {event['event']}\ndata: {dumps(event['data']).decode()}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/quiz/submit", response_model=QuizResultResponse)
 async def submit_quiz(
     submission: QuizSubmission,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    quiz_service: QuizService = Depends(get_quiz_service)
 ):
     """Submit quiz answers and get results with detailed feedback"""
     try:
@@ -74,7 +110,7 @@ async def submit_quiz(
             raise HTTPException(status_code=400, detail="No answers provided")
         
         result_response = await quiz_service.submit_quiz(submission, user_id)
-        return result_response
+        return FastJSONResponse(result_response)
         
     except HTTPException:
         raise
@@ -85,10 +121,55 @@ async def submit_quiz(
         print(f"Full traceback: {error_details}")
         raise HTTPException(status_code=500, detail=f"Error processing quiz submission: {str(e)}")
 
+@app.get("/api/quiz/review/due", response_model=ReviewSession)
+async def get_review_session(
+    limit: Optional[int] = None,
+    current_user: dict = Depends(get_current_user),
+    quiz_service: QuizService = Depends(get_quiz_service)
+):
+    """Get missed questions due for review across the user's library"""
+    try:
+        user_id = current_user.get("uid")
+        if not user_id:
+            raise HTTPException(status_code=401, detail="User ID not found in token")
+        
+        if limit is not None and limit < 1:
+            raise HTTPException(status_code=400, detail="Limit must be at least 1")
+        
+        return await quiz_service.get_review_session(user_id, limit)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching review session: {str(e)}")
+
+@app.post("/api/quiz/review/submit", response_model=ReviewResultResponse)
+async def submit_review(
+    submission: ReviewSubmission,
+    current_user: dict = Depends(get_current_user),
+    quiz_service: QuizService = Depends(get_quiz_service)
+):
+    """Submit review answers and reschedule each reviewed question"""
+    try:
+        user_id = current_user.get("uid")
+        if not user_id:
+            raise HTTPException(status_code=401, detail="User ID not found in token")
+        
+        if not submission.answers:
+            raise HTTPException(status_code=400, detail="No answers provided")
+        
+        return await quiz_service.submit_review(user_id, submission)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing review submission: {str(e)}")
+
 @app.get("/api/quiz/history/{video_id}", response_model=List[QuizResult])
 async def get_quiz_history(
     video_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    quiz_service: QuizService = Depends(get_quiz_service)
 ):
     """Get user's quiz attempt history for a specific video"""
     try:
@@ -109,7 +190,8 @@ async def get_quiz_history(
 
 @app.get("/api/quiz/statistics", response_model=Dict[str, Any])
 async def get_quiz_statistics(
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    quiz_service: QuizService = Depends(get_quiz_service)
 ):
     """Get comprehensive quiz statistics for the current user"""
     try:
@@ -128,7 +210,8 @@ async def get_quiz_statistics(
 @app.delete("/api/quiz/reset/{video_id}")
 async def reset_quiz_attempts(
     video_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    quiz_service: QuizService = Depends(get_quiz_service)
 ):
     """Reset all quiz attempts for a specific video"""
     try:
@@ -139,12 +222,16 @@ async def reset_quiz_attempts(
         if not video_id or not video_id.strip():
             raise HTTPException(status_code=400, detail="Video ID is required")
         
-        success = await quiz_service.reset_quiz_attempts(user_id, video_id)
+        reset = await quiz_service.reset_quiz_attempts(user_id, video_id)
         
-        if success:
-            return {"message": "Quiz attempts reset successfully"}
-        else:
+        if not reset["success"]:
             raise HTTPException(status_code=500, detail="Failed to reset quiz attempts")
+        if reset["job_id"]:
+            return {
+                "message": "Quiz attempts reset; old attempts are being deleted in the background",
+                "job_id": reset["job_id"]
+            }
+        return {"message": "Quiz attempts reset successfully"}
         
     except HTTPException:
         raise
@@ -154,7 +241,8 @@ async def reset_quiz_attempts(
 @app.get("/api/quiz/check/{video_id}")
 async def check_quiz_availability(
     video_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    quiz_service: QuizService = Depends(get_quiz_service)
 ):
     """Check if a quiz is available or cached for a video"""
     try:
@@ -166,24 +254,13 @@ async def check_quiz_availability(
             raise HTTPException(status_code=400, detail="Video ID is required")
         
         # Check if user has access to the video
-        from ..services.video_database_service import VideoDatabase
-        video_db = VideoDatabase()
-        has_access = await video_db.check_video_in_user_library(user_id, video_id)
+        has_access = await quiz_service.video_db.check_video_in_user_library(user_id, video_id)
         
         if not has_access:
             raise HTTPException(status_code=403, detail="User does not have access to this video")
         
-        # Check if quiz exists and is cached
-        cached_quiz = await quiz_service._get_cached_quiz(video_id)
-        is_available = cached_quiz is not None
-        is_fresh = quiz_service._is_quiz_fresh(cached_quiz) if cached_quiz else False
-        
-        return {
-            "video_id": video_id,
-            "quiz_available": is_available,
-            "quiz_fresh": is_fresh,
-            "generated_at": cached_quiz.generated_at.isoformat() if cached_quiz else None
-        }
+        # Check if a question bank exists and is fresh
+        return await quiz_service.get_quiz_availability(video_id)
         
     except HTTPException:
         raise
@@ -194,7 +271,10 @@ async def check_quiz_availability(
 @app.get("/api/quiz/{video_id}", response_model=QuizResponse)
 async def get_quiz(
     video_id: str,
-    current_user: dict = Depends(get_current_user)
+    num_questions: int = 5,
+    quiz_id: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    quiz_service: QuizService = Depends(get_quiz_service)
 ):
     """Get existing quiz for a video (must be already generated)"""
     try:
@@ -206,20 +286,18 @@ async def get_quiz(
             raise HTTPException(status_code=400, detail="Video ID is required")
         
         # Check if user has access to the video
-        from ..services.video_database_service import VideoDatabase
-        video_db = VideoDatabase()
-        has_access = await video_db.check_video_in_user_library(user_id, video_id)
+        has_access = await quiz_service.video_db.check_video_in_user_library(user_id, video_id)
         
         if not has_access:
             raise HTTPException(status_code=403, detail="User does not have access to this video")
         
-        # Get cached quiz
-        cached_quiz = await quiz_service._get_cached_quiz(video_id)
+        # Get cached quiz, or sample one from the existing question bank
+        cached_quiz = await quiz_service.get_existing_quiz(user_id, video_id, num_questions, quiz_id)
         
         if not cached_quiz:
             raise HTTPException(status_code=404, detail="Quiz not found. Please generate a quiz first.")
         
-        return cached_quiz
+        return FastJSONResponse(cached_quiz)
         
     except HTTPException:
         raise
@@ -1,19 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Request
+from typing import List, Optional
 from ..models import (
     VideoProcessRequest, VideoResponse, VideoLibraryItem,
     VideoProgressUpdate, VideoFavoriteUpdate, VideoNotesUpdate
 )
 from ..services import VideoService
-from ..dependencies import get_current_user
+from ..services.video_projection import VIDEO_FIELDS, LIBRARY_FIELDS
+from ..utils.serialization import FastJSONResponse
+from ..dependencies import get_current_user, rate_limited
+from ..services.rate_limiter import VIDEOS
+from ..container import get_video_service
 from ..constants import EXAMPLE_VIDEO_IDS
 
 app = APIRouter()
-video_service = VideoService()
 
 # Video Processing
 @app.post("/api/videos/process", response_model=VideoResponse)
-async def process_video(request: VideoProcessRequest, current_user: dict = Depends(get_current_user)):
+async def process_video(request: VideoProcessRequest, current_user: dict = Depends(rate_limited(VIDEOS)), video_service: VideoService = Depends(get_video_service)):
     """Process a video and add it to user's library"""
     try:
         user_id = current_user.get("uid")
@@ -21,65 +24,88 @@ async def process_video(request: VideoProcessRequest, current_user: dict = Depen
             raise HTTPException(status_code=401, detail="User ID not found in token")
         
         content = await video_service.process_video(request.url, user_id)
-        return content
+        return FastJSONResponse(content)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # User Library Management
 @app.get("/api/videos/dashboard", response_model=List[VideoLibraryItem])
-async def get_user_dashboard(current_user: dict = Depends(get_current_user)):
-    """Get user's dashboard with video library data"""
+async def get_user_dashboard(fields: Optional[str] = None, current_user: dict = Depends(get_current_user), video_service: VideoService = Depends(get_video_service)):
+    """Get user's dashboard with video library data
+
+    fields: comma-separated item fields to return, e.g. "video_id,title,progress"
+    """
     try:
         user_id = current_user.get("uid")
         if not user_id:
             raise HTTPException(status_code=401, detail="User ID not found in token")
         
-        library = await video_service.get_user_library(user_id)
-        return library
+        selected = LIBRARY_FIELDS.parse(fields)
+        library = await video_service.get_user_library(user_id, fields=selected)
+        return FastJSONResponse(library)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/videos/{video_id}", response_model=VideoResponse)
-async def get_video(video_id: str, current_user: dict = Depends(get_current_user)):
-    """Get a specific video from user's library or allow access to example videos"""
+async def get_video(video_id: str, request: Request, fields: Optional[str] = None, current_user: dict = Depends(get_current_user), video_service: VideoService = Depends(get_video_service)):
+    """Get a specific video from user's library or allow access to example videos
+
+    Served from a cached, precompressed global body with a strong ETag;
+    If-None-Match with the current tag gets a 304.
+
+    fields: comma-separated fields to return instead of the whole video, e.g.
+    "info,content.summary,progress"; only those are read from storage.
+    """
     try:
         user_id = current_user.get("uid")
         if not user_id:
             raise HTTPException(status_code=401, detail="User ID not found in token")
         
-        video = await video_service.get_user_video(user_id, video_id)
-        if not video:
-            raise HTTPException(status_code=404, detail="Video not found in user's library")
+        selected = VIDEO_FIELDS.parse(fields)
+        if selected is not None:
+            projected = await video_service.get_user_video_fields(user_id, video_id, selected)
+            if not projected:
+                raise HTTPException(status_code=404, detail="Video not found in user's library")
+            video, in_library = projected
+        else:
+            result = await video_service.get_user_video_body(user_id, video_id)
+            if not result:
+                raise HTTPException(status_code=404, detail="Video not found in user's library")
+            body, user_metadata = result
+            in_library = user_metadata is not None
         
         # If this is an example video and not yet in user's library, add it automatically
-        if video_id in EXAMPLE_VIDEO_IDS:
-            is_in_library = await video_service.video_db.check_video_in_user_library(user_id, video_id)
-            if not is_in_library:
-                # Auto-add example video to user's library for future reference
-                await video_service.video_db.add_video_to_user_library(user_id, video_id)
-                # Update access statistics
-                await video_service.video_db.update_global_video_access(video_id)
-                # Re-fetch to get the updated response with library metadata
-                video = await video_service.get_user_video(user_id, video_id)
+        if video_id in EXAMPLE_VIDEO_IDS and not in_library:
+            # Auto-add example video to user's library for future reference
+            await video_service.video_db.add_video_to_user_library(user_id, video_id)
+            # Update access statistics
+            await video_service.video_db.update_global_video_access(video_id)
+            # The new library entry has default metadata, which is what the response already carries
         
-        return video
+        if selected is not None:
+            return FastJSONResponse(video)
+        return body.response(request, user_metadata)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/api/videos/{video_id}")
-async def remove_video_from_library(video_id: str, current_user: dict = Depends(get_current_user)):
+async def remove_video_from_library(video_id: str, current_user: dict = Depends(get_current_user), video_service: VideoService = Depends(get_video_service)):
     """Remove a video from user's library"""
     try:
         user_id = current_user.get("uid")
         if not user_id:
             raise HTTPException(status_code=401, detail="User ID not found in token")
         
-        success = await video_service.remove_video_from_library(user_id, video_id)
-        if not success:
-            raise HTTPException(status_code=404, detail="Video not found in user's library")
-        
+        job_id = await video_service.remove_video_from_library(user_id, video_id)
+        if job_id:
+            return {
+                "message": "Video removed from library; its quiz data is being deleted in the background",
+                "job_id": job_id
+            }
         return {"message": "Video removed from library successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -88,7 +114,8 @@ async def remove_video_from_library(video_id: str, current_user: dict = Depends(
 async def update_video_progress(
     video_id: str, 
     progress_update: VideoProgressUpdate,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    video_service: VideoService = Depends(get_video_service)
 ):
     """Update user's video progress"""
     try:
@@ -112,7 +139,8 @@ async def update_video_progress(
 async def toggle_video_favorite(
     video_id: str,
     favorite_update: VideoFavoriteUpdate,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    video_service: VideoService = Depends(get_video_service)
 ):
     """Toggle video favorite status"""
     try:
@@ -133,7 +161,8 @@ async def toggle_video_favorite(
 async def update_video_notes(
     video_id: str,
     notes_update: VideoNotesUpdate,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    video_service: VideoService = Depends(get_video_service)
 ):
     """Update user's video notes"""
     try:
@@ -0,0 +1,139 @@
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Any
+
+
+# Words that carry no meaning for matching questions about a single video
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "of", "in", "on", "to",
+    "for", "and", "or", "it", "this", "that", "these", "those", "what", "whats",
+    "which", "who", "how", "why", "do", "does", "did", "can", "could", "would",
+    "you", "me", "i", "my", "please", "tell", "explain", "about", "video",
+    "s", "there", "its", "some", "give", "us",
+}
+
+
+class AnswerCache:
+    """Per-video cache of first-turn chat answers, shared across users"""
+
+    def __init__(self):
+        self.enabled = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() != "false"
+        self.ttl_seconds = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(6 * 3600)))
+        self.similarity_threshold = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.8"))
+        self.max_videos = int(os.getenv("ANSWER_CACHE_MAX_VIDEOS", "500"))
+        self.max_entries_per_video = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "50"))
+
+        # video_id -> OrderedDict(normalized question -> entry), both in LRU order
+        self._videos: "OrderedDict[str, OrderedDict[str, Dict[str, Any]]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stores = 0
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """Lowercase, drop punctuation and collapse whitespace"""
+        normalized = question.lower().replace("'", "")
+        normalized = re.sub(r"[^\w\s]", " ", normalized)
+        return " ".join(normalized.split())
+
+    @staticmethod
+    def _tokens(normalized: str) -> Set[str]:
+        """Content tokens used for similarity matching"""
+        tokens = {token for token in normalized.split() if token not in _STOPWORDS}
+        # Fall back to every token for questions made only of stopwords
+        return tokens or set(normalized.split())
+
+    @staticmethod
+    def _similarity(a: Set[str], b: Set[str]) -> float:
+        """Jaccard similarity between two token sets"""
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    def get(self, video_id: str, question: str) -> Optional[str]:
+        """Return a cached answer for a question similar enough to one already answered"""
+        if not self.enabled:
+            return None
+
+        entries = self._videos.get(video_id)
+        if entries is None:
+            self.misses += 1
+            return None
+
+        now = time.time()
+        normalized = self.normalize_question(question)
+        tokens = self._tokens(normalized)
+
+        best_key, best_score = None, 0.0
+        for key in list(entries.keys()):
+            entry = entries[key]
+            if now - entry["created_at"] > self.ttl_seconds:
+                del entries[key]
+                self.expired += 1
+                continue
+            score = 1.0 if key == normalized else self._similarity(tokens, entry["tokens"])
+            if score > best_score:
+                best_key, best_score = key, score
+
+        if best_key is None or best_score < self.similarity_threshold:
+            self.misses += 1
+            return None
+
+        entries.move_to_end(best_key)
+        self._videos.move_to_end(video_id)
+        entries[best_key]["hits"] += 1
+        self.hits += 1
+        return entries[best_key]["answer"]
+
+    def put(self, video_id: str, question: str, answer: str) -> None:
+        """Store an answer for a first-turn question"""
+        if not self.enabled:
+            return
+
+        normalized = self.normalize_question(question)
+        if not normalized:
+            return
+
+        entries = self._videos.get(video_id)
+        if entries is None:
+            entries = OrderedDict()
+            self._videos[video_id] = entries
+        self._videos.move_to_end(video_id)
+
+        entries[normalized] = {
+            "answer": answer,
+            "tokens": self._tokens(normalized),
+            "created_at": time.time(),
+            "hits": 0,
+        }
+        entries.move_to_end(normalized)
+        self.stores += 1
+
+        while len(entries) > self.max_entries_per_video:
+            entries.popitem(last=False)
+        while len(self._videos) > self.max_videos:
+            self._videos.popitem(last=False)
+
+    def invalidate(self, video_id: str) -> None:
+        """Drop every cached answer for a video"""
+        self._videos.pop(video_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate metrics for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "expired": self.expired,
+            "stores": self.stores,
+            "cached_videos": len(self._videos),
+            "cached_answers": sum(len(entries) for entries in self._videos.values()),
+            "ttl_seconds": self.ttl_seconds,
+            "similarity_threshold": self.similarity_threshold,
+        }
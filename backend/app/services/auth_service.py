@@ -1,15 +1,17 @@
 from datetime import datetime
 from typing import Optional, Dict, Any
 from fastapi import HTTPException, status
-from firebase_admin import auth
-from google.cloud.firestore import Client as FirestoreClient
 from ..config.firebase_config import firebase_config
+from ..container import container
 from ..models.user import UserCreate, UserResponse, UserLogin, UserUpdate
+from .bulk_delete import BulkDeleter
+from .job_manager import job_manager
 
 class AuthService:
-    def __init__(self):
+    def __init__(self, db=None, bulk_deleter: Optional[BulkDeleter] = None):
         self.auth = firebase_config.get_auth()
-        self.db = firebase_config.get_firestore()
+        self.db = db if db is not None else container.firestore()
+        self.bulk_deleter = bulk_deleter or BulkDeleter(self.db)
     
     async def create_user(self, user_data: UserCreate) -> UserResponse:
         #Create a new user with Firebase Auth and store additional data in Firestore
@@ -118,14 +120,20 @@ class AuthService:
         except Exception as e:
             print(f"Error updating last login: {e}")
     
-    async def delete_user(self, uid: str):
-        #Delete user from Firebase Auth and Firestore
+    async def delete_user(self, uid: str) -> str:
+        #Delete user from Firebase Auth, then their Firestore data in the background
+        #Returns the id of the background deletion job
         try:
             # Delete from Firebase Auth
             self.auth.delete_user(uid)
             
-            # Delete from Firestore
-            self.db.collection('users').document(uid).delete()
+            # Delete the user document with its videos, quizzes, attempts and stats subcollections
+            user_ref = self.db.collection('users').document(uid)
+            return job_manager.submit(
+                uid,
+                'account_deletion',
+                lambda progress: self.bulk_deleter.delete_tree(user_ref, progress)
+            )
             
         except Exception as e:
             raise HTTPException(
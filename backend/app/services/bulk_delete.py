@@ -0,0 +1,61 @@
+import os
+import asyncio
+from typing import Callable, Optional, Union
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+from google.cloud.firestore_v1.field_path import FieldPath
+
+ProgressCallback = Optional[Callable[[int], None]]
+
+
+class BulkDeleter:
+    """Recursive, throttled bulk deletes shared by resets, library removal and account deletion
+
+    Deletes go through a Firestore BulkWriter (parallel batches, ramped up to
+    BULK_DELETE_MAX_OPS_PER_SECOND), and at most BULK_DELETE_PARALLELISM delete
+    operations run at once per deleter. The container builds one deleter and
+    injects it into every service, so the cap holds per process.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.max_ops_per_second = int(os.getenv("BULK_DELETE_MAX_OPS_PER_SECOND", "500"))
+        self.parallelism = int(os.getenv("BULK_DELETE_PARALLELISM", "4"))
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _bulk_writer(self, on_progress: ProgressCallback):
+        writer = self.db.bulk_writer(BulkWriterOptions(
+            initial_ops_per_second=min(500, self.max_ops_per_second),
+            max_ops_per_second=self.max_ops_per_second
+        ))
+        if on_progress:
+            writer.on_write_result(lambda reference, result, bulk_writer: on_progress(1))
+        return writer
+
+    def delete_tree_sync(self, reference, on_progress: ProgressCallback = None) -> int:
+        """Delete a document or collection and everything beneath it"""
+        return self.db.recursive_delete(reference, bulk_writer=self._bulk_writer(on_progress))
+
+    def delete_query_sync(self, query, on_progress: ProgressCallback = None) -> int:
+        """Delete the documents matched by a query (not their subcollections)"""
+        writer = self._bulk_writer(on_progress)
+        deleted = 0
+        try:
+            for doc in query.select([FieldPath.document_id()]).stream():
+                writer.delete(doc.reference)
+                deleted += 1
+        finally:
+            writer.close()
+        return deleted
+
+    async def delete_tree(self, reference, on_progress: ProgressCallback = None) -> int:
+        return await self._run(lambda: self.delete_tree_sync(reference, on_progress))
+
+    async def delete_query(self, query, on_progress: ProgressCallback = None) -> int:
+        return await self._run(lambda: self.delete_query_sync(query, on_progress))
+
+    async def _run(self, operation: Callable[[], int]) -> int:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.parallelism)
+        async with self._semaphore:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, operation)
@@ -1,31 +1,42 @@
 import os
 import asyncio
-import google.genai as genai
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from dotenv import load_dotenv
 from fastapi import HTTPException
 from ..models.chat import ChatMessage, ChatRequest, ChatResponse, ChatHistory
+from .answer_cache import AnswerCache
+from .gemini_limiter import gemini_limiter
+from ..container import container
+from .. import metrics
 
 load_dotenv()
 
 
 class ChatService:
-    def __init__(self):
-        # Configure Gemini API
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise HTTPException(
-                status_code=500, 
-                detail="GEMINI_API_KEY not found in environment variables"
-            )
-        
-        self.client = genai.Client(api_key=api_key)
+    def __init__(self, client=None):
+        # Gemini client shared across services
+        self.client = client or container.genai_client()
         self.model_name = 'gemini-2.5-flash'
+        self.answer_cache = AnswerCache()
 
     async def send_message(self, request: ChatRequest, video_context: Optional[Dict[str, Any]] = None, persistent_history: List[Dict] = None) -> ChatResponse:
         """Send a message with persistent chat history from Firestore"""
         try:
+            # First-turn questions carry no user-specific context, so their answers
+            # can be shared across everyone asking about the same video
+            cache_video_id = None
+            if video_context and not persistent_history:
+                cache_video_id = video_context.get("video_id")
+            
+            if cache_video_id:
+                cached_answer = self.answer_cache.get(cache_video_id, request.message)
+                if cached_answer:
+                    return ChatResponse(
+                        response=cached_answer,
+                        timestamp=datetime.now()
+                    )
+            
             # Convert persistent history to ChatMessage objects
             chat_history = []
             if persistent_history:
@@ -41,14 +52,14 @@ class ChatService:
             full_prompt = f"{context_prompt}\n\nUser: {request.message}"
             
             # Generate response using Gemini with new SDK
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                lambda: self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=full_prompt
-                )
-            )
+            async with gemini_limiter.slot():
+                with metrics.stage("gemini_chat"):
+                    response = await asyncio.to_thread(
+                        lambda: self.client.models.generate_content(
+                            model=self.model_name,
+                            contents=full_prompt
+                        )
+                    )
             
             if not response or not response.text:
                 raise HTTPException(
@@ -58,9 +69,13 @@ class ChatService:
             
             ai_response = response.text.strip()
             
+            if cache_video_id:
+                self.answer_cache.put(cache_video_id, request.message, ai_response)
+            
             return ChatResponse(
                 response=ai_response,
-                timestamp=datetime.now()
+                timestamp=datetime.now(),
+                tokens_used=self._get_token_usage(response)
             )
             
         except HTTPException:
@@ -72,6 +87,14 @@ class ChatService:
                 timestamp=datetime.now()
             )
 
+    @staticmethod
+    def _get_token_usage(response) -> int:
+        """Total tokens billed for a Gemini response, 0 if not reported"""
+        usage = getattr(response, "usage_metadata", None)
+        if not usage:
+            return 0
+        return getattr(usage, "total_token_count", None) or 0
+
     def _build_context_prompt(self, video_context: Optional[Dict[str, Any]], chat_history: List[ChatMessage]) -> str:
         """Build enhanced context prompt with full video information"""
         context = "You are Mercurious.ai, an AI assistant specializing in video content analysis and learning. "
@@ -0,0 +1,209 @@
+import os
+import math
+import time
+import asyncio
+import contextvars
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Optional
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Priority of Gemini calls made from the current task; background work sets it
+# around its calls and tasks it spawns inherit it
+_priority = contextvars.ContextVar("gemini_priority", default=INTERACTIVE)
+# Admission ticket of the current request (app.admission), told about its Gemini calls
+_ticket = contextvars.ContextVar("gemini_ticket", default=None)
+# Shared work that interactive requests may wait on, which can raise its priority
+_escalation = contextvars.ContextVar("gemini_escalation", default=None)
+
+
+class Escalation:
+    """Priority override for a task that others may wait on
+
+    Tasks started inside GeminiLimiter.escalatable() share one; once an
+    interactive request waits on the task, escalate() makes every call it
+    still makes, including one already queued, interactive.
+    """
+
+    __slots__ = ("interactive",)
+
+    def __init__(self):
+        self.interactive = False
+
+    def escalate(self) -> None:
+        self.interactive = True
+
+
+class GeminiLimiter:
+    """Shared Gemini request budget that gives interactive traffic priority
+
+    Requests are admitted against a sliding one-minute window of
+    GEMINI_REQUESTS_PER_MINUTE (0 disables the limit). Background work may only
+    use GEMINI_BACKGROUND_SHARE of the window and waits while any interactive
+    request is waiting. The window is per process, so with WEB_CONCURRENCY
+    workers each one gets an equal part of the budget.
+    """
+
+    def __init__(self):
+        workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+        requests_per_minute = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60"))
+        self.requests_per_minute = max(1, requests_per_minute // workers) if requests_per_minute > 0 else 0
+        self.background_share = float(os.getenv("GEMINI_BACKGROUND_SHARE", "0.5"))
+        self._window: deque = deque()
+        self._interactive_waiting = 0
+        # When each waiting interactive call was queued, oldest first
+        self._waiting_since: list = []
+        self.in_flight = 0
+        # Calls run in the loop's default executor, so at most this many at once
+        self.concurrency = max(1, int(os.getenv("GEMINI_CONCURRENCY", str(min(32, (os.cpu_count() or 1) + 4)))))
+        # Smoothed seconds per Gemini call, read by admission control
+        self.call_seconds = float(os.getenv("GEMINI_EXPECTED_CALL_SECONDS", "2"))
+        self.admitted = {INTERACTIVE: 0, BACKGROUND: 0}
+        self.throttled = {INTERACTIVE: 0, BACKGROUND: 0}
+
+    @staticmethod
+    @contextmanager
+    def background():
+        """Mark Gemini calls made inside the block as low priority"""
+        token = _priority.set(BACKGROUND)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+
+    @staticmethod
+    @contextmanager
+    def escalatable():
+        """Let tasks started inside the block be escalated through the yielded Escalation"""
+        escalation = Escalation()
+        token = _escalation.set(escalation)
+        try:
+            yield escalation
+        finally:
+            _escalation.reset(token)
+
+    @staticmethod
+    def priority() -> str:
+        """Priority of Gemini calls made from the current task"""
+        escalation = _escalation.get()
+        if escalation is not None and escalation.interactive:
+            return INTERACTIVE
+        return _priority.get()
+
+    @staticmethod
+    @contextmanager
+    def tracking(ticket):
+        """Report Gemini calls made inside the block to an admission ticket"""
+        token = _ticket.set(ticket)
+        try:
+            yield
+        finally:
+            _ticket.reset(token)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for quota for one Gemini request at the current priority"""
+        ticket = _ticket.get()
+        queued = time.monotonic()
+        await self.acquire(_priority.get(), _escalation.get())
+        started = time.monotonic()
+        if ticket is not None:
+            ticket.gemini_calls += 1
+            ticket.waited += started - queued
+        # Only calls that got a thread straight away measure Gemini itself
+        uncontended = self.in_flight < self.concurrency
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            if uncontended:
+                self.call_seconds += 0.1 * (time.monotonic() - started - self.call_seconds)
+
+    async def acquire(self, priority: str = INTERACTIVE, escalation: Optional[Escalation] = None) -> None:
+        if escalation is not None and escalation.interactive:
+            priority = INTERACTIVE
+        if self.requests_per_minute <= 0:
+            self.admitted[priority] += 1
+            return
+
+        interactive = False
+        try:
+            throttled = False
+            while True:
+                if not interactive and (priority == INTERACTIVE or (escalation and escalation.interactive)):
+                    # Escalated background calls compete as interactive from here on
+                    priority, interactive = INTERACTIVE, True
+                    self._interactive_waiting += 1
+                    queued_at = time.monotonic()
+                    self._waiting_since.append(queued_at)
+                limit = self.requests_per_minute if interactive else max(1, int(self.requests_per_minute * self.background_share))
+                now = time.monotonic()
+                while self._window and now - self._window[0] >= 60:
+                    self._window.popleft()
+
+                # Interactive requests count themselves as waiting, so only background work yields
+                if len(self._window) < limit and (interactive or self._interactive_waiting == 0):
+                    self._window.append(now)
+                    self.admitted[priority] += 1
+                    return
+
+                if not throttled:
+                    self.throttled[priority] += 1
+                    throttled = True
+                if len(self._window) >= limit:
+                    wait = self._window[len(self._window) - limit] + 60 - now
+                else:
+                    wait = 0.1
+                await asyncio.sleep(min(max(wait, 0.05), 1.0))
+        finally:
+            if interactive:
+                self._interactive_waiting -= 1
+                self._waiting_since.remove(queued_at)
+
+    def waiting(self) -> int:
+        """Interactive calls queued for quota"""
+        return self._interactive_waiting
+
+    def longest_wait(self) -> float:
+        """Seconds the oldest waiting interactive call has been queued for quota"""
+        return time.monotonic() - self._waiting_since[0] if self._waiting_since else 0.0
+
+    def wait_seconds(self, calls: float) -> float:
+        """Expected wait before the last of this many more interactive calls can start
+
+        Calls wait for a free thread at the observed seconds per call and, with
+        a quota, for enough of the one-minute window to expire.
+        """
+        position = max(int(math.ceil(calls)), 0)
+        wait = max(position + self.in_flight - self.concurrency, 0) * self.call_seconds / self.concurrency
+        if self.requests_per_minute > 0 and position > 0:
+            now = time.monotonic()
+            window = [started for started in self._window if now - started < 60]
+            # The call at this position needs this many slots of the window to free up
+            expiring = position + len(window) - self.requests_per_minute
+            if expiring > 0:
+                windows, index = divmod(expiring - 1, self.requests_per_minute)
+                # Calls past the current window go out in later windows at the same pace
+                started = window[index] if index < len(window) else now
+                wait = max(wait, 60 * windows + started + 60 - now)
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "background_share": self.background_share,
+            "requests_last_minute": sum(1 for started in self._window if now - started < 60),
+            "interactive_waiting": self._interactive_waiting,
+            "in_flight": self.in_flight,
+            "call_seconds": round(self.call_seconds, 3),
+            "admitted": dict(self.admitted),
+            "throttled": dict(self.throttled),
+        }
+
+
+# Global limiter shared by every service that calls Gemini
+gemini_limiter = GeminiLimiter()
@@ -0,0 +1,104 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+from ..utils.lru_cache import LRUCache
+from ..container import container
+
+# A job receives a progress callback and returns the number of items it processed
+JobFunction = Callable[[Callable[[int], None]], Awaitable[int]]
+
+
+class JobManager:
+    """In-process background jobs with progress reporting
+
+    Used for work too large to finish inside a request (bulk deletes). Jobs run
+    on the worker that accepted the request; their state is also published to
+    the host's shared cache so any worker can answer a status poll.
+    """
+
+    # Progress is republished at most this often while a job runs
+    PUBLISH_INTERVAL_SECONDS = 1.0
+
+    def __init__(self):
+        self.max_concurrent_jobs = int(os.getenv("BACKGROUND_JOB_CONCURRENCY", "2"))
+        self._jobs = LRUCache(int(os.getenv("BACKGROUND_JOB_HISTORY", "1000")))
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._published_at: Dict[str, float] = {}
+        self.shared_ttl = float(os.getenv("BACKGROUND_JOB_SHARED_TTL_SECONDS", "86400"))
+
+    def _publish(self, job: Dict[str, Any], force: bool = True) -> None:
+        now = time.monotonic()
+        if not force and now - self._published_at.get(job['job_id'], 0) < self.PUBLISH_INTERVAL_SECONDS:
+            return
+        self._published_at[job['job_id']] = now
+        container.shared_cache().set(
+            "jobs", job['job_id'],
+            json.dumps(job, default=lambda value: value.isoformat()),
+            self.shared_ttl
+        )
+
+    def submit(self, user_id: str, kind: str, func: JobFunction, total: Optional[int] = None) -> str:
+        """Queue a job and return its id"""
+        job_id = uuid.uuid4().hex
+        self._jobs.set(job_id, {
+            'job_id': job_id,
+            'user_id': user_id,
+            'kind': kind,
+            'status': 'queued',
+            'processed': 0,
+            'total': total,
+            'created_at': datetime.now(),
+            'started_at': None,
+            'finished_at': None,
+            'error': None
+        })
+        self._publish(self._jobs.get(job_id))
+        task = asyncio.create_task(self._run(job_id, func))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda finished: self._tasks.pop(job_id, None))
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job:
+            return dict(job)
+        # Started by another worker
+        shared = container.shared_cache().get("jobs", job_id)
+        return json.loads(shared) if shared is not None else None
+
+    async def _run(self, job_id: str, func: JobFunction) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_jobs)
+
+        job = self._jobs.get(job_id)
+
+        def progress(count: int) -> None:
+            job['processed'] += count
+            self._publish(job, force=False)
+
+        async with self._semaphore:
+            job['status'] = 'running'
+            job['started_at'] = datetime.now()
+            self._publish(job)
+            try:
+                processed = await func(progress)
+                # The writer's callbacks may lag the final count slightly
+                job['processed'] = max(job['processed'], processed or 0)
+                job['status'] = 'completed'
+            except Exception as e:
+                job['status'] = 'failed'
+                job['error'] = str(e)
+                print(f"Background job {job_id} ({job['kind']}) failed: {e}")
+            finally:
+                job['finished_at'] = datetime.now()
+                self._publish(job)
+                self._published_at.pop(job_id, None)
+
+
+# Global job manager instance
+job_manager = JobManager()
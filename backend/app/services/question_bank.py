@@ -0,0 +1,180 @@
+import os
+import hmac
+import random
+import hashlib
+from datetime import datetime
+from typing import List, Dict, Optional
+from fastapi import HTTPException
+from ..models.quiz import QuizQuestion, QuizResponse, QuestionBank
+from ..utils.lru_cache import LRUCache
+from ..utils.serialization import to_primitives, from_storage
+from ..utils.text_similarity import deduplicate
+from ..constants import MAX_QUIZ_QUESTIONS
+
+
+def quiz_id_secret() -> bytes:
+    """Key that signs quiz ids; every worker and instance must use the same one"""
+    secret = os.getenv("QUIZ_ID_SECRET")
+    if not secret:
+        raise RuntimeError("QUIZ_ID_SECRET is not set; it signs quiz ids and must be the same on every worker")
+    return secret.encode("utf-8")
+
+
+class QuestionBankStore:
+    """Per-video question pools that quizzes are sampled from
+
+    Layout:
+        videos/{video_id}/quiz_banks/current    latest bank
+        videos/{video_id}/quiz_banks/{version}  every bank by version, so quizzes
+                                                served from an older bank can still be graded
+
+    Sampled quizzes get a quiz_id of the form "b{version}-{i}.{j}.{k}-{signature}" that
+    lists the bank indices they were built from, so grading needs no per-user write.
+    The signature is an HMAC keyed by QUIZ_ID_SECRET, so only quizzes that were
+    actually served can be graded.
+    """
+
+    QUIZ_ID_PREFIX = "b"
+
+    def __init__(self, db):
+        self.db = db
+        self._quiz_id_key = quiz_id_secret()
+        self.pool_size = int(os.getenv("QUIZ_BANK_SIZE", "30"))
+        self.duplicate_threshold = float(os.getenv("QUIZ_DUPLICATE_THRESHOLD", "0.5"))
+        self._banks = LRUCache(int(os.getenv("QUIZ_BANK_CACHE_SIZE", "256")))
+
+    def _bank_ref(self, video_id: str, doc_id: str):
+        return self.db.collection('videos').document(video_id).collection('quiz_banks').document(doc_id)
+
+    async def get_current(self, video_id: str) -> Optional[QuestionBank]:
+        """Get the latest bank for a video"""
+        return await self._get(video_id, 'current')
+
+    async def get_version(self, video_id: str, version: str) -> Optional[QuestionBank]:
+        """Get a specific bank version for a video"""
+        return await self._get(video_id, version)
+
+    async def _get(self, video_id: str, doc_id: str) -> Optional[QuestionBank]:
+        cached = self._banks.get((video_id, doc_id))
+        if cached is not None:
+            return cached
+
+        try:
+            doc = self._bank_ref(video_id, doc_id).get()
+            if not doc.exists:
+                return None
+            bank = from_storage(QuestionBank, doc.to_dict())
+            self._banks.set((video_id, doc_id), bank)
+            return bank
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching question bank: {str(e)}")
+
+    async def save(self, bank: QuestionBank) -> bool:
+        """Persist a bank as the current one and under its version"""
+        try:
+            bank_data = to_primitives(bank)
+            batch = self.db.batch()
+            batch.set(self._bank_ref(bank.video_id, 'current'), bank_data)
+            batch.set(self._bank_ref(bank.video_id, bank.version), bank_data)
+            batch.commit()
+
+            self._banks.set((bank.video_id, 'current'), bank)
+            self._banks.set((bank.video_id, bank.version), bank)
+            return True
+        except Exception:
+            return False
+
+    def build_bank(self, video_id: str, questions: List[QuizQuestion],
+                   existing: Optional[QuestionBank] = None, prewarmed: bool = False) -> QuestionBank:
+        """Merge newly generated questions into a bank, dropping near-duplicates
+
+        Topping up an existing bank appends to it and keeps its version, so indices
+        in quiz ids already handed out stay valid.
+        """
+        base = list(existing.questions) if existing else []
+        candidates = base + list(questions)
+        keep = deduplicate([question.question for question in candidates], self.duplicate_threshold)
+        # Existing questions always come first and are never dropped by deduplication
+        kept_new = [candidates[index] for index in keep if index >= len(base)]
+
+        if existing:
+            return QuestionBank(
+                video_id=video_id,
+                version=existing.version,
+                questions=base + kept_new,
+                generated_at=existing.generated_at,
+                prewarmed=existing.prewarmed
+            )
+
+        now = datetime.now()
+        return QuestionBank(
+            video_id=video_id,
+            version=now.strftime('%Y%m%d%H%M%S%f'),
+            questions=kept_new,
+            generated_at=now,
+            prewarmed=prewarmed
+        )
+
+    def sample_quiz(self, bank: QuestionBank, num_questions: int, seed: str) -> QuizResponse:
+        """Sample a quiz from the bank, balancing coverage across topics
+
+        The same seed always yields the same quiz, so seeding by user and attempt number
+        keeps a reload stable while each retake gets a different draw.
+        """
+        rng = random.Random(seed)
+
+        groups: Dict[str, List[int]] = {}
+        for index, question in enumerate(bank.questions):
+            groups.setdefault((question.topic or "").strip().lower(), []).append(index)
+
+        topics = sorted(groups)
+        rng.shuffle(topics)
+        for topic in topics:
+            rng.shuffle(groups[topic])
+
+        # Round-robin across topics so no single concept dominates the quiz
+        picked: List[int] = []
+        target = min(num_questions, len(bank.questions))
+        while len(picked) < target:
+            for topic in topics:
+                if groups[topic] and len(picked) < target:
+                    picked.append(groups[topic].pop())
+        rng.shuffle(picked)
+
+        return self._materialize(bank, picked)
+
+    @classmethod
+    def is_bank_quiz_id(cls, quiz_id: Optional[str]) -> bool:
+        return bool(quiz_id) and quiz_id.startswith(cls.QUIZ_ID_PREFIX)
+
+    async def resolve_quiz(self, video_id: str, quiz_id: str) -> Optional[QuizResponse]:
+        """Rebuild a sampled quiz from its quiz_id, or None if it was not issued by this service"""
+        try:
+            version, indices_part, signature = quiz_id[len(self.QUIZ_ID_PREFIX):].split('-')
+            indices = [int(index) for index in indices_part.split('.')]
+        except ValueError:
+            return None
+
+        if not hmac.compare_digest(signature, self._sign(video_id, version, indices_part)):
+            return None
+        if len(indices) > MAX_QUIZ_QUESTIONS or len(set(indices)) != len(indices):
+            return None
+
+        bank = await self.get_version(video_id, version)
+        if not bank or any(index < 0 or index >= len(bank.questions) for index in indices):
+            return None
+        return self._materialize(bank, indices)
+
+    def _sign(self, video_id: str, version: str, indices_part: str) -> str:
+        message = f"{video_id}/{version}/{indices_part}".encode("utf-8")
+        return hmac.new(self._quiz_id_key, message, hashlib.sha256).hexdigest()[:20]
+
+    def _materialize(self, bank: QuestionBank, indices: List[int]) -> QuizResponse:
+        indices_part = '.'.join(str(index) for index in indices)
+        signature = self._sign(bank.video_id, bank.version, indices_part)
+        return QuizResponse(
+            questions=[bank.questions[index] for index in indices],
+            video_id=bank.video_id,
+            generated_at=bank.generated_at,
+            quiz_id=f"{self.QUIZ_ID_PREFIX}{bank.version}-{indices_part}-{signature}"
+        )
@@ -0,0 +1,80 @@
+import os
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from .gemini_limiter import gemini_limiter
+from ..container import container
+
+
+class QuizPrewarmer:
+    """Low-priority question bank generation ahead of the first quiz request
+
+    Newly processed videos, and videos added by QUIZ_PREWARM_TRENDING_COUNT or more
+    users, are queued after ingestion. A single worker drains the queue with
+    background Gemini priority, so interactive requests keep the quota first.
+    A quiz request that ends up waiting on a pre-generation escalates it to
+    interactive priority. Disabled unless QUIZ_PREWARM_ENABLED=true.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("QUIZ_PREWARM_ENABLED", "false").lower() == "true"
+        self.max_queue = int(os.getenv("QUIZ_PREWARM_QUEUE_SIZE", "100"))
+        self.trending_threshold = int(os.getenv("QUIZ_PREWARM_TRENDING_COUNT", "3"))
+        # video_id -> reason, in queue order
+        self._queue: "OrderedDict[str, str]" = OrderedDict()
+        self._worker: Optional[asyncio.Task] = None
+
+        self.queued = 0
+        self.dropped = 0
+        self.generated = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def enqueue(self, video_id: str, reason: str = "new") -> bool:
+        """Queue a video for pre-generation; returns False if not queued"""
+        if not self.enabled or video_id in self._queue:
+            return False
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return False
+
+        self._queue[video_id] = reason
+        self.queued += 1
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+        return True
+
+    def enqueue_if_trending(self, video_id: str, processed_count: int) -> bool:
+        """Queue an already processed video once enough users have added it"""
+        if processed_count < self.trending_threshold:
+            return False
+        return self.enqueue(video_id, "trending")
+
+    async def _drain(self) -> None:
+        while self._queue:
+            video_id, reason = self._queue.popitem(last=False)
+            try:
+                with gemini_limiter.background():
+                    generated = await container.quiz_service().prewarm_question_bank(video_id)
+                if generated:
+                    self.generated += 1
+                else:
+                    self.skipped += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Quiz pre-generation failed for video {video_id} ({reason}): {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "queue_length": len(self._queue),
+            "queued": self.queued,
+            "dropped": self.dropped,
+            "generated": self.generated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+        }
+
+
+# Global prewarmer; banks are generated by the container's QuizService
+quiz_prewarmer = QuizPrewarmer()
@@ -1,34 +1,102 @@
 import os
 import asyncio
-import json
-import google.genai as genai
-from typing import List, Dict, Any, Optional
+import contextvars
+import threading
+import uuid
+from typing import List, Dict, Any, Optional, Union, AsyncIterator
 from datetime import datetime
 from dotenv import load_dotenv
 from fastapi import HTTPException
 from ..models.quiz import (
     QuizQuestion, QuizGenerateRequest, QuizResponse, 
-    QuizSubmission, QuizResult, QuizResultResponse
+    QuizSubmission, QuizResult, QuizResultResponse, QuestionBank,
+    ReviewSession, ReviewSubmission, ReviewResultResponse
 )
 from ..models.video import VideoContent
+from ..utils.json_stream import JSONArrayItemParser
+from ..utils.text_similarity import deduplicate
+from ..utils.serialization import to_primitives, from_storage
 from .video_database_service import VideoDatabase
+from .quiz_store import QuizStore
+from .question_bank import QuestionBankStore
+from .quiz_statistics import QuizStatisticsStore
+from .review_scheduler import ReviewScheduler
+from .bulk_delete import BulkDeleter
+from .job_manager import job_manager
+from .gemini_limiter import gemini_limiter, Escalation, INTERACTIVE
+from .quiz_prewarm import quiz_prewarmer
+from ..container import container
+from .. import metrics
+from ..admission import admission_controller
+from ..tracing import traced
 
 load_dotenv()
 
 
-class QuizService:
+class QuestionStream:
+    """Hands the first questions of a bank refresh to the request streaming them
+
+    Questions are put on the queue as they are parsed, followed by None. The
+    request sets closed when it stops reading, which ends the streamed generation.
+    """
+
     def __init__(self):
-        # Configure Gemini API (same pattern as ChatService)
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise HTTPException(
-                status_code=500, 
-                detail="GEMINI_API_KEY not found in environment variables"
-            )
-        
-        self.client = genai.Client(api_key=api_key)
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.closed = threading.Event()
+
+
+class QuizService:
+    # Prefix for quizzes generated over a stream and stored in the quiz store
+    STREAMED_QUIZ_ID_PREFIX = "s"
+
+    def __init__(self, client=None, video_db: Optional[VideoDatabase] = None,
+                 bulk_deleter: Optional[BulkDeleter] = None):
+        # Gemini client shared across services (same pattern as ChatService)
+        self.client = client or container.genai_client()
         self.model_name = 'gemini-2.5-flash'
-        self.video_db = VideoDatabase()
+        from google.genai import types  # deferred: slow to import
+        # Constrain quiz output to a JSON array of QuizQuestion objects
+        self.quiz_generation_config = types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=list[QuizQuestion]
+        )
+        # Generations per quiz: the first plus top-ups for questions that failed to parse
+        self.max_generation_rounds = int(os.getenv("QUIZ_GENERATION_ROUNDS", "3"))
+        self.generation_stats = {
+            'responses': 0,
+            'unparseable_responses': 0,
+            'items_parsed': 0,
+            'items_rejected': 0,
+            'topup_generations': 0,
+            'sectioned_generations': 0,
+            'failed_sections': 0,
+            'section_duplicates': 0
+        }
+        # Quizzes larger than one section are generated as concurrent per-section requests
+        self.section_size = int(os.getenv("QUIZ_SECTION_SIZE", "5"))
+        self.section_concurrency = int(os.getenv("QUIZ_SECTION_CONCURRENCY", "6"))
+        self._section_semaphore: Optional[asyncio.Semaphore] = None
+        self.video_db = video_db or container.video_db()
+        self.quiz_store = QuizStore(self.video_db.db)
+        self.question_bank = QuestionBankStore(self.video_db.db)
+        self.statistics_store = QuizStatisticsStore(self.video_db.db)
+        self.review_scheduler = ReviewScheduler(self.video_db.db)
+        self.bulk_deleter = bulk_deleter or BulkDeleter(self.video_db.db)
+        # Resets with more attempts than this are deleted by a background job
+        self.inline_delete_limit = int(os.getenv("BULK_DELETE_INLINE_LIMIT", "200"))
+        
+        # Question banks older than this are served stale and refreshed in the background
+        self.quiz_ttl_hours = float(os.getenv("QUIZ_TTL_HOURS", "24"))
+        self._bank_refreshes: Dict[str, asyncio.Task] = {}
+        # Raises a refresh to interactive priority once a user request waits on it
+        self._refresh_escalations: Dict[str, Escalation] = {}
+        self.stale_hits = 0
+        self.bank_refreshes_started = 0
+        self.refresh_failures = 0
+        # Quiz requests served from an existing bank, and how many of those were pre-generated
+        self.bank_hits = 0
+        self.prewarmed_hits = 0
+        self.cold_generations = 0
 
     async def generate_quiz(self, request: QuizGenerateRequest, user_id: str) -> QuizResponse:
         """Generate AI-powered quiz based on video content"""
@@ -38,39 +106,114 @@ class QuizService:
             if not has_access:
                 raise HTTPException(status_code=403, detail="User does not have access to this video")
             
-            # Check if quiz already exists and is cached
-            cached_quiz = await self._get_cached_quiz(request.video_id)
-            if cached_quiz and self._is_quiz_fresh(cached_quiz):
-                return cached_quiz
+            # Serve from the video's question bank. A stale bank is still served
+            # immediately while a single background task regenerates it.
+            bank = await self.question_bank.get_current(request.video_id)
+            if bank and len(bank.questions) >= request.num_questions:
+                if not self._is_quiz_fresh(bank):
+                    self.stale_hits += 1
+                    with gemini_limiter.background():
+                        self._refresh_bank_in_background(request.video_id, request.num_questions)
+                self._record_bank_hit(bank)
+                return await self._sample_user_quiz(bank, user_id, request.num_questions)
+            
+            # Missing or too small: wait for generation, shared with concurrent requests
+            self.cold_generations += 1
+            fresh_bank = bank if bank and self._is_quiz_fresh(bank) else None
+            bank = await self._wait_for_bank(request.video_id, request.num_questions, fresh_bank)
+            return await self._sample_user_quiz(bank, user_id, request.num_questions)
             
-            # Get video content for quiz generation
-            global_video = await self.video_db.get_global_video(request.video_id)
-            if not global_video:
-                raise HTTPException(status_code=404, detail="Video content not found")
-            
-            # Generate quiz using AI
-            quiz_questions = await self._generate_quiz_with_ai(
-                global_video.content, 
-                global_video.info.title,
-                request.num_questions
-            )
-            
-            # Create quiz response
-            quiz_response = QuizResponse(
-                questions=quiz_questions,
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error generating quiz: {str(e)}")
+
+    async def open_quiz_stream(self, request: QuizGenerateRequest, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Check access, then return an iterator of quiz events for server-sent events
+        
+        Events are {"event": "question", "data": {"index", "question"}} as each question
+        becomes available, then {"event": "complete", "data": QuizResponse} once the
+        quiz is persisted. The quiz_id in "complete" is used to submit answers.
+        """
+        has_access = await self.video_db.check_video_in_user_library(user_id, request.video_id)
+        if not has_access:
+            raise HTTPException(status_code=403, detail="User does not have access to this video")
+        return self._quiz_stream_events(request, user_id)
+
+    async def _quiz_stream_events(self, request: QuizGenerateRequest, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        try:
+            bank = await self.question_bank.get_current(request.video_id)
+            if bank and len(bank.questions) >= request.num_questions:
+                if not self._is_quiz_fresh(bank):
+                    self.stale_hits += 1
+                    with gemini_limiter.background():
+                        self._refresh_bank_in_background(request.video_id, request.num_questions)
+                self._record_bank_hit(bank)
+                quiz = await self._sample_user_quiz(bank, user_id, request.num_questions)
+                for index, question in enumerate(quiz.questions):
+                    yield self._question_event(index, question)
+                yield {"event": "complete", "data": to_primitives(quiz)}
+                return
+            
+            # Missing or too small: join a running generation, or start one whose
+            # first questions are streamed to this request as they are parsed
+            self.cold_generations += 1
+            if request.video_id in self._bank_refreshes:
+                bank = await self._wait_for_bank(request.video_id, request.num_questions)
+                quiz = await self._sample_user_quiz(bank, user_id, request.num_questions)
+                for index, question in enumerate(quiz.questions):
+                    yield self._question_event(index, question)
+                yield {"event": "complete", "data": to_primitives(quiz)}
+                return
+            
+            fresh_bank = bank if bank and self._is_quiz_fresh(bank) else None
+            streamed = QuestionStream()
+            task = self._refresh_bank_in_background(request.video_id, request.num_questions, fresh_bank,
+                                                    stream=streamed)
+            questions: List[QuizQuestion] = []
+            try:
+                while len(questions) < request.num_questions:
+                    question = await streamed.queue.get()
+                    if question is None:
+                        break
+                    yield self._question_event(len(questions), question)
+                    questions.append(question)
+            finally:
+                # Nothing reads the stream once this request has its questions or its
+                # client has disconnected, so the streamed generation can stop
+                streamed.closed.set()
+            
+            # Questions that failed to parse are made up from the rest of the new bank
+            if len(questions) < request.num_questions:
+                bank = await asyncio.shield(task)
+                seen = {question.question for question in questions}
+                for question in bank.questions:
+                    if len(questions) >= request.num_questions:
+                        break
+                    if question.question not in seen:
+                        yield self._question_event(len(questions), question)
+                        questions.append(question)
+            
+            quiz = QuizResponse(
+                questions=questions,
                 video_id=request.video_id,
-                generated_at=datetime.now()
+                generated_at=datetime.now(),
+                quiz_id=f"{self.STREAMED_QUIZ_ID_PREFIX}{uuid.uuid4().hex[:16]}"
             )
+            if not await self._cache_quiz(quiz):
+                raise HTTPException(status_code=500, detail="Failed to save generated quiz")
             
-            # Cache the generated quiz
-            await self._cache_quiz(quiz_response)
+            yield {"event": "complete", "data": to_primitives(quiz)}
             
-            return quiz_response
-            
-        except HTTPException:
-            raise
+        except HTTPException as e:
+            yield {"event": "error", "data": {"status_code": e.status_code, "detail": e.detail}}
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error generating quiz: {str(e)}")
+            print(f"Quiz stream error: {str(e)}")
+            yield {"event": "error", "data": {"status_code": 500, "detail": f"Error generating quiz: {str(e)}"}}
+
+    @staticmethod
+    def _question_event(index: int, question: QuizQuestion) -> Dict[str, Any]:
+        return {"event": "question", "data": {"index": index, "question": to_primitives(question)}}
 
     async def submit_quiz(self, submission: QuizSubmission, user_id: str) -> QuizResultResponse:
         """Process quiz submission and return results with detailed feedback"""
@@ -80,13 +223,15 @@ class QuizService:
             if not has_access:
                 raise HTTPException(status_code=403, detail="User does not have access to this video")
             
-            # Get the original quiz questions for validation
-            cached_quiz = await self._get_cached_quiz(submission.video_id)
-            if not cached_quiz:
+            # One read gives both the answers to grade against and the questions for review
+            quiz_id = submission.quiz_id or self.quiz_store.quiz_id_for(len(submission.answers))
+            quiz = await self._get_graded_quiz(submission.video_id, quiz_id)
+            if not quiz:
                 raise HTTPException(status_code=400, detail="Quiz not found. Please generate a quiz first.")
+            expected_answers = [question.correct_answer for question in quiz.questions]
             
             # Validate submission
-            if len(submission.answers) != len(cached_quiz.questions):
+            if len(submission.answers) != len(expected_answers):
                 raise HTTPException(status_code=400, detail="Number of answers doesn't match number of questions")
             
             # Calculate score and identify correct answers
@@ -94,13 +239,13 @@ class QuizService:
             user_answers = []
             score = 0
             
-            for i, (answer, question) in enumerate(zip(submission.answers, cached_quiz.questions)):
+            for i, (answer, expected_answer) in enumerate(zip(submission.answers, expected_answers)):
                 if answer.question_index != i:
                     raise HTTPException(status_code=400, detail=f"Answer index mismatch at question {i}")
                 
                 user_answers.append(answer.selected_answer)
                 
-                if answer.selected_answer == question.correct_answer:
+                if answer.selected_answer == expected_answer:
                     correct_answers.append(i)
                     score += 1
             
@@ -112,7 +257,7 @@ class QuizService:
             quiz_result = QuizResult(
                 video_id=submission.video_id,
                 score=score,
-                total_questions=len(cached_quiz.questions),
+                total_questions=len(expected_answers),
                 correct_answers=correct_answers,
                 user_answers=user_answers,
                 submitted_at=datetime.now(),
@@ -123,9 +268,10 @@ class QuizService:
             await self._save_quiz_result(user_id, quiz_result, submission)
             
             # Return result with questions for review
+            self._schedule_reviews(user_id, quiz, correct_answers)
             return QuizResultResponse(
                 result=quiz_result,
-                questions=cached_quiz.questions
+                questions=quiz.questions
             )
             
         except HTTPException:
@@ -133,6 +279,30 @@ class QuizService:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error processing quiz submission: {str(e)}")
 
+    async def get_review_session(self, user_id: str, limit: Optional[int] = None) -> ReviewSession:
+        """Get missed questions due for review across all of the user's videos"""
+        try:
+            items, due_count = self.review_scheduler.get_due(user_id, limit)
+            return ReviewSession(items=items, due_count=due_count)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching review session: {str(e)}")
+
+    async def submit_review(self, user_id: str, submission: ReviewSubmission) -> ReviewResultResponse:
+        """Grade a review session and schedule each item's next review"""
+        try:
+            results = self.review_scheduler.grade_review(user_id, submission.answers)
+            if not results:
+                raise HTTPException(status_code=400, detail="No matching review items found")
+            return ReviewResultResponse(
+                results=results,
+                score=sum(1 for result in results if result.correct),
+                total_questions=len(results)
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error processing review submission: {str(e)}")
+
     async def get_quiz_history(self, user_id: str, video_id: str) -> List[QuizResult]:
         """Get user's quiz attempt history for a specific video"""
         try:
@@ -156,8 +326,12 @@ class QuizService:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error calculating quiz statistics: {str(e)}")
 
-    async def reset_quiz_attempts(self, user_id: str, video_id: str) -> bool:
-        """Reset all quiz attempts for a specific video"""
+    async def reset_quiz_attempts(self, user_id: str, video_id: str) -> Dict[str, Any]:
+        """Reset all quiz attempts for a specific video
+        
+        Returns {"success": bool, "job_id": Optional[str]}; job_id is set when the
+        attempts are being deleted in the background.
+        """
         try:
             # Verify user has access to this video
             has_access = await self.video_db.check_video_in_user_library(user_id, video_id)
@@ -171,42 +345,381 @@ class QuizService:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error resetting quiz attempts: {str(e)}")
 
+    async def get_existing_quiz(self, user_id: str, video_id: str, num_questions: int = 5,
+                                quiz_id: Optional[str] = None) -> Optional[QuizResponse]:
+        """Get an already generated quiz without calling Gemini"""
+        if quiz_id:
+            return await self._get_cached_quiz(video_id, quiz_id)
+        
+        bank = await self.question_bank.get_current(video_id)
+        if bank and bank.questions:
+            return await self._sample_user_quiz(bank, user_id, num_questions)
+        return await self._get_cached_quiz(video_id, self.quiz_store.quiz_id_for(num_questions))
+
+    async def get_quiz_availability(self, video_id: str) -> Dict[str, Any]:
+        """Check whether a question bank exists and is fresh for a video"""
+        bank = await self.question_bank.get_current(video_id)
+        return {
+            "video_id": video_id,
+            "quiz_available": bank is not None,
+            "quiz_fresh": self._is_quiz_fresh(bank) if bank else False,
+            "generated_at": bank.generated_at.isoformat() if bank else None,
+            "bank_size": len(bank.questions) if bank else 0
+        }
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Question bank freshness and generation metrics for monitoring"""
+        return {
+            "quiz_ttl_hours": self.quiz_ttl_hours,
+            "stale_hits": self.stale_hits,
+            "bank_refreshes_started": self.bank_refreshes_started,
+            "refresh_failures": self.refresh_failures,
+            "refreshes_in_flight": len(self._bank_refreshes),
+            "generation": self._generation_metrics(),
+            "prewarm": self._prewarm_metrics(),
+            "gemini_quota": gemini_limiter.stats(),
+            "admission": admission_controller.stats()
+        }
+
+    def _prewarm_metrics(self) -> Dict[str, Any]:
+        requests = self.bank_hits + self.cold_generations
+        return {
+            **quiz_prewarmer.stats(),
+            "bank_hits": self.bank_hits,
+            "prewarmed_hits": self.prewarmed_hits,
+            "cold_generations": self.cold_generations,
+            "prewarmed_hit_rate": round(self.prewarmed_hits / requests, 4) if requests else 0.0
+        }
+
+    def _record_bank_hit(self, bank: QuestionBank) -> None:
+        self.bank_hits += 1
+        if bank.prewarmed:
+            self.prewarmed_hits += 1
+
+    async def prewarm_question_bank(self, video_id: str) -> bool:
+        """Generate a bank for a video that has none yet; returns False if skipped"""
+        bank = await self.question_bank.get_current(video_id)
+        if bank and self._is_quiz_fresh(bank):
+            return False
+        await asyncio.shield(
+            self._refresh_bank_in_background(video_id, self.question_bank.pool_size, prewarmed=True)
+        )
+        return True
+
+    def _generation_metrics(self) -> Dict[str, Any]:
+        stats = self.generation_stats
+        items = stats['items_parsed'] + stats['items_rejected']
+        return {
+            **stats,
+            "response_failure_rate": round(stats['unparseable_responses'] / stats['responses'], 4) if stats['responses'] else 0.0,
+            "item_failure_rate": round(stats['items_rejected'] / items, 4) if items else 0.0
+        }
+
     # Private helper methods
 
-    async def _generate_quiz_with_ai(self, video_content: VideoContent, video_title: str, num_questions: int = 5) -> List[QuizQuestion]:
-        """Use Gemini AI to generate contextual quiz questions"""
-        try:
-            prompt = self._build_quiz_generation_prompt(video_content, video_title, num_questions)
-            
-            # Generate response using Gemini
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                lambda: self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=prompt
+    async def _wait_for_bank(self, video_id: str, num_questions: int,
+                             existing: Optional[QuestionBank] = None) -> QuestionBank:
+        """Start or join the video's bank generation and wait for a bank with enough questions"""
+        joined_refresh = video_id in self._bank_refreshes
+        bank = await asyncio.shield(self._refresh_bank_in_background(video_id, num_questions, existing))
+        if joined_refresh and len(bank.questions) < num_questions:
+            # Joined a refresh started for a smaller quiz - top it up
+            bank = await asyncio.shield(self._refresh_bank_in_background(video_id, num_questions, bank))
+        return bank
+
+    def _refresh_bank_in_background(self, video_id: str, min_questions: int,
+                                    existing: Optional[QuestionBank] = None,
+                                    prewarmed: bool = False,
+                                    stream: Optional[QuestionStream] = None) -> asyncio.Task:
+        """Start a bank refresh for a video unless one is already running, and return it
+        
+        A refresh started with a stream puts its first questions on it as they are
+        parsed, followed by None.
+        """
+        task = self._bank_refreshes.get(video_id)
+        if task is None or task.done():
+            with gemini_limiter.escalatable() as escalation:
+                task = asyncio.create_task(
+                    self._regenerate_question_bank(video_id, min_questions, existing, prewarmed, stream)
                 )
+            self._bank_refreshes[video_id] = task
+            self._refresh_escalations[video_id] = escalation
+            task.add_done_callback(lambda finished: self._on_bank_refresh_done(video_id, finished))
+            if stream is not None:
+                # Ends the stream even if the refresh fails before it gets to streaming
+                task.add_done_callback(lambda finished: stream.queue.put_nowait(None))
+            self.bank_refreshes_started += 1
+        elif gemini_limiter.priority() == INTERACTIVE:
+            # A user request now waits on a refresh that may have been started at
+            # background priority (stale bank, pre-generation), so it must not queue behind them
+            self._refresh_escalations[video_id].escalate()
+        return task
+
+    def _on_bank_refresh_done(self, video_id: str, task: asyncio.Task) -> None:
+        if self._bank_refreshes.get(video_id) is task:
+            del self._bank_refreshes[video_id]
+            del self._refresh_escalations[video_id]
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error:
+            self.refresh_failures += 1
+            print(f"Question bank refresh failed for video {video_id}: {error}")
+
+    async def _regenerate_question_bank(self, video_id: str, min_questions: int,
+                                        existing: Optional[QuestionBank] = None,
+                                        prewarmed: bool = False,
+                                        stream: Optional[QuestionStream] = None) -> QuestionBank:
+        global_video = await self.video_db.get_global_video(video_id)
+        if not global_video:
+            raise HTTPException(status_code=404, detail="Video content not found")
+        return await self._refresh_question_bank(global_video, min_questions, existing, prewarmed, stream)
+
+    async def _refresh_question_bank(self, global_video, min_questions: int,
+                                     existing: Optional[QuestionBank] = None,
+                                     prewarmed: bool = False,
+                                     stream: Optional[QuestionStream] = None) -> QuestionBank:
+        """Generate a new bank, or top up a fresh one that is too small
+        
+        With a stream, the first min_questions are generated as a streamed response
+        and handed over one by one before the rest are generated. If the stream is
+        closed early, whatever it did not produce is generated with the rest.
+        """
+        if existing:
+            needed = min_questions - len(existing.questions)
+        else:
+            needed = max(self.question_bank.pool_size, min_questions)
+        exclude = [question.question for question in existing.questions] if existing else []
+        
+        questions: List[QuizQuestion] = []
+        if stream is not None:
+            try:
+                async for question in self._stream_questions(global_video.content, global_video.info.title,
+                                                             min_questions, stream.closed):
+                    stream.queue.put_nowait(question)
+                    questions.append(question)
+            finally:
+                stream.queue.put_nowait(None)
+            needed -= len(questions)
+        
+        if needed > 0:
+            # Ask for a few extra to make up for near-duplicates removed afterwards
+            to_generate = min(needed + max(2, needed // 5), 50)
+            questions += await self._generate_quiz_with_ai(
+                global_video.content,
+                global_video.info.title,
+                to_generate,
+                (exclude + [question.question for question in questions]) or None
             )
+        bank = self.question_bank.build_bank(global_video.video_id, questions, existing, prewarmed)
+        if not bank.questions:
+            raise HTTPException(status_code=500, detail="Failed to generate valid quiz questions")
+        
+        await self.question_bank.save(bank)
+        return bank
+
+    async def _sample_user_quiz(self, bank: QuestionBank, user_id: str, num_questions: int) -> QuizResponse:
+        """Sample a quiz seeded by user and attempt number so retakes get a different draw"""
+        attempt = await self._get_attempt_count(user_id, bank.video_id)
+        seed = f"{user_id}:{bank.video_id}:{num_questions}:{attempt}"
+        return self.question_bank.sample_quiz(bank, num_questions, seed)
+
+    @traced("quiz.get_attempt_count")
+    async def _get_attempt_count(self, user_id: str, video_id: str) -> int:
+        """Number of submitted attempts for a video, from the per-video statistics"""
+        try:
+            doc = (self.video_db.db.collection('users')
+                   .document(user_id)
+                   .collection('quizzes')
+                   .document(video_id)
+                   .get())
+            if doc.exists:
+                return (doc.to_dict() or {}).get('statistics', {}).get('total_attempts', 0)
+            return 0
+        except Exception:
+            return 0
+
+    @traced("quiz.get_graded_quiz")
+    async def _get_graded_quiz(self, video_id: str, quiz_id: str) -> Optional[QuizResponse]:
+        """Quiz a submission is graded against, from the question bank or the quiz store"""
+        if self.question_bank.is_bank_quiz_id(quiz_id):
+            return await self.question_bank.resolve_quiz(video_id, quiz_id)
+        return await self.quiz_store.get_quiz(video_id, quiz_id)
+
+    async def _generate_quiz_with_ai(self, video_content: VideoContent, video_title: str, num_questions: int = 5,
+                                     exclude_questions: Optional[List[str]] = None) -> List[QuizQuestion]:
+        """Use Gemini AI to generate contextual quiz questions
+        
+        Large requests are split into concurrent generations, one per section of the
+        video's main points, so latency stays close to that of a short quiz.
+        """
+        sections = self._plan_quiz_sections(video_content, num_questions)
+        if len(sections) <= 1:
+            return await self._generate_questions(video_content, video_title, num_questions, exclude_questions)
+        
+        self.generation_stats['sectioned_generations'] += 1
+        results = await asyncio.gather(
+            *(self._generate_section(video_content, video_title, count, exclude_questions, focus)
+              for focus, count in sections),
+            return_exceptions=True
+        )
+        section_questions = [result for result in results if not isinstance(result, BaseException)]
+        for result in results:
+            if isinstance(result, BaseException):
+                self.generation_stats['failed_sections'] += 1
+                print(f"Warning: Quiz section generation failed: {str(result)}")
+        
+        quiz_questions = self._merge_sections(section_questions, num_questions)
+        
+        # Sections that failed or lost questions to deduplication are made up in one extra call
+        missing = num_questions - len(quiz_questions)
+        if missing > 0:
+            avoid = (exclude_questions or []) + [question.question for question in quiz_questions]
+            try:
+                extra = await self._generate_questions(video_content, video_title, missing, avoid)
+                quiz_questions = self._merge_sections([quiz_questions, extra], num_questions)
+            except HTTPException:
+                if not quiz_questions:
+                    raise
+        
+        return quiz_questions
+
+    async def _stream_questions(self, video_content: VideoContent, video_title: str, num_questions: int,
+                                stop: Optional[threading.Event] = None) -> AsyncIterator[QuizQuestion]:
+        """Yield questions as soon as each one is complete in the streamed generation
+        
+        Setting stop ends the generation at the next chunk, e.g. when the client is gone.
+        """
+        prompt = self._build_quiz_generation_prompt(video_content, video_title, num_questions)
+        loop = asyncio.get_event_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        done = object()
+        # Checked between chunks so the producer stops when the consumer goes away
+        cancelled = threading.Event()
+        
+        def produce():
+            try:
+                with metrics.stage("gemini_quiz_stream"):
+                    for chunk in self.client.models.generate_content_stream(
+                        model=self.model_name,
+                        contents=prompt,
+                        config=self.quiz_generation_config
+                    ):
+                        if cancelled.is_set() or (stop is not None and stop.is_set()):
+                            break
+                        if chunk.text:
+                            loop.call_soon_threadsafe(chunks.put_nowait, chunk.text)
+            except Exception as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(chunks.put_nowait, done)
+        
+        parser = JSONArrayItemParser()
+        accepted = rejected = 0
+        # The slot is held until the producer thread finishes, so the streamed
+        # call counts as in flight for as long as Gemini is working on it
+        async with gemini_limiter.slot():
+            # Copy the context so metrics attribute the call to this request
+            producer = loop.run_in_executor(None, contextvars.copy_context().run, produce)
+            try:
+                while True:
+                    chunk = await chunks.get()
+                    if chunk is done:
+                        break
+                    if isinstance(chunk, Exception):
+                        raise HTTPException(status_code=500, detail=f"Error in AI quiz generation: {str(chunk)}")
+                    for item in parser.feed(chunk):
+                        try:
+                            question = self._build_quiz_question(item)
+                        except Exception as e:
+                            rejected += 1
+                            print(f"Warning: Skipping invalid quiz question: {str(e)}")
+                            continue
+                        if accepted < num_questions:
+                            accepted += 1
+                            yield question
+            finally:
+                cancelled.set()
+                parser.close()
+                self._record_parse_result(parser, accepted, rejected)
+                # Re-raises anything the producer thread failed with outside produce()
+                await producer
+
+    def _plan_quiz_sections(self, video_content: VideoContent, num_questions: int) -> List[tuple]:
+        """Split a quiz into (focus points, question count) sections"""
+        topics = video_content.main_points or video_content.key_concepts
+        if num_questions <= self.section_size or len(topics) < 2:
+            return [(None, num_questions)]
+        
+        num_sections = min(len(topics), -(-num_questions // self.section_size))
+        focus_groups = [topics[i::num_sections] for i in range(num_sections)]
+        base, extra = divmod(num_questions, num_sections)
+        return [(focus_groups[i], base + (1 if i < extra else 0)) for i in range(num_sections)]
+
+    @traced("quiz.generate_section")
+    async def _generate_section(self, video_content: VideoContent, video_title: str, num_questions: int,
+                                exclude_questions: Optional[List[str]], focus_points: List[str]) -> List[QuizQuestion]:
+        if self._section_semaphore is None:
+            self._section_semaphore = asyncio.Semaphore(self.section_concurrency)
+        async with self._section_semaphore:
+            return await self._generate_questions(
+                video_content, video_title, num_questions, exclude_questions, focus_points
+            )
+
+    def _merge_sections(self, section_questions: List[List[QuizQuestion]], num_questions: int) -> List[QuizQuestion]:
+        """Interleave sections so every topic is represented, then drop near-duplicates"""
+        interleaved: List[QuizQuestion] = []
+        for round_index in range(max((len(questions) for questions in section_questions), default=0)):
+            for questions in section_questions:
+                if round_index < len(questions):
+                    interleaved.append(questions[round_index])
+        
+        keep = deduplicate([question.question for question in interleaved], self.question_bank.duplicate_threshold)
+        self.generation_stats['section_duplicates'] += len(interleaved) - len(keep)
+        return [interleaved[index] for index in keep][:num_questions]
+
+    async def _generate_questions(self, video_content: VideoContent, video_title: str, num_questions: int,
+                                  exclude_questions: Optional[List[str]] = None,
+                                  focus_points: Optional[List[str]] = None) -> List[QuizQuestion]:
+        """Run one generation, topping up questions that failed to parse
+        
+        Output is constrained to a JSON schema derived from QuizQuestion and parsed item
+        by item. Valid questions are kept and only the missing count is requested again.
+        """
+        try:
+            quiz_questions: List[QuizQuestion] = []
+            
+            for generation_round in range(self.max_generation_rounds):
+                missing = num_questions - len(quiz_questions)
+                if missing <= 0:
+                    break
+                if generation_round > 0:
+                    self.generation_stats['topup_generations'] += 1
+                
+                avoid = (exclude_questions or []) + [question.question for question in quiz_questions]
+                prompt = self._build_quiz_generation_prompt(video_content, video_title, missing, avoid, focus_points)
+                
+                # Generate response using Gemini
+                async with gemini_limiter.slot():
+                    with metrics.stage("gemini_quiz"):
+                        response = await asyncio.to_thread(
+                            lambda: self.client.models.generate_content(
+                                model=self.model_name,
+                                contents=prompt,
+                                config=self.quiz_generation_config
+                            )
+                        )
+                
+                if not response or not response.text:
+                    self.generation_stats['responses'] += 1
+                    self.generation_stats['unparseable_responses'] += 1
+                    continue
+                
+                # Keep every valid question, even if others in the response are malformed
+                quiz_questions.extend(self._parse_quiz_response(response.text)[:missing])
             
-            if not response or not response.text:
-                raise HTTPException(
-                    status_code=500, 
-                    detail="Failed to generate quiz - empty AI response"
-                )
-            
-            # Parse AI response into quiz questions
-            quiz_questions = self._parse_quiz_response(response.text)
-            
-            # Validate we got the requested number of questions
-            if len(quiz_questions) != num_questions:
-                # If we didn't get exactly the right number, truncate or pad
-                if len(quiz_questions) > num_questions:
-                    quiz_questions = quiz_questions[:num_questions]
-                elif len(quiz_questions) < num_questions and len(quiz_questions) > 0:
-                    # Use what we got if it's at least some questions
-                    pass
-                else:
-                    raise HTTPException(status_code=500, detail="Failed to generate valid quiz questions")
+            if not quiz_questions:
+                raise HTTPException(status_code=500, detail="Failed to generate valid quiz questions")
             
             return quiz_questions
             
@@ -215,7 +728,9 @@ class QuizService:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error in AI quiz generation: {str(e)}")
 
-    def _build_quiz_generation_prompt(self, video_content: VideoContent, video_title: str, num_questions: int) -> str:
+    def _build_quiz_generation_prompt(self, video_content: VideoContent, video_title: str, num_questions: int,
+                                      exclude_questions: Optional[List[str]] = None,
+                                      focus_points: Optional[List[str]] = None) -> str:
         """Build a comprehensive prompt for quiz generation"""
         prompt = f"""
 You are an expert educational content creator. Generate a {num_questions}-question multiple-choice quiz based on the following video content.
@@ -246,6 +761,7 @@ Important Vocabulary: {', '.join(video_content.vocabulary)}
    - Conceptual understanding (40%) 
    - Application/analysis (30%)
 4. Include a clear explanation for each correct answer
+   and tag each question with the main point or key concept it covers
 5. Make questions challenging but fair
 6. Avoid trick questions or ambiguous wording
 7. Ensure options are plausible and roughly equal in length
@@ -257,203 +773,136 @@ Return ONLY a JSON array with this exact structure:
     "question": "Clear, specific question text?",
     "options": ["Option A", "Option B", "Option C", "Option D"],
     "correct_answer": "Option A",
-    "explanation": "Detailed explanation of why this answer is correct and why others are wrong."
+    "explanation": "Detailed explanation of why this answer is correct and why others are wrong.",
+    "topic": "Main point or key concept this question covers"
   }}
 ]
 
 IMPORTANT: Return ONLY the JSON array, no additional text, formatting, or explanations outside the JSON.
 """
+        if focus_points:
+            prompt += "\nThis quiz is one section of a larger quiz. Base every question ONLY on these points:\n"
+            for point in focus_points:
+                prompt += f"- {point}\n"
+        if exclude_questions:
+            prompt += "\nDo NOT repeat or rephrase any of these existing questions:\n"
+            for question in exclude_questions:
+                prompt += f"- {question}\n"
         return prompt
 
     def _parse_quiz_response(self, ai_response: str) -> List[QuizQuestion]:
-        """Parse AI response into QuizQuestion objects"""
-        try:
-            # Clean the response - remove any markdown formatting or extra text
-            cleaned_response = ai_response.strip()
-            
-            # Remove markdown code blocks if present
-            if cleaned_response.startswith('```'):
-                lines = cleaned_response.split('\n')
-                # Remove first and last lines if they contain ```
-                if lines[0].strip().startswith('```'):
-                    lines = lines[1:]
-                if lines and lines[-1].strip().endswith('```'):
-                    lines = lines[:-1]
-                cleaned_response = '\n'.join(lines)
-            
-            # Find JSON content (look for array brackets)
-            start_idx = cleaned_response.find('[')
-            end_idx = cleaned_response.rfind(']') + 1
-            
-            if start_idx == -1 or end_idx == 0:
-                raise ValueError("No JSON array found in AI response")
-            
-            json_content = cleaned_response[start_idx:end_idx]
-            
-            # Clean up common JSON issues
-            # Remove trailing commas before closing brackets/braces
-            import re
-            json_content = re.sub(r',(\s*[}\]])', r'\1', json_content)
-            
-            # Parse JSON
-            quiz_data = json.loads(json_content)
-            
-            if not isinstance(quiz_data, list):
-                raise ValueError("AI response is not a JSON array")
-            
-            quiz_questions = []
-            for item in quiz_data:
-                # Validate required fields
-                required_fields = ['question', 'options', 'correct_answer', 'explanation']
-                for field in required_fields:
-                    if field not in item:
-                        raise ValueError(f"Missing required field: {field}")
-                
-                # Validate options format
-                if not isinstance(item['options'], list) or len(item['options']) < 2:
-                    raise ValueError("Each question must have at least 2 options")
-                
-                # Ensure we have exactly 4 options (pad if necessary)
-                while len(item['options']) < 4:
-                    item['options'].append(f"Option {len(item['options']) + 1}")
-                if len(item['options']) > 4:
-                    item['options'] = item['options'][:4]
-                
-                # Validate correct answer is in options (case insensitive and flexible matching)
-                correct_answer = item['correct_answer'].strip()
-                options = [opt.strip() for opt in item['options']]
-                
-                # Try exact match first
-                if correct_answer not in options:
-                    # Try case insensitive match
-                    correct_lower = correct_answer.lower()
-                    options_lower = [opt.lower() for opt in options]
-                    
-                    if correct_lower in options_lower:
-                        # Update correct_answer to match the actual option
-                        match_index = options_lower.index(correct_lower)
-                        item['correct_answer'] = options[match_index]
-                    else:
-                        # If still no match, use the first option as fallback
-                        print(f"Warning: Correct answer '{correct_answer}' not found in options {options}. Using first option as fallback.")
-                        item['correct_answer'] = options[0]
-                
-                quiz_question = QuizQuestion(
-                    question=item['question'],
-                    options=item['options'],
-                    correct_answer=item['correct_answer'],
-                    explanation=item['explanation']
-                )
-                quiz_questions.append(quiz_question)
-            
-            return quiz_questions
-            
-        except json.JSONDecodeError as e:
-            raise HTTPException(status_code=500, detail=f"Failed to parse AI response as JSON: {str(e)}")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error parsing quiz response: {str(e)}")
+        """Parse AI response into QuizQuestion objects, salvaging every valid item"""
+        parser = JSONArrayItemParser()
+        items = parser.feed(ai_response)
+        parser.close()
+        
+        quiz_questions = []
+        rejected = 0
+        for item in items:
+            try:
+                quiz_questions.append(self._build_quiz_question(item))
+            except Exception as e:
+                rejected += 1
+                print(f"Warning: Skipping invalid quiz question: {str(e)}")
+        
+        self._record_parse_result(parser, len(quiz_questions), rejected)
+        return quiz_questions
 
-    async def _get_cached_quiz(self, video_id: str) -> Optional[QuizResponse]:
-        """Get cached quiz from database"""
+    def _record_parse_result(self, parser: JSONArrayItemParser, accepted: int, rejected: int) -> None:
+        """Update parse-failure metrics for one AI response"""
+        self.generation_stats['responses'] += 1
+        if accepted == 0:
+            self.generation_stats['unparseable_responses'] += 1
+        self.generation_stats['items_parsed'] += accepted
+        self.generation_stats['items_rejected'] += rejected + parser.failed_items
+
+    def _build_quiz_question(self, item: Dict[str, Any]) -> QuizQuestion:
+        """Validate and normalize one generated question; raises ValueError if unusable"""
+        # Validate required fields
+        required_fields = ['question', 'options', 'correct_answer', 'explanation']
+        for field in required_fields:
+            if field not in item:
+                raise ValueError(f"Missing required field: {field}")
+        
+        # Validate options format
+        if not isinstance(item['options'], list) or len(item['options']) < 2:
+            raise ValueError("Each question must have at least 2 options")
+        
+        # Ensure we have exactly 4 options (pad if necessary)
+        while len(item['options']) < 4:
+            item['options'].append(f"Option {len(item['options']) + 1}")
+        if len(item['options']) > 4:
+            item['options'] = item['options'][:4]
+        
+        # Validate correct answer is in options (case insensitive and flexible matching)
+        correct_answer = str(item['correct_answer']).strip()
+        options = [str(opt).strip() for opt in item['options']]
+        
+        # Try exact match first
+        if correct_answer not in options:
+            # Try case insensitive match
+            correct_lower = correct_answer.lower()
+            options_lower = [opt.lower() for opt in options]
+            
+            if correct_lower in options_lower:
+                # Update correct_answer to match the actual option
+                match_index = options_lower.index(correct_lower)
+                item['correct_answer'] = options[match_index]
+            else:
+                # If still no match, use the first option as fallback
+                print(f"Warning: Correct answer '{correct_answer}' not found in options {options}. Using first option as fallback.")
+                item['correct_answer'] = options[0]
+        
+        return QuizQuestion(
+            question=item['question'],
+            options=item['options'],
+            correct_answer=item['correct_answer'],
+            explanation=item['explanation'],
+            topic=item.get('topic')
+        )
+
+    @traced("quiz.get_cached_quiz")
+    async def _get_cached_quiz(self, video_id: str, quiz_id: str) -> Optional[QuizResponse]:
+        """Get cached quiz from the question bank or the quiz store"""
         try:
-            doc_ref = self.video_db.db.collection('videos').document(video_id)
-            doc = doc_ref.get()
-            
-            if doc.exists:
-                data = doc.to_dict()
-                cached_quiz_data = data.get('generated_quiz')
-                if cached_quiz_data:
-                    return QuizResponse(**cached_quiz_data)
-            return None
+            if self.question_bank.is_bank_quiz_id(quiz_id):
+                return await self.question_bank.resolve_quiz(video_id, quiz_id)
+            return await self.quiz_store.get_quiz(video_id, quiz_id)
         except Exception:
             return None
 
-    def _is_quiz_fresh(self, quiz: QuizResponse, hours: int = 24) -> bool:
-        """Check if cached quiz is still fresh (within specified hours)"""
+    def _is_quiz_fresh(self, quiz: Union[QuizResponse, QuestionBank], hours: Optional[float] = None) -> bool:
+        """Check if cached quiz or question bank is still fresh (within QUIZ_TTL_HOURS by default)"""
+        if hours is None:
+            hours = self.quiz_ttl_hours
         try:
             time_diff = datetime.now() - quiz.generated_at
             return time_diff.total_seconds() < (hours * 3600)
         except:
             return False
 
+    @traced("quiz.cache_quiz")
     async def _cache_quiz(self, quiz: QuizResponse) -> bool:
-        """Cache generated quiz in database"""
+        """Cache generated quiz in the quiz store"""
+        return await self.quiz_store.save_quiz(quiz)
+
+    def _schedule_reviews(self, user_id: str, quiz: QuizResponse, correct_answers: List[int]) -> None:
+        """Add missed questions to the review queue; never fails the submission"""
         try:
-            doc_ref = self.video_db.db.collection('videos').document(quiz.video_id)
-            
-            # Convert to dict for storage
-            quiz_data = json.loads(quiz.json())
-            
-            doc_ref.update({
-                'generated_quiz': quiz_data,
-                'quiz_metadata': {
-                    'generation_count': 1,  # TODO: Implement increment
-                    'last_generated': datetime.now()
-                }
-            })
-            return True
-        except Exception:
-            return False
+            self.review_scheduler.record_quiz_results(user_id, quiz.video_id, quiz.questions, correct_answers)
+        except Exception as e:
+            print(f"Failed to schedule reviews for user {user_id}: {str(e)}")
 
+    @traced("quiz.save_result")
     async def _save_quiz_result(self, user_id: str, result: QuizResult, submission: QuizSubmission) -> bool:
-        """Save quiz result to user's history"""
+        """Save quiz result to user's history and update statistics in one atomic write"""
         try:
-            # Create attempt document
             attempt_data = {
-                'submission': json.loads(submission.json()),
-                'result': json.loads(result.json()),
+                'submission': to_primitives(submission),
+                'result': to_primitives(result),
                 'timestamp': datetime.now()
             }
-            
-            # Save to user's quiz attempts
-            doc_ref = (self.video_db.db.collection('users')
-                      .document(user_id)
-                      .collection('quizzes')
-                      .document(result.video_id)
-                      .collection('attempts')
-                      .document())
-            
-            doc_ref.set(attempt_data)
-            
-            # Update quiz statistics
-            await self._update_quiz_statistics(user_id, result.video_id, result)
-            
-            return True
-        except Exception:
-            return False
-
-    async def _update_quiz_statistics(self, user_id: str, video_id: str, result: QuizResult) -> bool:
-        """Update quiz statistics for user and video"""
-        try:
-            stats_ref = (self.video_db.db.collection('users')
-                        .document(user_id)
-                        .collection('quizzes')
-                        .document(video_id))
-            
-            # Get current stats or create new
-            doc = stats_ref.get()
-            if doc.exists:
-                current_stats = doc.to_dict().get('statistics', {})
-                total_attempts = current_stats.get('total_attempts', 0) + 1
-                total_score = current_stats.get('total_score', 0) + result.score
-                best_score = max(current_stats.get('best_score', 0), result.score)
-                average_score = total_score / total_attempts
-            else:
-                total_attempts = 1
-                total_score = result.score
-                best_score = result.score
-                average_score = result.score
-            
-            stats_ref.set({
-                'statistics': {
-                    'total_attempts': total_attempts,
-                    'total_score': total_score,
-                    'average_score': average_score,
-                    'best_score': best_score,
-                    'last_attempt': datetime.now()
-                }
-            }, merge=True)
-            
+            self.statistics_store.record_attempt(user_id, result, attempt_data)
             return True
         except Exception:
             return False
@@ -476,77 +925,47 @@ IMPORTANT: Return ONLY the JSON array, no additional text, formatting, or explan
                 data = doc.to_dict()
                 result_data = data.get('result', {})
                 if result_data:
-                    history.append(QuizResult(**result_data))
+                    history.append(from_storage(QuizResult, result_data))
             
             return history
         except Exception:
             return []
 
     async def _calculate_user_quiz_statistics(self, user_id: str) -> Dict[str, Any]:
-        """Calculate comprehensive quiz statistics for a user"""
+        """Read the materialized quiz statistics for a user"""
         try:
-            quizzes_ref = self.video_db.db.collection('users').document(user_id).collection('quizzes')
-            docs = quizzes_ref.get()
-            
-            total_videos = 0
-            total_attempts = 0
-            total_score = 0
-            best_scores = []
-            
-            for doc in docs:
-                data = doc.to_dict()
-                stats = data.get('statistics', {})
-                if stats:
-                    total_videos += 1
-                    total_attempts += stats.get('total_attempts', 0)
-                    total_score += stats.get('total_score', 0)
-                    best_scores.append(stats.get('best_score', 0))
-            
-            if total_attempts > 0:
-                overall_average = total_score / total_attempts
-                best_overall = max(best_scores) if best_scores else 0
-            else:
-                overall_average = 0
-                best_overall = 0
-            
-            return {
-                'total_videos_with_quizzes': total_videos,
-                'total_quiz_attempts': total_attempts,
-                'overall_average_score': round(overall_average, 2),
-                'best_overall_score': best_overall,
-                'completion_rate': round((total_videos / max(total_attempts, 1)) * 100, 2) if total_attempts > 0 else 0
-            }
+            summary = self.statistics_store.get_summary(user_id)
+            if summary is None:
+                # Users with attempts from before the summary existed get it built once
+                summary = self.statistics_store.recompute(user_id)
+            total_videos, best_score = self.statistics_store.video_totals(user_id)
+            return self.statistics_store.format_statistics(summary, total_videos, best_score)
         except Exception:
-            return {
-                'total_videos_with_quizzes': 0,
-                'total_quiz_attempts': 0,
-                'overall_average_score': 0,
-                'best_overall_score': 0,
-                'completion_rate': 0
-            }
+            return self.statistics_store.format_statistics(None)
 
-    async def _reset_user_quiz_attempts(self, user_id: str, video_id: str) -> bool:
+    async def _reset_user_quiz_attempts(self, user_id: str, video_id: str) -> Dict[str, Any]:
         """Reset all quiz attempts for a specific video"""
         try:
-            # Delete all attempts
-            attempts_ref = (self.video_db.db.collection('users')
-                           .document(user_id)
-                           .collection('quizzes')
-                           .document(video_id)
-                           .collection('attempts'))
+            reset_at = datetime.now()
             
-            docs = attempts_ref.get()
-            for doc in docs:
-                doc.reference.delete()
+            # Statistics are reset right away so the reset is visible immediately
+            self.statistics_store.remove_video(user_id, video_id)
             
-            # Reset statistics
-            stats_ref = (self.video_db.db.collection('users')
-                        .document(user_id)
-                        .collection('quizzes')
-                        .document(video_id))
+            # Only attempts made before the reset are deleted, so a background
+            # deletion never removes attempts submitted after it
+            attempts_query = self.statistics_store.attempts_before(user_id, video_id, reset_at)
             
-            stats_ref.delete()
+            attempt_count = attempts_query.count().get()[0][0].value
+            if attempt_count <= self.inline_delete_limit:
+                await self.bulk_deleter.delete_query(attempts_query)
+                return {"success": True, "job_id": None}
             
-            return True
+            job_id = job_manager.submit(
+                user_id,
+                'quiz_reset',
+                lambda progress: self.bulk_deleter.delete_query(attempts_query, progress),
+                total=attempt_count
+            )
+            return {"success": True, "job_id": job_id}
         except Exception:
-            return False
+            return {"success": False, "job_id": None}
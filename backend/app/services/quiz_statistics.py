@@ -0,0 +1,238 @@
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+from google.cloud import firestore
+from google.cloud.firestore_v1 import FieldFilter
+from ..models.quiz import QuizResult
+from ..utils.serialization import from_storage
+
+# How many buckets of each rollup period are kept in the summary document
+PERIOD_RETENTION = {
+    'daily': 30,
+    'weekly': 26,
+    'monthly': 24,
+}
+
+
+def period_keys(when: datetime) -> Dict[str, str]:
+    """Rollup bucket keys for a timestamp"""
+    iso_year, iso_week, _ = when.isocalendar()
+    return {
+        'daily': when.strftime('%Y-%m-%d'),
+        'weekly': f"{iso_year}-W{iso_week:02d}",
+        'monthly': when.strftime('%Y-%m'),
+    }
+
+
+class QuizStatisticsStore:
+    """Materialized per-user quiz statistics
+
+    Layout:
+        users/{user_id}/quizzes/{video_id}              per-video statistics
+        users/{user_id}/quizzes/{video_id}/attempts/*   individual attempts
+        users/{user_id}/quiz_stats/summary      per-user aggregate, read by the statistics endpoint
+
+    The summary holds only totals and a bounded number of period buckets, so it
+    stays small however many videos a user has; per-video figures are read from
+    the per-video documents.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def _video_stats_ref(self, user_id: str, video_id: str):
+        return self.db.collection('users').document(user_id).collection('quizzes').document(video_id)
+
+    def _summary_ref(self, user_id: str):
+        return self.db.collection('users').document(user_id).collection('quiz_stats').document('summary')
+
+    @staticmethod
+    def empty_summary() -> Dict[str, Any]:
+        return {
+            'total_attempts': 0,
+            'total_score': 0,
+            'total_questions': 0,
+            'periods': {period: {} for period in PERIOD_RETENTION},
+            'updated_at': None
+        }
+
+    def _attempts_ref(self, user_id: str, video_id: str):
+        return self._video_stats_ref(user_id, video_id).collection('attempts')
+
+    def attempts_before(self, user_id: str, video_id: str, cutoff: datetime):
+        """Query for a video's attempts submitted up to cutoff
+
+        Deletes scheduled by a reset or a library removal use it, so attempts
+        submitted after the reset or after the video is added back are kept.
+        """
+        return self._attempts_ref(user_id, video_id).where(filter=FieldFilter('timestamp', '<=', cutoff))
+
+    def record_attempt(self, user_id: str, result: QuizResult, attempt_data: Dict[str, Any]) -> None:
+        """Insert an attempt and update per-video statistics and the user summary atomically
+
+        Everything is a single batched write built from server-side transforms
+        (Increment / Maximum), so there is no preceding read and concurrent
+        submissions cannot lose updates.
+        """
+        score = result.score
+        attempt_ref = self._attempts_ref(user_id, result.video_id).document()
+
+        video_stats = {
+            'total_attempts': firestore.Increment(1),
+            'total_score': firestore.Increment(score),
+            'total_questions': firestore.Increment(result.total_questions),
+            'best_score': firestore.Maximum(score),
+            'last_attempt': result.submitted_at
+        }
+
+        periods = {}
+        for period, key in period_keys(result.submitted_at).items():
+            periods[period] = {
+                key: {
+                    'attempts': firestore.Increment(1),
+                    'total_score': firestore.Increment(score),
+                    'total_questions': firestore.Increment(result.total_questions)
+                }
+            }
+
+        summary = {
+            'total_attempts': firestore.Increment(1),
+            'total_score': firestore.Increment(score),
+            'total_questions': firestore.Increment(result.total_questions),
+            'periods': periods,
+            'updated_at': datetime.now()
+        }
+
+        batch = self.db.batch()
+        batch.set(attempt_ref, attempt_data)
+        batch.set(self._video_stats_ref(user_id, result.video_id), {'statistics': video_stats}, merge=True)
+        batch.set(self._summary_ref(user_id), summary, merge=True)
+        batch.commit()
+
+    def remove_video(self, user_id: str, video_id: str) -> None:
+        """Delete a video's statistics and subtract them from the user summary in one transaction
+
+        Period rollups record activity over time and are not rewound. Attempt
+        documents are deleted separately.
+        """
+        video_stats_ref = self._video_stats_ref(user_id, video_id)
+        summary_ref = self._summary_ref(user_id)
+
+        @firestore.transactional
+        def remove_in_transaction(transaction):
+            video_doc = video_stats_ref.get(transaction=transaction)
+            summary_doc = summary_ref.get(transaction=transaction)
+            video_stats = (video_doc.to_dict() or {}).get('statistics', {}) if video_doc.exists else {}
+            if summary_doc.exists and video_stats:
+                summary = summary_doc.to_dict()
+                for field in ('total_attempts', 'total_score', 'total_questions'):
+                    summary[field] = max(summary.get(field, 0) - video_stats.get(field, 0), 0)
+                # Summaries written before per-video figures moved out carried a map of them
+                summary.pop('videos', None)
+                summary['updated_at'] = datetime.now()
+                transaction.set(summary_ref, summary)
+            transaction.delete(video_stats_ref)
+
+        remove_in_transaction(self.db.transaction())
+
+    def get_summary(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Read the user summary (single document read)"""
+        doc = self._summary_ref(user_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def video_totals(self, user_id: str) -> Tuple[int, int]:
+        """Number of videos with attempts and the best score on any of them
+
+        A count aggregation plus a one-document query, however many videos there are.
+        """
+        quizzes_ref = self.db.collection('users').document(user_id).collection('quizzes')
+        total_videos = quizzes_ref.count().get()[0][0].value
+        best = quizzes_ref.order_by('statistics.best_score', direction='DESCENDING').limit(1).get()
+        best_score = (best[0].to_dict() or {}).get('statistics', {}).get('best_score', 0) if best else 0
+        return total_videos, best_score
+
+    def recompute(self, user_id: str) -> Dict[str, Any]:
+        """Rebuild the user summary from per-video statistics and attempts to repair drift"""
+        summary = self.empty_summary()
+        quizzes_ref = self.db.collection('users').document(user_id).collection('quizzes')
+
+        for video_doc in quizzes_ref.stream():
+            stats = (video_doc.to_dict() or {}).get('statistics', {})
+            if not stats:
+                continue
+            summary['total_attempts'] += stats.get('total_attempts', 0)
+            summary['total_score'] += stats.get('total_score', 0)
+
+            video_questions = 0
+            for attempt_doc in video_doc.reference.collection('attempts').stream():
+                result_data = (attempt_doc.to_dict() or {}).get('result')
+                if not result_data:
+                    continue
+                result = from_storage(QuizResult, result_data)
+                video_questions += result.total_questions
+                self._add_to_periods(summary, result)
+            summary['total_questions'] += video_questions
+            if stats.get('total_questions') != video_questions:
+                # Also backfills videos last written before they counted questions
+                video_doc.reference.set({'statistics': {'total_questions': video_questions}}, merge=True)
+
+        self._trim_periods(summary)
+        summary['updated_at'] = datetime.now()
+        self._summary_ref(user_id).set(summary)
+        return summary
+
+    def _add_to_periods(self, summary: Dict[str, Any], result: QuizResult) -> None:
+        periods = summary.setdefault('periods', {})
+        for period, key in period_keys(result.submitted_at).items():
+            bucket = periods.setdefault(period, {}).setdefault(key, {
+                'attempts': 0, 'total_score': 0, 'total_questions': 0
+            })
+            bucket['attempts'] += 1
+            bucket['total_score'] += result.score
+            bucket['total_questions'] += result.total_questions
+
+    @staticmethod
+    def _trim_periods(summary: Dict[str, Any]) -> None:
+        periods = summary.setdefault('periods', {})
+        for period, retention in PERIOD_RETENTION.items():
+            buckets = periods.get(period, {})
+            # Bucket keys sort chronologically
+            for key in sorted(buckets)[:-retention]:
+                del buckets[key]
+
+    @staticmethod
+    def format_statistics(summary: Optional[Dict[str, Any]], total_videos: int = 0,
+                          best_score: int = 0) -> Dict[str, Any]:
+        """Shape the summary document and video_totals() into the statistics API response"""
+        summary = summary or QuizStatisticsStore.empty_summary()
+        total_attempts = summary.get('total_attempts', 0)
+        total_score = summary.get('total_score', 0)
+
+        if total_attempts > 0:
+            overall_average = total_score / total_attempts
+            best_overall = best_score
+        else:
+            overall_average = 0
+            best_overall = 0
+
+        # Submissions append buckets without reading, so retention is applied here
+        # (and in storage by the recompute job)
+        periods = {}
+        for period, buckets in summary.get('periods', {}).items():
+            retention = PERIOD_RETENTION.get(period, len(buckets))
+            periods[period] = {
+                key: {
+                    'attempts': bucket.get('attempts', 0),
+                    'average_score': round(bucket.get('total_score', 0) / bucket['attempts'], 2) if bucket.get('attempts') else 0,
+                    'total_questions': bucket.get('total_questions', 0)
+                }
+                for key, bucket in sorted(buckets.items())[-retention:]
+            }
+
+        return {
+            'total_videos_with_quizzes': total_videos,
+            'total_quiz_attempts': total_attempts,
+            'overall_average_score': round(overall_average, 2),
+            'best_overall_score': best_overall,
+            'completion_rate': round((total_videos / max(total_attempts, 1)) * 100, 2) if total_attempts > 0 else 0,
+            'periods': periods
+        }
@@ -0,0 +1,69 @@
+import os
+from typing import Optional
+from fastapi import HTTPException
+from ..models.quiz import QuizResponse
+from ..utils.lru_cache import LRUCache
+from ..utils.serialization import to_primitives, from_storage
+from ..container import container
+
+
+class QuizStore:
+    """Generated quizzes stored apart from the (large) global video document
+
+    Layout:
+        videos/{video_id}/quizzes/{quiz_id}  full quiz, also used for grading
+
+    Reads go through a per-process LRU, then the host-wide shared cache, then Firestore.
+    """
+
+    def __init__(self, db, cache=None):
+        self.db = db
+        self.cache = cache if cache is not None else container.shared_cache()
+        self.cache_ttl = float(os.getenv("QUIZ_SHARED_CACHE_TTL_SECONDS", "86400"))
+        self._quizzes = LRUCache(int(os.getenv("QUIZ_CACHE_SIZE", "256")))
+
+    @staticmethod
+    def quiz_id_for(num_questions: int) -> str:
+        """Quizzes are keyed by question count so differently sized requests don't collide"""
+        return str(num_questions)
+
+    def _quiz_ref(self, video_id: str, quiz_id: str):
+        return self.db.collection('videos').document(video_id).collection('quizzes').document(quiz_id)
+
+    async def get_quiz(self, video_id: str, quiz_id: str) -> Optional[QuizResponse]:
+        """Get a quiz from the caches, falling back to its own document"""
+        cached = self._quizzes.get((video_id, quiz_id))
+        if cached is not None:
+            return cached
+
+        shared = self.cache.get("quizzes", f"{video_id}/{quiz_id}")
+        if shared is not None:
+            quiz = from_storage(QuizResponse, shared)
+            self._quizzes.set((video_id, quiz_id), quiz)
+            return quiz
+
+        try:
+            doc = self._quiz_ref(video_id, quiz_id).get()
+            if not doc.exists:
+                return None
+            quiz = from_storage(QuizResponse, doc.to_dict())
+            self._quizzes.set((video_id, quiz_id), quiz)
+            self.cache.set("quizzes", f"{video_id}/{quiz_id}", quiz.model_dump_json(), self.cache_ttl)
+            return quiz
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching quiz: {str(e)}")
+
+    async def save_quiz(self, quiz: QuizResponse) -> bool:
+        """Persist a quiz in its own document"""
+        try:
+            quiz_id = quiz.quiz_id or self.quiz_id_for(len(quiz.questions))
+            if quiz.quiz_id != quiz_id:
+                quiz = quiz.model_copy(update={"quiz_id": quiz_id})
+            self._quiz_ref(quiz.video_id, quiz_id).set(to_primitives(quiz))
+
+            self._quizzes.set((quiz.video_id, quiz_id), quiz)
+            self.cache.set("quizzes", f"{quiz.video_id}/{quiz_id}", quiz.model_dump_json(), self.cache_ttl)
+            return True
+        except Exception:
+            return False
+
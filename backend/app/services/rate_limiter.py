@@ -0,0 +1,137 @@
+import os
+import math
+import time
+from typing import Any, Dict, Optional, Tuple
+from fastapi import HTTPException
+from google.api_core.exceptions import DeadlineExceeded, ServiceUnavailable
+from google.cloud import firestore
+from .. import metrics
+
+# Endpoint classes with their own budgets
+VIDEOS = "videos"
+QUIZZES = "quizzes"
+CHAT = "chat"
+
+# Default "<requests>/<seconds>" per class
+_DEFAULT_LIMITS = {
+    VIDEOS: "20/3600",
+    QUIZZES: "30/3600",
+    CHAT: "30/300",
+}
+
+
+def _parse_limit(value: str) -> Tuple[float, float]:
+    """'20/3600' -> (capacity, tokens refilled per second); 0 requests disables the class"""
+    requests, _, seconds = value.partition("/")
+    capacity = float(requests)
+    period = float(seconds or 60)
+    return capacity, (capacity / period if capacity > 0 and period > 0 else 0.0)
+
+
+class RateLimiter:
+    """Per-user token buckets for the endpoints that call Gemini
+
+    Each user has a bucket per endpoint class, configured as
+    RATE_LIMIT_VIDEOS / RATE_LIMIT_QUIZZES / RATE_LIMIT_CHAT = "<requests>/<seconds>":
+    up to <requests> calls in a burst, refilled evenly over <seconds>.
+    Buckets live in rate_limits/{user_id} and are updated in a transaction,
+    so the limits hold across instances. Once a user is out of tokens the
+    refusal is remembered in the host cache until the next token is due, so
+    a client retrying in a tight loop costs no Firestore calls. The request is
+    let through only when Firestore is unavailable; a check that cannot commit,
+    e.g. because the user's own burst keeps aborting the transaction, is refused.
+    consume() blocks on the transaction, so call it off the event loop.
+    """
+
+    def __init__(self, db, cache):
+        self.db = db
+        self.cache = cache
+        self.enabled = os.getenv("RATE_LIMITS_ENABLED", "true").lower() != "false"
+        self.limits = {
+            budget: _parse_limit(os.getenv(f"RATE_LIMIT_{budget.upper()}", default))
+            for budget, default in _DEFAULT_LIMITS.items()
+        }
+
+    def _ref(self, user_id: str):
+        return self.db.collection('rate_limits').document(user_id)
+
+    def _refill(self, budget: str, bucket: Optional[Dict[str, Any]], now: float) -> float:
+        """Tokens in a stored bucket as of now"""
+        capacity, rate = self.limits[budget]
+        if not bucket:
+            return capacity
+        elapsed = max(now - bucket.get('updated_at', now), 0.0)
+        return min(capacity, bucket.get('tokens', capacity) + elapsed * rate)
+
+    def _retry_after(self, budget: str, tokens: float) -> int:
+        """Whole seconds until the bucket holds one token"""
+        _, rate = self.limits[budget]
+        return max(1, math.ceil((1 - tokens) / rate))
+
+    def consume(self, user_id: str, budget: str) -> None:
+        """Take one token from the user's bucket, or raise 429 with Retry-After"""
+        capacity, rate = self.limits[budget]
+        if not self.enabled or capacity <= 0:
+            return
+
+        key = f"{user_id}/{budget}"
+        blocked_until = self.cache.get("rate_limited", key)
+        if blocked_until is not None and float(blocked_until) > time.time():
+            self._reject(budget, max(1, math.ceil(float(blocked_until) - time.time())))
+
+        ref = self._ref(user_id)
+
+        @firestore.transactional
+        def take(transaction) -> Tuple[bool, float]:
+            doc = ref.get(transaction=transaction)
+            now = time.time()
+            tokens = self._refill(budget, (doc.to_dict() or {}).get(budget) if doc.exists else None, now)
+            if tokens < 1:
+                return False, tokens
+            transaction.set(ref, {budget: {'tokens': tokens - 1, 'updated_at': now}}, merge=True)
+            return True, tokens - 1
+
+        try:
+            admitted, tokens = take(self.db.transaction())
+        except (ServiceUnavailable, DeadlineExceeded) as e:
+            print(f"Rate limit check failed for {key}, allowing request: {e}")
+            return
+        except Exception as e:
+            # Out of transaction retries on a contended bucket
+            print(f"Rate limit check did not commit for {key}, refusing request: {e}")
+            self._reject(budget, 1)
+
+        if not admitted:
+            retry_after = self._retry_after(budget, tokens)
+            self.cache.set("rate_limited", key, str(time.time() + retry_after), retry_after)
+            self._reject(budget, retry_after)
+
+    @staticmethod
+    def _reject(budget: str, retry_after: int) -> None:
+        metrics.rate_limited.inc(budget)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many {budget} requests, retry in {retry_after} seconds",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    def usage(self, user_id: str) -> Dict[str, Any]:
+        """Remaining requests per endpoint class, without consuming any"""
+        doc = self._ref(user_id).get()
+        stored = (doc.to_dict() or {}) if doc.exists else {}
+        now = time.time()
+        budgets = {}
+        for budget, (capacity, rate) in self.limits.items():
+            if not self.enabled or capacity <= 0:
+                budgets[budget] = {"limited": False}
+                continue
+            tokens = self._refill(budget, stored.get(budget), now)
+            budgets[budget] = {
+                "limited": True,
+                "limit": int(capacity),
+                "period_seconds": round(capacity / rate),
+                "remaining": int(tokens),
+                "retry_after_seconds": 0 if tokens >= 1 else self._retry_after(budget, tokens),
+                "full_in_seconds": math.ceil((capacity - tokens) / rate),
+            }
+        return budgets
@@ -0,0 +1,146 @@
+import os
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional, Tuple
+from google.cloud.firestore_v1 import FieldFilter
+from ..models.quiz import QuizQuestion, ReviewItem, ReviewAnswer, ReviewResult
+from ..utils.text_similarity import normalize_text
+from ..utils.serialization import from_storage
+
+# get_all / batch sizes stay well under Firestore's 500-operation batch limit
+_CHUNK_SIZE = 100
+
+
+class ReviewScheduler:
+    """Spaced-repetition queue of missed quiz questions across a user's library
+
+    Layout:
+        users/{user_id}/review_items/{item_id}   one document per missed question
+
+    Every item carries its next due_at, so a "due now" session is a single range
+    query on the automatic single-field index (due_at <= now, ordered by due_at).
+    Scheduling is a binary SM-2: a correct answer grows the interval by the item's
+    ease factor, a miss resets it to REVIEW_RELEARN_MINUTES.
+    """
+
+    MIN_EASE = 1.3
+
+    def __init__(self, db):
+        self.db = db
+        self.relearn_minutes = float(os.getenv("REVIEW_RELEARN_MINUTES", "10"))
+        self.max_session_size = int(os.getenv("REVIEW_MAX_SESSION_SIZE", "50"))
+
+    def _items_ref(self, user_id: str):
+        return self.db.collection('users').document(user_id).collection('review_items')
+
+    @staticmethod
+    def item_id_for(video_id: str, question: QuizQuestion) -> str:
+        """Stable id so the same question missed in different quizzes is one item"""
+        key = f"{video_id}:{normalize_text(question.question)}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:24]
+
+    def record_quiz_results(self, user_id: str, video_id: str, questions: List[QuizQuestion],
+                            correct_indices: List[int]) -> None:
+        """Schedule missed questions and advance items answered correctly again
+
+        Questions answered correctly that were never missed are not tracked.
+        """
+        now = datetime.now(timezone.utc)
+        correct = set(correct_indices)
+        graded = {}
+        for index, question in enumerate(questions):
+            graded[self.item_id_for(video_id, question)] = (question, index in correct)
+
+        existing = self._get_items(user_id, list(graded))
+        updates = []
+        for item_id, (question, was_correct) in graded.items():
+            item = existing.get(item_id)
+            if item is None:
+                if was_correct:
+                    continue
+                item = ReviewItem(item_id=item_id, video_id=video_id, question=question, due_at=now)
+            updates.append(self._schedule(item, was_correct, now))
+
+        self._save_items(user_id, updates)
+
+    def get_due(self, user_id: str, limit: Optional[int] = None) -> Tuple[List[ReviewItem], int]:
+        """Items due now, soonest first, and the total number due"""
+        limit = min(limit or self.max_session_size, self.max_session_size)
+        due_query = self._items_ref(user_id).where(filter=FieldFilter('due_at', '<=', datetime.now(timezone.utc)))
+        docs = due_query.order_by('due_at').limit(limit).stream()
+        items = [from_storage(ReviewItem, doc.to_dict()) for doc in docs]
+        if len(items) < limit:
+            return items, len(items)
+        return items, due_query.count().get()[0][0].value
+
+    def grade_review(self, user_id: str, answers: List[ReviewAnswer]) -> List[ReviewResult]:
+        """Grade a review session and reschedule each item"""
+        now = datetime.now(timezone.utc)
+        items = self._get_items(user_id, [answer.item_id for answer in answers])
+
+        results = []
+        updates = []
+        for answer in answers:
+            item = items.get(answer.item_id)
+            if item is None:
+                continue
+            was_correct = answer.selected_answer == item.question.correct_answer
+            item = self._schedule(item, was_correct, now)
+            updates.append(item)
+            results.append(ReviewResult(
+                item_id=item.item_id,
+                correct=was_correct,
+                correct_answer=item.question.correct_answer,
+                explanation=item.question.explanation,
+                next_due_at=item.due_at
+            ))
+
+        self._save_items(user_id, updates)
+        return results
+
+    def video_items_query(self, user_id: str, video_id: str):
+        """Query for a video's items, used to delete them with the video"""
+        return self._items_ref(user_id).where(filter=FieldFilter('video_id', '==', video_id))
+
+    def _schedule(self, item: ReviewItem, was_correct: bool, now: datetime) -> ReviewItem:
+        if was_correct:
+            repetitions = item.repetitions + 1
+            if repetitions == 1:
+                interval_days = 1.0
+            elif repetitions == 2:
+                interval_days = 6.0
+            else:
+                interval_days = round(item.interval_days * item.ease_factor, 2)
+            ease_factor = item.ease_factor + 0.1
+            lapses = item.lapses
+        else:
+            repetitions = 0
+            interval_days = self.relearn_minutes / (24 * 60)
+            ease_factor = max(self.MIN_EASE, item.ease_factor - 0.2)
+            lapses = item.lapses + 1
+
+        return item.model_copy(update={
+            'repetitions': repetitions,
+            'interval_days': interval_days,
+            'ease_factor': round(ease_factor, 2),
+            'lapses': lapses,
+            'due_at': now + timedelta(days=interval_days),
+            'last_reviewed_at': now
+        })
+
+    def _get_items(self, user_id: str, item_ids: List[str]) -> Dict[str, ReviewItem]:
+        items = {}
+        for i in range(0, len(item_ids), _CHUNK_SIZE):
+            refs = [self._items_ref(user_id).document(item_id) for item_id in item_ids[i:i + _CHUNK_SIZE]]
+            for doc in self.db.get_all(refs):
+                if doc.exists:
+                    items[doc.id] = from_storage(ReviewItem, doc.to_dict())
+        return items
+
+    def _save_items(self, user_id: str, items: List[ReviewItem]) -> None:
+        # model_dump keeps due_at a native timestamp so range queries compare correctly
+        for i in range(0, len(items), _CHUNK_SIZE):
+            batch = self.db.batch()
+            for item in items[i:i + _CHUNK_SIZE]:
+                batch.set(self._items_ref(user_id).document(item.item_id), item.model_dump())
+            batch.commit()
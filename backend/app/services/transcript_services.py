@@ -1,30 +1,24 @@
 import asyncio
 from youtube_transcript_api import YouTubeTranscriptApi
 from typing import Dict, List
-import google.genai as genai
 from dotenv import load_dotenv
 import os
 from fastapi import HTTPException
+from .gemini_limiter import gemini_limiter
+from ..container import container
+from .. import metrics
 load_dotenv()
 
 class TranscriptService:
-    def __init__(self):
-        GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-        if not GEMINI_API_KEY:
-            raise HTTPException(
-                status_code=500, 
-                detail="GEMINI_API_KEY not found in environment variables"
-            )
-        
-        self.client = genai.Client(api_key=GEMINI_API_KEY)
+    def __init__(self, client=None):
+        # Gemini client shared across services
+        self.client = client or container.genai_client()
         self.model_name = 'gemini-2.5-flash'
 
     async def fetch_transcript(self, video_id: str) -> str:
         #fetch transcript from YouTube
         try:
-            loop = asyncio.get_event_loop()
-            transcript = await loop.run_in_executor(
-                None, 
+            transcript = await asyncio.to_thread(
                 lambda: YouTubeTranscriptApi.get_transcript(video_id)
             )
             result = ' '.join(entry['text'] for entry in transcript)
@@ -52,12 +46,12 @@ class TranscriptService:
 
         try:
             tasks = [
-                self._generate_summary(transcript),
-                self._extract_main_points(transcript),
-                self._extract_key_concepts(transcript),
-                self._create_study_guide(transcript),
-                self._extract_vocabulary(transcript),
-                self._generate_analysis(transcript)
+                self._timed("summary", self._generate_summary(transcript)),
+                self._timed("main_points", self._extract_main_points(transcript)),
+                self._timed("key_concepts", self._extract_key_concepts(transcript)),
+                self._timed("study_guide", self._create_study_guide(transcript)),
+                self._timed("vocabulary", self._extract_vocabulary(transcript)),
+                self._timed("analysis", self._generate_analysis(transcript))
             ]
             
             results = await asyncio.gather(*tasks)
@@ -78,6 +72,12 @@ class TranscriptService:
                 detail=f"Error processing transcript with AI: {str(e)}"
             )
 
+    @staticmethod
+    async def _timed(artifact: str, generation):
+        # Each artifact is its own stage so a slow one stands out in /metrics
+        with metrics.stage(f"gemini_{artifact}"):
+            return await generation
+
     async def _generate_summary(self, transcript: str) -> str:
         #generate a concise summary of the transcript
         try:
@@ -86,14 +86,13 @@ class TranscriptService:
             
             {transcript[:4000]}"""
             
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                lambda: self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=prompt
+            async with gemini_limiter.slot():
+                response = await asyncio.to_thread(
+                    lambda: self.client.models.generate_content(
+                        model=self.model_name,
+                        contents=prompt
+                    )
                 )
-            )
             if not response or not response.text:
                 raise HTTPException(
                     status_code=500, 
@@ -116,14 +115,13 @@ class TranscriptService:
             
             {transcript[:4000]}"""
             
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                lambda: self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=prompt
+            async with gemini_limiter.slot():
+                response = await asyncio.to_thread(
+                    lambda: self.client.models.generate_content(
+                        model=self.model_name,
+                        contents=prompt
+                    )
                 )
-            )
             if not response or not response.text:
                 raise HTTPException(
                     status_code=500, 
@@ -153,14 +151,13 @@ class TranscriptService:
             
             {transcript[:4000]}"""
             
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                lambda: self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=prompt
+            async with gemini_limiter.slot():
+                response = await asyncio.to_thread(
+                    lambda: self.client.models.generate_content(
+                        model=self.model_name,
+                        contents=prompt
+                    )
                 )
-            )
             if not response or not response.text:
                 return []  # Key concepts are optional, return empty list
             
@@ -184,14 +181,13 @@ class TranscriptService:
             Transcript:
             {transcript[:4000]}"""
             
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                lambda: self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=prompt
+            async with gemini_limiter.slot():
+                response = await asyncio.to_thread(
+                    lambda: self.client.models.generate_content(
+                        model=self.model_name,
+                        contents=prompt
+                    )
                 )
-            )
             if not response or not response.text:
                 raise HTTPException(
                     status_code=500, 
@@ -214,14 +210,13 @@ class TranscriptService:
             
             {transcript[:4000]}"""
             
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                lambda: self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=prompt
+            async with gemini_limiter.slot():
+                response = await asyncio.to_thread(
+                    lambda: self.client.models.generate_content(
+                        model=self.model_name,
+                        contents=prompt
+                    )
                 )
-            )
             if not response or not response.text:
                 return []  # Vocabulary is optional, return empty list
             
@@ -246,14 +241,13 @@ class TranscriptService:
             Transcript:
             {transcript[:4000]}"""
             
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                lambda: self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=prompt
+            async with gemini_limiter.slot():
+                response = await asyncio.to_thread(
+                    lambda: self.client.models.generate_content(
+                        model=self.model_name,
+                        contents=prompt
+                    )
                 )
-            )
             if not response or not response.text:
                 return "Analysis could not be generated for this transcript."  # Graceful fallback
             
@@ -0,0 +1,110 @@
+import os
+import time
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+from ..models.video import GlobalVideo, VideoResponseGlobal, VideoResponseUser, UserVideoMetadata
+from ..utils.lru_cache import LRUCache
+from ..utils.precompressed import PrecompressedPrefix, negotiate_encoding
+
+
+def _etag_base(etag: str) -> str:
+    """Strip the weak prefix, quotes and encoding suffix from an entity tag"""
+    etag = etag.strip()
+    if etag.startswith("W/"):
+        etag = etag[2:]
+    etag = etag.strip('"')
+    for suffix in ("-gzip", "-br"):
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)]
+    return etag
+
+
+class VideoBody:
+    """The serialized global half of a VideoResponse
+
+    The JSON object is kept without its closing brace, so a response is this
+    prefix followed by the user's fields. The version is a hash of the prefix,
+    so it only changes when the global content does.
+    """
+
+    def __init__(self, global_video: GlobalVideo):
+        fields = VideoResponseGlobal(
+            video_id=global_video.video_id,
+            info=global_video.info,
+            content=global_video.content,
+            created_at=global_video.metadata.created_at
+        )
+        prefix = fields.model_dump_json().encode()[:-1]
+        self.version = hashlib.blake2b(prefix, digest_size=12).hexdigest()
+        self.compressed = PrecompressedPrefix(prefix)
+        self.built_at = time.monotonic()
+
+    @staticmethod
+    def user_tail(user_metadata: Optional[UserVideoMetadata]) -> bytes:
+        """The user's fields as the rest of the JSON object"""
+        if user_metadata is None:
+            fields = VideoResponseUser()
+        else:
+            fields = VideoResponseUser(
+                progress=user_metadata.progress,
+                last_watched=user_metadata.last_watched,
+                is_favorite=user_metadata.is_favorite,
+                notes=user_metadata.notes
+            )
+        return b"," + fields.model_dump_json().encode()[1:]
+
+    def response(self, request: Request, user_metadata: Optional[UserVideoMetadata]) -> Response:
+        """200 with the body in the best accepted encoding, or 304 if the client's copy is current"""
+        tail = self.user_tail(user_metadata)
+        etag = f"{self.version}-{hashlib.blake2b(tail, digest_size=6).hexdigest()}"
+        headers = {
+            # Private because of the user's fields; revalidated on every load
+            "Cache-Control": "private, no-cache",
+            "Vary": "Accept-Encoding, Authorization",
+        }
+
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        # Each encoding is a different representation, so it gets its own strong tag
+        headers["ETag"] = f'"{etag}"' if encoding == "identity" else f'"{etag}-{encoding}"'
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            tags = [tag for tag in if_none_match.split(",") if tag.strip()]
+            if any(tag.strip() == "*" or _etag_base(tag) == etag for tag in tags):
+                return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(
+            content=self.compressed.body(tail, encoding),
+            media_type="application/json",
+            headers=headers
+        )
+
+
+class VideoBodyCache:
+    """Per-process LRU of serialized and compressed global video bodies
+
+    Entries expire after VIDEO_BODY_CACHE_TTL_SECONDS so a video reprocessed by
+    another worker is picked up; a reprocess in this process drops the entry.
+    """
+
+    def __init__(self):
+        self.ttl_seconds = float(os.getenv("VIDEO_BODY_CACHE_TTL_SECONDS", "300"))
+        self._bodies = LRUCache(int(os.getenv("VIDEO_BODY_CACHE_SIZE", "128")))
+
+    def get(self, video_id: str) -> Optional[VideoBody]:
+        body = self._bodies.get(video_id)
+        if body is not None and time.monotonic() - body.built_at > self.ttl_seconds:
+            self._bodies.pop(video_id)
+            return None
+        return body
+
+    def build(self, global_video: GlobalVideo) -> VideoBody:
+        body = VideoBody(global_video)
+        self._bodies.set(global_video.video_id, body)
+        return body
+
+    def invalidate(self, video_id: str) -> None:
+        self._bodies.pop(video_id)
@@ -1,75 +1,149 @@
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
+import os
 import json
 from fastapi import HTTPException
 from google.cloud.firestore_v1 import FieldFilter
 from google.cloud import firestore
-from ..config.firebase_config import firebase_config
+from ..container import container
+from ..tracing import traced
+from ..storage import project
+from ..utils.serialization import to_primitives, from_storage
 from ..models.video import (
     GlobalVideo, UserVideoReference, VideoLibraryItem, 
     UserVideoMetadata, VideoResponse, VideoInfo, VideoContent, VideoMetadata
 )
 from ..constants import EXAMPLE_VIDEO_IDS
+from .video_projection import LIBRARY_FIELDS, GLOBAL, USER, ID
 
 class VideoDatabase:
-    def __init__(self):
-        self.db = firebase_config.get_firestore()
+    def __init__(self, db=None, cache=None):
+        self.db = db if db is not None else container.firestore()
+        # Every worker on the host reads global videos from here before Firestore
+        self.cache = cache if cache is not None else container.shared_cache()
+        self.global_video_cache_ttl = float(os.getenv("GLOBAL_VIDEO_CACHE_TTL_SECONDS", "3600"))
     
+    def _cache_global_video(self, global_video: GlobalVideo) -> None:
+        self.cache.set("global_videos", global_video.video_id, global_video.model_dump_json(), self.global_video_cache_ttl)
+    
+    def _cached_global_video(self, video_id: str) -> Optional[GlobalVideo]:
+        cached = self.cache.get("global_videos", video_id)
+        return from_storage(GlobalVideo, cached) if cached is not None else None
+    
+    def _bump_cached_access(self, video_id: str) -> None:
+        """Mirror an access update into the cached copy, which trending checks read"""
+        global_video = self._cached_global_video(video_id)
+        if global_video is not None:
+            global_video.metadata.processed_count += 1
+            global_video.metadata.last_accessed = datetime.now()
+            self._cache_global_video(global_video)
 
     
     # Global Videos Collection Operations
+    @traced("video_db.get_global_video")
     async def get_global_video(self, video_id: str) -> Optional[GlobalVideo]:
         """Get video from global videos collection"""
         try:
+            cached = self._cached_global_video(video_id)
+            if cached is not None:
+                return cached
+            
             doc_ref = self.db.collection('videos').document(video_id)
             doc = doc_ref.get()
             
             if doc.exists:
                 data = doc.to_dict()
-                return GlobalVideo(**data)
+                global_video = from_storage(GlobalVideo, data)
+                self._cache_global_video(global_video)
+                return global_video
             return None
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching global video: {str(e)}")
     
+    @traced("video_db.batch_get_global_videos")
     async def batch_get_global_videos(self, video_ids: List[str]) -> Dict[str, GlobalVideo]:
         """Batch fetch multiple videos from global collection - eliminates N+1 query problem"""
         try:
             if not video_ids:
                 return {}
             
+            global_videos = {}
+            missing = []
+            for video_id in video_ids:
+                cached = self._cached_global_video(video_id)
+                if cached is not None:
+                    global_videos[video_id] = cached
+                else:
+                    missing.append(video_id)
+            
             # Firestore has a limit of 10 documents per get_all call, so we batch them
             batch_size = 10
-            global_videos = {}
             
-            for i in range(0, len(video_ids), batch_size):
-                batch_ids = video_ids[i:i + batch_size]
+            for i in range(0, len(missing), batch_size):
+                batch_ids = missing[i:i + batch_size]
                 doc_refs = [self.db.collection('videos').document(video_id) for video_id in batch_ids]
                 docs = self.db.get_all(doc_refs)
                 
                 for doc in docs:
                     if doc.exists:
                         data = doc.to_dict()
-                        global_videos[doc.id] = GlobalVideo(**data)
+                        global_videos[doc.id] = from_storage(GlobalVideo, data)
+                        self._cache_global_video(global_videos[doc.id])
             
             return global_videos
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error batch fetching global videos: {str(e)}")
     
+    @traced("video_db.get_global_video_fields")
+    async def get_global_video_fields(self, video_id: str, field_paths: List[str]) -> Optional[Dict]:
+        """Only the given fields of a global video, None if it doesn't exist"""
+        try:
+            cached = self.cache.get("global_videos", video_id)
+            if cached is not None:
+                return project(json.loads(cached), field_paths)
+            
+            doc = self.db.collection('videos').document(video_id).get(field_paths=field_paths)
+            return doc.to_dict() if doc.exists else None
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching global video: {str(e)}")
+    
+    @traced("video_db.batch_get_global_video_fields")
+    async def batch_get_global_video_fields(self, video_ids: List[str], field_paths: List[str]) -> Dict[str, Dict]:
+        """Only the given fields of several global videos, keyed by video id"""
+        try:
+            results = {}
+            missing = []
+            for video_id in video_ids:
+                cached = self.cache.get("global_videos", video_id)
+                if cached is not None:
+                    results[video_id] = project(json.loads(cached), field_paths)
+                else:
+                    missing.append(video_id)
+            
+            batch_size = 10
+            for i in range(0, len(missing), batch_size):
+                doc_refs = [self.db.collection('videos').document(video_id) for video_id in missing[i:i + batch_size]]
+                for doc in self.db.get_all(doc_refs, field_paths=field_paths):
+                    if doc.exists:
+                        results[doc.id] = doc.to_dict()
+            return results
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error batch fetching global videos: {str(e)}")
+    
+    @traced("video_db.save_global_video")
     async def save_global_video(self, global_video: GlobalVideo) -> bool:
         """Save video to global videos collection"""
         try:
             doc_ref = self.db.collection('videos').document(global_video.video_id)
             
-            # Use Pydantic's json() method to properly serialize, then parse back to dict
-            # This ensures HttpUrl objects are converted to strings
-            video_json = global_video.json()
-            video_data = json.loads(video_json)
-            
-            doc_ref.set(video_data)
+            # HttpUrl and datetime fields are stored as strings
+            doc_ref.set(to_primitives(global_video))
+            self._cache_global_video(global_video)
             return True
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error saving global video: {str(e)}")
     
+    @traced("video_db.update_global_video_access")
     async def update_global_video_access(self, video_id: str) -> bool:
         """Update last accessed time and increment processed count"""
         try:
@@ -78,6 +152,7 @@ class VideoDatabase:
                 'metadata.last_accessed': datetime.now(),
                 'metadata.processed_count': firestore.Increment(1)
             })
+            self._bump_cached_access(video_id)
             return True
         except Exception as e:
             # If increment fails, try to get current count and update
@@ -89,12 +164,14 @@ class VideoDatabase:
                         'metadata.last_accessed': datetime.now(),
                         'metadata.processed_count': current_count + 1
                     })
+                    self._bump_cached_access(video_id)
                     return True
             except:
                 pass
             raise HTTPException(status_code=500, detail=f"Error updating video access: {str(e)}")
     
     # User Library Operations
+    @traced("video_db.add_video_to_user_library")
     async def add_video_to_user_library(self, user_id: str, video_id: str) -> bool:
         """Add video reference to user's library"""
         try:
@@ -112,14 +189,12 @@ class VideoDatabase:
             )
             
             doc_ref = self.db.collection('users').document(user_id).collection('videos').document(video_id)
-            # Use Pydantic's json() method to properly serialize
-            user_json = user_video_ref.json()
-            user_data = json.loads(user_json)
-            doc_ref.set(user_data)
+            doc_ref.set(to_primitives(user_video_ref))
             return True
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error adding video to user library: {str(e)}")
     
+    @traced("video_db.check_video_in_user_library")
     async def check_video_in_user_library(self, user_id: str, video_id: str) -> bool:
         """Check if video exists in user's library"""
         try:
@@ -129,6 +204,7 @@ class VideoDatabase:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error checking user library: {str(e)}")
     
+    @traced("video_db.get_user_video_metadata")
     async def get_user_video_metadata(self, user_id: str, video_id: str) -> Optional[UserVideoMetadata]:
         """Get user's metadata for a specific video"""
         try:
@@ -137,13 +213,28 @@ class VideoDatabase:
             
             if doc.exists:
                 data = doc.to_dict()
-                return UserVideoMetadata(**data.get('user_metadata', {}))
+                return from_storage(UserVideoMetadata, data.get('user_metadata', {}))
             return None
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching user video metadata: {str(e)}")
     
-    async def get_user_library(self, user_id: str, limit: int = 50) -> List[VideoLibraryItem]:
-        """Get user's video library with pagination - optimized with batch fetching"""
+    @traced("video_db.get_user_video_fields")
+    async def get_user_video_fields(self, user_id: str, video_id: str, field_paths: List[str]) -> Optional[Dict]:
+        """Only the given fields of the user's library entry, None if not in the library"""
+        try:
+            doc_ref = self.db.collection('users').document(user_id).collection('videos').document(video_id)
+            doc = doc_ref.get(field_paths=field_paths)
+            return doc.to_dict() if doc.exists else None
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching user video metadata: {str(e)}")
+    
+    @traced("video_db.get_user_library")
+    async def get_user_library(self, user_id: str, limit: int = 50, fields: Optional[List[str]] = None) -> List[Union[VideoLibraryItem, Dict]]:
+        """Get user's video library with pagination - optimized with batch fetching
+        
+        Only the global fields the items need are read, never the video content.
+        With fields (see video_projection.LIBRARY_FIELDS) items are dicts holding just those.
+        """
         try:
             # Step 1: Get all user video metadata (1 query)
             user_videos_ref = self.db.collection('users').document(user_id).collection('videos')
@@ -163,43 +254,58 @@ class VideoDatabase:
             if not video_ids:
                 return []
             
-            # Step 3: Batch fetch all global videos (1-5 queries depending on batch size)
-            global_videos = await self.batch_get_global_videos(video_ids)
+            # Step 3: Batch fetch the needed fields of the global videos (1-5 queries depending on batch size)
+            global_videos = await self.batch_get_global_video_fields(
+                video_ids, LIBRARY_FIELDS.storage_paths(fields, GLOBAL)
+            )
             
             # Step 4: Combine user metadata with global video data (in memory)
             library_items = []
             for video_id in video_ids:  # Maintain original order
-                global_video = global_videos.get(video_id)
+                global_data = global_videos.get(video_id)
                 user_metadata = user_metadata_map.get(video_id, {})
                 
-                if global_video:
-                    library_item = VideoLibraryItem(
-                        video_id=video_id,
-                        title=global_video.info.title,
-                        author=global_video.info.author,
-                        duration=global_video.info.duration,
-                        thumbnail_url=global_video.info.thumbnail_url,
-                        added_at=user_metadata.get('added_at'),
-                        last_watched=user_metadata.get('last_watched'),
-                        progress=user_metadata.get('progress', 0.0),
-                        is_favorite=user_metadata.get('is_favorite', False),
-                        notes=user_metadata.get('notes', "")
-                    )
-                    library_items.append(library_item)
+                if global_data is None:
+                    continue
+                if fields is not None:
+                    library_items.append(LIBRARY_FIELDS.build(fields, {
+                        ID: video_id, GLOBAL: global_data, USER: {'user_metadata': user_metadata}
+                    }))
+                    continue
+                
+                info = global_data.get('info', {})
+                library_item = VideoLibraryItem(
+                    video_id=video_id,
+                    title=info.get('title'),
+                    author=info.get('author'),
+                    duration=info.get('duration'),
+                    thumbnail_url=info.get('thumbnail_url'),
+                    added_at=user_metadata.get('added_at'),
+                    last_watched=user_metadata.get('last_watched'),
+                    progress=user_metadata.get('progress', 0.0),
+                    is_favorite=user_metadata.get('is_favorite', False),
+                    notes=user_metadata.get('notes', "")
+                )
+                library_items.append(library_item)
             
             return library_items
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching user library: {str(e)}")
     
+    @traced("video_db.remove_video_from_user_library")
     async def remove_video_from_user_library(self, user_id: str, video_id: str) -> bool:
         """Remove video reference from user's library"""
         try:
             doc_ref = self.db.collection('users').document(user_id).collection('videos').document(video_id)
-            doc_ref.delete()
+            batch = self.db.batch()
+            batch.delete(doc_ref)
+            batch.delete(self._chat_stats_ref(user_id, video_id))
+            batch.commit()
             return True
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error removing video from user library: {str(e)}")
     
+    @traced("video_db.update_user_video_progress")
     async def update_user_video_progress(self, user_id: str, video_id: str, progress: float) -> bool:
         """Update user's video progress"""
         try:
@@ -212,6 +318,7 @@ class VideoDatabase:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error updating video progress: {str(e)}")
     
+    @traced("video_db.update_user_video_favorite")
     async def update_user_video_favorite(self, user_id: str, video_id: str, is_favorite: bool) -> bool:
         """Update user's video favorite status"""
         try:
@@ -223,6 +330,7 @@ class VideoDatabase:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error updating video favorite: {str(e)}")
     
+    @traced("video_db.update_user_video_notes")
     async def update_user_video_notes(self, user_id: str, video_id: str, notes: str) -> bool:
         """Update user's video notes"""
         try:
@@ -234,6 +342,7 @@ class VideoDatabase:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error updating video notes: {str(e)}")
     
+    @traced("video_db.get_combined_video_response")
     async def get_combined_video_response(self, user_id: str, video_id: str) -> Optional[VideoResponse]:
         """Get combined video response (global video + user metadata)
         
@@ -284,6 +393,7 @@ class VideoDatabase:
             raise HTTPException(status_code=500, detail=f"Error fetching combined video response: {str(e)}")
     
     # Chat History Operations
+    @traced("video_db.get_chat_history")
     async def get_chat_history(self, user_id: str, video_id: str) -> List[Dict]:
         """Get chat history for a specific video"""
         try:
@@ -297,24 +407,146 @@ class VideoDatabase:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching chat history: {str(e)}")
     
+    @traced("video_db.save_chat_message")
     async def save_chat_message(self, user_id: str, video_id: str, message: Dict) -> bool:
         """Add a message to chat history"""
+        return await self.save_chat_messages(user_id, video_id, [message])
+    
+    @traced("video_db.save_chat_messages")
+    async def save_chat_messages(self, user_id: str, video_id: str, messages: List[Dict], tokens_used: int = 0) -> bool:
+        """Append messages to chat history and bump the chat counters in one batch"""
         try:
             doc_ref = self.db.collection('users').document(user_id).collection('videos').document(video_id)
-            doc_ref.update({
-                'chat_history': firestore.ArrayUnion([message])
+            batch = self.db.batch()
+            batch.update(doc_ref, {
+                'chat_history': firestore.ArrayUnion(messages)
             })
+            self._add_chat_counter_updates(batch, user_id, video_id, messages, tokens_used)
+            batch.commit()
             return True
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error saving chat message: {str(e)}")
     
+    @traced("video_db.clear_chat_history")
     async def clear_chat_history(self, user_id: str, video_id: str) -> bool:
         """Clear chat history for a specific video"""
         try:
             doc_ref = self.db.collection('users').document(user_id).collection('videos').document(video_id)
-            doc_ref.update({
+            batch = self.db.batch()
+            batch.update(doc_ref, {
                 'chat_history': []
             })
+            # Conversation counters restart with the history; user totals are lifetime
+            batch.set(self._chat_stats_ref(user_id, video_id), self._empty_chat_stats(video_id))
+            batch.commit()
             return True
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error clearing chat history: {str(e)}") 
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=f"Error clearing chat history: {str(e)}")
+    
+    # Chat Statistics Operations
+    def _chat_stats_ref(self, user_id: str, video_id: str):
+        """Counters for one conversation, kept apart from the (large) history document"""
+        return self.db.collection('users').document(user_id).collection('chat_stats').document(video_id)
+    
+    @staticmethod
+    def _empty_chat_stats(video_id: str) -> Dict:
+        return {
+            'video_id': video_id,
+            'total_messages': 0,
+            'user_messages': 0,
+            'assistant_messages': 0,
+            'total_tokens': 0,
+            'last_activity': None
+        }
+    
+    def _add_chat_counter_updates(self, batch, user_id: str, video_id: str, messages: List[Dict], tokens_used: int):
+        """Queue atomic counter increments for the conversation and the user"""
+        user_count = sum(1 for msg in messages if msg.get('role') == 'user')
+        assistant_count = sum(1 for msg in messages if msg.get('role') == 'assistant')
+        now = datetime.now()
+        counters = {
+            'total_messages': firestore.Increment(len(messages)),
+            'user_messages': firestore.Increment(user_count),
+            'assistant_messages': firestore.Increment(assistant_count),
+            'total_tokens': firestore.Increment(tokens_used),
+            'last_activity': now
+        }
+        batch.set(self._chat_stats_ref(user_id, video_id), {'video_id': video_id, **counters}, merge=True)
+        batch.set(self.db.collection('users').document(user_id), {'chat_stats': counters}, merge=True)
+    
+    @traced("video_db.get_chat_stats")
+    async def get_chat_stats(self, user_id: str, video_id: str) -> Optional[Dict]:
+        """Get chat counters for a conversation, None if the video isn't in the user's library
+        
+        Usually a single document read; the library is only checked when there are no counters yet.
+        """
+        try:
+            doc = self._chat_stats_ref(user_id, video_id).get()
+            if doc.exists:
+                return {**self._empty_chat_stats(video_id), **doc.to_dict()}
+            if await self.check_video_in_user_library(user_id, video_id):
+                return self._empty_chat_stats(video_id)
+            return None
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching chat stats: {str(e)}")
+    
+    @traced("video_db.get_user_chat_stats")
+    async def get_user_chat_stats(self, user_id: str) -> Dict:
+        """Get lifetime chat counters for a user"""
+        try:
+            doc = self.db.collection('users').document(user_id).get(field_paths=['chat_stats'])
+            stats = (doc.to_dict() or {}).get('chat_stats', {}) if doc.exists else {}
+            defaults = self._empty_chat_stats('')
+            defaults.pop('video_id')
+            return {**defaults, **stats}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching user chat stats: {str(e)}")
+    
+    @traced("video_db.backfill_chat_stats")
+    async def backfill_chat_stats(self, user_id: str) -> int:
+        """Recompute chat counters for every conversation of a user from stored history
+        
+        Token usage is not recorded in history, so existing token counts are left untouched.
+        Returns the number of conversations written.
+        """
+        try:
+            user_totals = self._empty_chat_stats('')
+            user_totals.pop('video_id')
+            user_totals.pop('total_tokens')
+            batch = self.db.batch()
+            pending = 0
+            conversations = 0
+            
+            docs = self.db.collection('users').document(user_id).collection('videos').stream()
+            for doc in docs:
+                history = (doc.to_dict() or {}).get('chat_history', [])
+                stats = self._empty_chat_stats(doc.id)
+                stats.pop('total_tokens')
+                stats['total_messages'] = len(history)
+                stats['user_messages'] = sum(1 for msg in history if msg.get('role') == 'user')
+                stats['assistant_messages'] = sum(1 for msg in history if msg.get('role') == 'assistant')
+                timestamps = [msg.get('timestamp') for msg in history if msg.get('timestamp')]
+                if timestamps:
+                    stats['last_activity'] = datetime.fromisoformat(max(timestamps))
+                
+                for key in ('total_messages', 'user_messages', 'assistant_messages'):
+                    user_totals[key] += stats[key]
+                if stats['last_activity'] and (
+                    user_totals['last_activity'] is None or stats['last_activity'] > user_totals['last_activity']
+                ):
+                    user_totals['last_activity'] = stats['last_activity']
+                
+                batch.set(self._chat_stats_ref(user_id, doc.id), stats, merge=True)
+                pending += 1
+                conversations += 1
+                # Firestore batches are limited to 500 writes
+                if pending >= 450:
+                    batch.commit()
+                    batch = self.db.batch()
+                    pending = 0
+            
+            batch.set(self.db.collection('users').document(user_id), {'chat_stats': user_totals}, merge=True)
+            batch.commit()
+            return conversations
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error backfilling chat stats: {str(e)}")
@@ -0,0 +1,122 @@
+from typing import Any, Dict, List, Optional, Tuple, Type
+from fastapi import HTTPException
+from pydantic import BaseModel, TypeAdapter
+from ..models.video import VideoResponse, VideoLibraryItem
+
+GLOBAL = "global"
+USER = "user"
+ID = "id"
+
+_MISSING = object()
+
+
+def _lookup(data: Optional[Dict[str, Any]], field_path: str) -> Any:
+    value: Any = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+class FieldProjection:
+    """Maps ?fields= on a response model to the stored fields it is built from
+
+    Fields are comma separated and may name nested model fields
+    ("info.title,content.summary"). Only the storage fields behind the
+    requested ones are read, and only those values are validated.
+    """
+
+    def __init__(self, model: Type[BaseModel], sources: Dict[str, Tuple[str, Optional[str]]]):
+        # Top-level response field -> (document it is stored in, path in that document)
+        self.model = model
+        self.sources = sources
+        self._adapters: Dict[str, Tuple[TypeAdapter, Any]] = {}
+
+    def _field(self, field: str) -> Optional[Tuple[TypeAdapter, Any]]:
+        """Adapter and default for a (possibly nested) response field, None if unknown"""
+        if field not in self._adapters:
+            model: Any = self.model
+            info = None
+            for part in field.split("."):
+                fields = getattr(model, "model_fields", None) if isinstance(model, type) else None
+                if not fields or part not in fields:
+                    return None
+                info = fields[part]
+                model = info.annotation
+            default = _MISSING if info.is_required() else info.get_default(call_default_factory=True)
+            self._adapters[field] = (TypeAdapter(info.annotation), default)
+        return self._adapters[field]
+
+    def parse(self, fields: Optional[str]) -> Optional[List[str]]:
+        """Requested fields, or None for the whole model; 400 on unknown names"""
+        if fields is None:
+            return None
+        requested = sorted({field.strip() for field in fields.split(",") if field.strip()})
+        if not requested:
+            return None
+        unknown = [field for field in requested
+                   if field.split(".")[0] not in self.sources or self._field(field) is None]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        # "content" already covers "content.summary"
+        return [field for field in requested
+                if not any(field.startswith(other + ".") for other in requested)]
+
+    def storage_paths(self, fields: Optional[List[str]], document: str) -> List[str]:
+        """Field mask for one of the source documents"""
+        paths = []
+        for field in fields if fields is not None else list(self.sources):
+            top, _, rest = field.partition(".")
+            source, path = self.sources[top]
+            if source == document:
+                paths.append(f"{path}.{rest}" if rest else path)
+        return paths
+
+    def build(self, fields: List[str], documents: Dict[str, Any]) -> Dict[str, Any]:
+        """JSON-ready response holding only the requested fields"""
+        result: Dict[str, Any] = {}
+        for field in fields:
+            top, _, rest = field.partition(".")
+            source, path = self.sources[top]
+            adapter, default = self._field(field)
+            if source == ID:
+                raw = documents[ID]
+            else:
+                raw = _lookup(documents.get(source), f"{path}.{rest}" if rest else path)
+            if raw is _MISSING:
+                value = None if default is _MISSING else adapter.dump_python(default, mode="json")
+            else:
+                value = adapter.dump_python(adapter.validate_python(raw), mode="json")
+
+            *parents, leaf = field.split(".")
+            target = result
+            for part in parents:
+                target = target.setdefault(part, {})
+            target[leaf] = value
+        return result
+
+
+VIDEO_FIELDS = FieldProjection(VideoResponse, {
+    "video_id": (ID, None),
+    "info": (GLOBAL, "info"),
+    "content": (GLOBAL, "content"),
+    "created_at": (GLOBAL, "metadata.created_at"),
+    "progress": (USER, "user_metadata.progress"),
+    "last_watched": (USER, "user_metadata.last_watched"),
+    "is_favorite": (USER, "user_metadata.is_favorite"),
+    "notes": (USER, "user_metadata.notes"),
+})
+
+LIBRARY_FIELDS = FieldProjection(VideoLibraryItem, {
+    "video_id": (ID, None),
+    "title": (GLOBAL, "info.title"),
+    "author": (GLOBAL, "info.author"),
+    "duration": (GLOBAL, "info.duration"),
+    "thumbnail_url": (GLOBAL, "info.thumbnail_url"),
+    "added_at": (USER, "user_metadata.added_at"),
+    "last_watched": (USER, "user_metadata.last_watched"),
+    "progress": (USER, "user_metadata.progress"),
+    "is_favorite": (USER, "user_metadata.is_favorite"),
+    "notes": (USER, "user_metadata.notes"),
+})
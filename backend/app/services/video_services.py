@@ -3,12 +3,21 @@ import requests
 import os
 import time
 from datetime import datetime
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 from fastapi import HTTPException
 from dotenv import load_dotenv
 from pydantic import HttpUrl
 from .transcript_services import TranscriptService
 from .video_database_service import VideoDatabase
+from .quiz_statistics import QuizStatisticsStore
+from .review_scheduler import ReviewScheduler
+from .bulk_delete import BulkDeleter
+from .job_manager import job_manager
+from .quiz_prewarm import quiz_prewarmer
+from .video_body_cache import VideoBody, VideoBodyCache
+from .video_projection import VIDEO_FIELDS, GLOBAL, USER, ID
+from ..container import container
+from .. import metrics
 from ..models.video import (
     VideoInfo, VideoContent, VideoResponse, GlobalVideo, 
     VideoMetadata, UserVideoMetadata
@@ -17,11 +26,20 @@ from ..constants import EXAMPLE_VIDEO_IDS
 load_dotenv()
 
 class VideoService:
-    def __init__(self):
+    def __init__(self, video_db: Optional[VideoDatabase] = None,
+                 transcript_service: Optional[TranscriptService] = None,
+                 bulk_deleter: Optional[BulkDeleter] = None):
         self.max_retries = 3
         self.retry_delay = 2
         self.supported_domains = ['youtube.com', 'youtu.be']
-        self.video_db = VideoDatabase()
+        self.video_db = video_db or container.video_db()
+        # Built on the first new video rather than per video or at startup
+        self._transcript_service = transcript_service
+        self.statistics_store = QuizStatisticsStore(self.video_db.db)
+        self.review_scheduler = ReviewScheduler(self.video_db.db)
+        self.bulk_deleter = bulk_deleter or BulkDeleter(self.video_db.db)
+        self.inline_delete_limit = int(os.getenv("BULK_DELETE_INLINE_LIMIT", "200"))
+        self.video_bodies = VideoBodyCache()
     
     @staticmethod
     def is_example_video(video_id: str) -> bool:
@@ -121,19 +139,29 @@ class VideoService:
                 # Update access statistics
                 await self.video_db.update_global_video_access(video_id)
                 
+                # Popular videos get their quiz generated ahead of the first request
+                if not is_in_library:
+                    quiz_prewarmer.enqueue_if_trending(video_id, global_video.metadata.processed_count + 1)
+                
                 # Return combined response
                 return await self.video_db.get_combined_video_response(user_id, video_id)
             
             else:
                 # New video - process it
-                processed_video = await self._process_new_video(video_url)
-                
-                # Save to global collection
-                await self.video_db.save_global_video(processed_video)
+                with metrics.ingestions_in_flight.track():
+                    processed_video = await self._process_new_video(video_url)
+                    
+                    # Save to global collection
+                    with metrics.stage("firestore_save_video"):
+                        await self.video_db.save_global_video(processed_video)
+                    self.video_bodies.invalidate(video_id)
                 
                 # Add to user's library
                 await self.video_db.add_video_to_user_library(user_id, video_id)
                 
+                # Queue low-priority quiz generation while the user reads the content
+                quiz_prewarmer.enqueue(video_id, "new")
+                
                 # Return combined response
                 return await self.video_db.get_combined_video_response(user_id, video_id)
                 
@@ -146,7 +174,8 @@ class VideoService:
         """Process a new video (private method)"""
         try:
             # Get video info
-            video_info_dict = await self.fetch_video_info(video_url)
+            with metrics.stage("youtube_data_api"):
+                video_info_dict = await self.fetch_video_info(video_url)
             video_id = video_info_dict["video_id"]
 
             # Create VideoInfo model
@@ -162,10 +191,11 @@ class VideoService:
                 video_url=video_info_dict["video_url"]
             )
 
-            transcript_service = TranscriptService()
+            transcript_service = self._transcript_service or container.transcript_service()
             
             # Fetch and process transcript
-            transcript = await transcript_service.fetch_transcript(video_id)
+            with metrics.stage("transcript_fetch"):
+                transcript = await transcript_service.fetch_transcript(video_id)
             if not transcript:
                 raise HTTPException(status_code=500, detail="Failed to fetch transcript")
 
@@ -205,17 +235,76 @@ class VideoService:
             raise HTTPException(status_code=500, detail=f"Error processing new video: {str(e)}")
 
     # Library management methods
-    async def get_user_library(self, user_id: str, limit: int = 50):
+    async def get_user_library(self, user_id: str, limit: int = 50, fields: Optional[List[str]] = None):
         """Get user's video library"""
-        return await self.video_db.get_user_library(user_id, limit)
+        return await self.video_db.get_user_library(user_id, limit, fields)
 
     async def get_user_video(self, user_id: str, video_id: str):
         """Get specific video from user's library"""
         return await self.video_db.get_combined_video_response(user_id, video_id)
 
+    async def get_user_video_body(self, user_id: str, video_id: str) -> Optional[Tuple[VideoBody, Optional[UserVideoMetadata]]]:
+        """Cached global body and the user's metadata for a video, for GET /api/videos/{id}
+
+        Same access rule as get_user_video: the video must be in the user's library
+        or be an example video (then the metadata is None).
+        """
+        user_metadata = await self.video_db.get_user_video_metadata(user_id, video_id)
+        if user_metadata is None and not self.is_example_video(video_id):
+            return None
+
+        body = self.video_bodies.get(video_id)
+        if body is None:
+            global_video = await self.video_db.get_global_video(video_id)
+            if not global_video:
+                return None
+            body = self.video_bodies.build(global_video)
+        return body, user_metadata
+
+    async def get_user_video_fields(self, user_id: str, video_id: str, fields: List[str]) -> Optional[Tuple[Dict, bool]]:
+        """Only the requested VideoResponse fields, read with field masks, and whether the video is in the library
+
+        Same access rule as get_user_video.
+        """
+        user_data = await self.video_db.get_user_video_fields(user_id, video_id, VIDEO_FIELDS.storage_paths(fields, USER))
+        if user_data is None and not self.is_example_video(video_id):
+            return None
+
+        global_data = await self.video_db.get_global_video_fields(video_id, VIDEO_FIELDS.storage_paths(fields, GLOBAL))
+        if global_data is None:
+            return None
+        return VIDEO_FIELDS.build(fields, {ID: video_id, GLOBAL: global_data, USER: user_data}), user_data is not None
+
     async def remove_video_from_library(self, user_id: str, video_id: str):
-        """Remove video from user's library"""
-        return await self.video_db.remove_video_from_user_library(user_id, video_id)
+        """Remove video from user's library along with its quiz data
+        
+        Quiz statistics are removed immediately, and so are the video's attempts
+        and review items unless there are too many of them, in which case they are
+        deleted by a background job. The job may run after the user has added the
+        video back and taken quizzes again, so it only deletes attempts submitted
+        before the removal, and keeps the review items if the video is back in the
+        library. Returns the job id, or None if nothing was left for a job.
+        """
+        removed_at = datetime.now()
+        await self.video_db.remove_video_from_user_library(user_id, video_id)
+        self.statistics_store.remove_video(user_id, video_id)
+        
+        attempts = self.statistics_store.attempts_before(user_id, video_id, removed_at)
+        review_items = self.review_scheduler.video_items_query(user_id, video_id)
+        
+        total = attempts.count().get()[0][0].value + review_items.count().get()[0][0].value
+        if total <= self.inline_delete_limit:
+            await self.bulk_deleter.delete_query(attempts)
+            await self.bulk_deleter.delete_query(review_items)
+            return None
+        
+        async def delete_quiz_data(progress):
+            deleted = await self.bulk_deleter.delete_query(attempts, progress)
+            if not await self.video_db.check_video_in_user_library(user_id, video_id):
+                deleted += await self.bulk_deleter.delete_query(review_items, progress)
+            return deleted
+        
+        return job_manager.submit(user_id, 'library_removal', delete_quiz_data, total=total)
 
     async def update_video_progress(self, user_id: str, video_id: str, progress: float):
         """Update user's video progress"""
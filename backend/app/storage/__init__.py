@@ -0,0 +1,4 @@
+from .documents import DocumentStore, MemoryDocumentStore, project
+from .sqlite_store import SQLiteDocumentStore
+
+__all__ = ["DocumentStore", "MemoryDocumentStore", "SQLiteDocumentStore", "project"]
@@ -0,0 +1,594 @@
+"""Firestore-compatible document API over pluggable storage backends.
+
+The services use a subset of the google-cloud-firestore client: collection and
+document references, queries with filters, ordering, limits and count(),
+get_all, batches, transactions, BulkWriter, recursive_delete and the field
+transforms (Increment, ArrayUnion, SERVER_TIMESTAMP, ...). DocumentStore
+implements that surface once on top of a few primitives, so a backend only
+provides read_many, run_query, count, commit and the path listings.
+"""
+import copy
+import time
+import string
+import secrets
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore_v1 import transforms
+
+from .. import metrics, tracing
+from ..container import metrics_enabled
+
+# (kind, document path, data, merge) with kind one of "set", "update", "delete"
+Write = Tuple[str, str, Optional[Dict[str, Any]], bool]
+
+_AUTO_ID_ALPHABET = string.ascii_letters + string.digits
+
+
+def split_path(path: str) -> Tuple[str, str]:
+    """Document path -> (collection path, document id)"""
+    collection, _, doc_id = path.rpartition("/")
+    return collection, doc_id
+
+
+def get_field(data: Optional[Dict[str, Any]], field_path: str) -> Any:
+    value: Any = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def project(data: Optional[Dict[str, Any]], field_paths: Sequence[str]) -> Optional[Dict[str, Any]]:
+    """Copy of a document holding only the given field paths, like a Firestore field mask"""
+    if data is None:
+        return None
+    result: Dict[str, Any] = {}
+    for field_path in field_paths:
+        value: Any = data
+        parts = field_path.split(".")
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = result
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = copy.deepcopy(value)
+    return result
+
+
+def _resolve(current: Any, value: Any) -> Any:
+    """Apply a field transform or sentinel to the field's current value"""
+    if value is transforms.SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc)
+    if isinstance(value, transforms.Increment):
+        return (current if isinstance(current, (int, float)) else 0) + value.value
+    if isinstance(value, transforms.Maximum):
+        return value.value if not isinstance(current, (int, float)) else max(current, value.value)
+    if isinstance(value, transforms.Minimum):
+        return value.value if not isinstance(current, (int, float)) else min(current, value.value)
+    if isinstance(value, transforms.ArrayUnion):
+        result = list(current) if isinstance(current, list) else []
+        result.extend(copy.deepcopy(item) for item in value.values if item not in result)
+        return result
+    if isinstance(value, transforms.ArrayRemove):
+        return [item for item in (current or []) if item not in value.values]
+    if isinstance(value, dict):
+        base = current if isinstance(current, dict) else {}
+        return {key: _resolve(base.get(key), item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_resolve(None, item) for item in value]
+    return value
+
+
+def _merge(target: Dict[str, Any], data: Dict[str, Any]) -> None:
+    for key, value in data.items():
+        if value is transforms.DELETE_FIELD:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = _resolve(target.get(key), value)
+
+
+def _set_field(target: Dict[str, Any], field_path: str, value: Any) -> None:
+    *parents, leaf = field_path.split(".")
+    for part in parents:
+        if not isinstance(target.get(part), dict):
+            target[part] = {}
+        target = target[part]
+    if value is transforms.DELETE_FIELD:
+        target.pop(leaf, None)
+    else:
+        target[leaf] = _resolve(target.get(leaf), value)
+
+
+def apply_write(document: Optional[Dict[str, Any]], write: Write) -> Optional[Dict[str, Any]]:
+    """New contents of a document after a write; None means deleted
+
+    The stored document is never modified in place.
+    """
+    kind, path, data, merge = write
+    if kind == "delete":
+        return None
+    if kind == "update":
+        if document is None:
+            raise NotFound(f"No document to update: {path}")
+        updated = copy.deepcopy(document)
+        for field_path, value in data.items():
+            _set_field(updated, field_path, value)
+        return updated
+    updated = copy.deepcopy(document) if merge and document is not None else {}
+    _merge(updated, data)
+    return updated
+
+
+def _compare(actual: Any, op: str, expected: Any) -> bool:
+    try:
+        if op == "==":
+            return actual == expected
+        if op == "array_contains":
+            return isinstance(actual, list) and expected in actual
+        if op == "array_contains_any":
+            return isinstance(actual, list) and any(item in actual for item in expected)
+        # Documents without the field never match the remaining operators
+        if actual is None:
+            return False
+        if op == "!=":
+            return actual != expected
+        if op == "in":
+            return actual in expected
+        if op == "not-in":
+            return actual not in expected
+        return {"<": actual < expected, "<=": actual <= expected,
+                ">": actual > expected, ">=": actual >= expected}[op]
+    except TypeError:
+        return False
+
+
+def match_documents(documents: Sequence[Tuple[str, Dict[str, Any]]], query: "Query") -> List[Tuple[str, Dict[str, Any]]]:
+    """Evaluate a query's filters, ordering and limit in Python"""
+    results = [
+        (doc_id, data) for doc_id, data in documents
+        if all(_compare(get_field(data, field), op, value) for field, op, value in query._filters)
+    ]
+    # Firestore leaves out documents missing an order_by field and breaks ties by id
+    for field, _ in query._orders:
+        results = [item for item in results if get_field(item[1], field) is not None]
+    results.sort(key=lambda item: item[0])
+    for field, descending in reversed(query._orders):
+        results.sort(key=lambda item: get_field(item[1], field), reverse=descending)
+    if query._limit is not None:
+        results = results[:query._limit]
+    return results
+
+
+class DocumentSnapshot:
+    __slots__ = ("reference", "id", "_data")
+
+    def __init__(self, reference: "DocumentReference", data: Optional[Dict[str, Any]]):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        # Backends hand every snapshot its own copy of the data
+        return self._data
+
+    def get(self, field_path: str) -> Any:
+        return get_field(self._data, field_path)
+
+
+class DocumentReference:
+    def __init__(self, store: "DocumentStore", path: str):
+        self._store = store
+        self.path = path
+        self.id = split_path(path)[1]
+
+    @property
+    def parent(self) -> "CollectionReference":
+        return CollectionReference(self._store, split_path(self.path)[0])
+
+    def collection(self, name: str) -> "CollectionReference":
+        return CollectionReference(self._store, f"{self.path}/{name}")
+
+    def get(self, field_paths=None, transaction=None, **kwargs) -> DocumentSnapshot:
+        with self._store.rpc("get_document"):
+            return DocumentSnapshot(self, self._store.read_many([self.path], field_paths)[0])
+
+    def set(self, document_data: Dict[str, Any], merge: bool = False):
+        self._store.write([("set", self.path, document_data, merge)])
+
+    def create(self, document_data: Dict[str, Any]):
+        self.set(document_data)
+
+    def update(self, field_updates: Dict[str, Any]):
+        self._store.write([("update", self.path, field_updates, False)])
+
+    def delete(self):
+        self._store.write([("delete", self.path, None, False)])
+
+    def __eq__(self, other):
+        return isinstance(other, DocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+
+class AggregationQuery:
+    def __init__(self, query: "Query", alias: Optional[str]):
+        self._query = query
+        self._alias = alias or "field_1"
+
+    def get(self, transaction=None, **kwargs):
+        with self._query._store.rpc("run_aggregation_query"):
+            count = self._query._store.count(self._query)
+        return [[SimpleNamespace(alias=self._alias, value=count)]]
+
+
+class Query:
+    def __init__(self, store: "DocumentStore", path: str, filters=(), orders=(), limit=None):
+        self._store = store
+        self._path = path
+        # (field path, operator, value) and (field path, descending)
+        self._filters: Tuple[Tuple[str, str, Any], ...] = tuple(filters)
+        self._orders: Tuple[Tuple[str, bool], ...] = tuple(orders)
+        self._limit: Optional[int] = limit
+
+    def _copy(self, **changes) -> "Query":
+        state = {"filters": self._filters, "orders": self._orders, "limit": self._limit}
+        state.update(changes)
+        return Query(self._store, self._path, **state)
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None,
+              value: Any = None, *, filter=None) -> "Query":
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING") -> "Query":
+        descending = str(direction).upper().startswith("DESC")
+        return self._copy(orders=self._orders + ((field_path, descending),))
+
+    def limit(self, count: int) -> "Query":
+        return self._copy(limit=count)
+
+    def select(self, field_paths) -> "Query":
+        # Whole documents are returned; projection only saves bandwidth on Firestore
+        return self
+
+    def count(self, alias: Optional[str] = None) -> AggregationQuery:
+        return AggregationQuery(self, alias)
+
+    def stream(self, transaction=None, **kwargs) -> Iterator[DocumentSnapshot]:
+        with self._store.rpc("run_query"):
+            results = self._store.run_query(self)
+        return iter([
+            DocumentSnapshot(DocumentReference(self._store, f"{self._path}/{doc_id}"), data)
+            for doc_id, data in results
+        ])
+
+    def get(self, transaction=None, **kwargs) -> List[DocumentSnapshot]:
+        return list(self.stream(transaction))
+
+
+class CollectionReference(Query):
+    def __init__(self, store: "DocumentStore", path: str):
+        super().__init__(store, path)
+        self.id = path.rpartition("/")[2]
+
+    def document(self, document_id: Optional[str] = None) -> DocumentReference:
+        if not document_id:
+            document_id = "".join(secrets.choice(_AUTO_ID_ALPHABET) for _ in range(20))
+        return DocumentReference(self._store, f"{self._path}/{document_id}")
+
+    def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None):
+        reference = self.document(document_id)
+        reference.set(document_data)
+        return datetime.now(timezone.utc), reference
+
+    def list_documents(self, page_size: Optional[int] = None) -> Iterator[DocumentReference]:
+        with self._store.rpc("list_documents"):
+            ids = self._store.list_document_ids(self._path)
+        return iter([DocumentReference(self._store, f"{self._path}/{doc_id}") for doc_id in ids])
+
+
+class WriteBatch:
+    def __init__(self, store: "DocumentStore"):
+        self._store = store
+        self._writes: List[Write] = []
+
+    def set(self, reference: DocumentReference, document_data: Dict[str, Any], merge: bool = False):
+        self._writes.append(("set", reference.path, document_data, merge))
+
+    def create(self, reference: DocumentReference, document_data: Dict[str, Any]):
+        self.set(reference, document_data)
+
+    def update(self, reference: DocumentReference, field_updates: Dict[str, Any]):
+        self._writes.append(("update", reference.path, field_updates, False))
+
+    def delete(self, reference: DocumentReference):
+        self._writes.append(("delete", reference.path, None, False))
+
+    def __len__(self):
+        return len(self._writes)
+
+    def commit(self, **kwargs):
+        writes, self._writes = self._writes, []
+        if writes:
+            self._store.write(writes)
+        return [SimpleNamespace(update_time=datetime.now(timezone.utc)) for _ in writes]
+
+
+class Transaction(WriteBatch):
+    """Enough of firestore.Transaction for the @firestore.transactional decorator"""
+
+    _read_only = False
+    _max_attempts = 1
+
+    def __init__(self, store: "DocumentStore"):
+        super().__init__(store)
+        self._id = None
+
+    def _clean_up(self):
+        self._writes = []
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        with self._store.rpc("begin_transaction"):
+            self._store.begin_transaction()
+        self._id = secrets.token_bytes(8)
+
+    def _commit(self):
+        writes, self._writes = self._writes, []
+        with self._store.rpc("commit"):
+            self._store.commit_transaction(writes)
+        self._id = None
+        return []
+
+    def _rollback(self):
+        self._writes = []
+        if self._id is not None:
+            self._store.rollback_transaction()
+        self._id = None
+
+
+class BulkWriter:
+    """Buffers writes and commits them in batches, reporting each through on_write_result"""
+
+    BATCH_SIZE = 20
+
+    def __init__(self, store: "DocumentStore"):
+        self._store = store
+        self._pending: List[Tuple[Write, DocumentReference]] = []
+        self._on_write_result = None
+
+    def on_write_result(self, callback):
+        self._on_write_result = callback
+
+    def _add(self, write: Write, reference: DocumentReference):
+        self._pending.append((write, reference))
+        if len(self._pending) >= self.BATCH_SIZE:
+            self.flush()
+
+    def set(self, reference: DocumentReference, document_data: Dict[str, Any], merge: bool = False):
+        self._add(("set", reference.path, document_data, merge), reference)
+
+    def update(self, reference: DocumentReference, field_updates: Dict[str, Any]):
+        self._add(("update", reference.path, field_updates, False), reference)
+
+    def delete(self, reference: DocumentReference, **kwargs):
+        self._add(("delete", reference.path, None, False), reference)
+
+    def flush(self):
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        with self._store.rpc("batch_write"):
+            self._store.commit([write for write, _ in pending])
+        if self._on_write_result:
+            result = SimpleNamespace(update_time=datetime.now(timezone.utc))
+            for _, reference in pending:
+                self._on_write_result(reference, result, self)
+
+    def close(self):
+        self.flush()
+
+
+class DocumentStore(ABC):
+    """Client API shared by the storage backends
+
+    Calls are counted and traced as Firestore RPCs, so /metrics, traces and the
+    load benchmark read the same on every backend.
+    """
+
+    def __init__(self):
+        self._instrumented = metrics_enabled()
+
+    @contextmanager
+    def rpc(self, method: str):
+        if not self._instrumented:
+            yield
+            return
+        metrics.firestore_rpcs.inc(method)
+        metrics.count_call("firestore")
+        started = time.perf_counter()
+        try:
+            with tracing.span(f"firestore.{method}"):
+                yield
+        finally:
+            metrics.firestore_latency.observe(time.perf_counter() - started, method)
+
+    # Client API
+
+    def collection(self, path: str) -> CollectionReference:
+        return CollectionReference(self, path)
+
+    def document(self, path: str) -> DocumentReference:
+        return DocumentReference(self, path)
+
+    def get_all(self, references, field_paths=None, transaction=None, **kwargs) -> Iterator[DocumentSnapshot]:
+        references = list(references)
+        with self.rpc("batch_get_documents"):
+            documents = self.read_many([reference.path for reference in references], field_paths)
+        return iter([DocumentSnapshot(reference, data) for reference, data in zip(references, documents)])
+
+    def batch(self) -> WriteBatch:
+        return WriteBatch(self)
+
+    def transaction(self, **kwargs) -> Transaction:
+        return Transaction(self)
+
+    def bulk_writer(self, options=None) -> BulkWriter:
+        return BulkWriter(self)
+
+    def recursive_delete(self, reference, *, bulk_writer: Optional[BulkWriter] = None, chunk_size: int = 5000) -> int:
+        writer = bulk_writer or self.bulk_writer()
+        is_document = isinstance(reference, DocumentReference)
+        path = reference.path if is_document else reference._path
+        with self.rpc("run_query"):
+            targets = self.descendant_paths(path)
+            if is_document and self.read_many([path])[0] is not None:
+                targets.append(path)
+        for target in targets:
+            writer.delete(DocumentReference(self, target))
+        writer.close()
+        return len(targets)
+
+    def write(self, writes: List[Write]) -> None:
+        with self.rpc("commit"):
+            self.commit(writes)
+
+    def close(self) -> None:
+        pass
+
+    # Backend primitives
+
+    @abstractmethod
+    def read_many(self, paths: List[str], field_paths: Optional[Sequence[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        """Documents at the given paths, None for missing ones; the caller owns the dicts
+
+        With field_paths only those fields are read, as with a Firestore field mask.
+        """
+
+    @abstractmethod
+    def run_query(self, query: Query) -> List[Tuple[str, Dict[str, Any]]]:
+        """(document id, data) pairs matching the query, in order"""
+
+    @abstractmethod
+    def count(self, query: Query) -> int:
+        ...
+
+    @abstractmethod
+    def commit(self, writes: List[Write]) -> None:
+        """Apply the writes atomically, resolving field transforms"""
+
+    @abstractmethod
+    def list_document_ids(self, collection_path: str) -> List[str]:
+        """Ids of documents in a collection, including ones that only have subcollections"""
+
+    @abstractmethod
+    def descendant_paths(self, path: str) -> List[str]:
+        """Paths of every document beneath a document or collection path"""
+
+    def begin_transaction(self) -> None:
+        pass
+
+    def commit_transaction(self, writes: List[Write]) -> None:
+        self.commit(writes)
+
+    def rollback_transaction(self) -> None:
+        pass
+
+
+class MemoryDocumentStore(DocumentStore):
+    """Process-local store for development and benchmarks; nothing is persisted"""
+
+    def __init__(self):
+        super().__init__()
+        # collection path -> {document id: data}
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # Held from begin_transaction to commit/rollback for isolation
+        self._lock = threading.RLock()
+
+    def read_many(self, paths: List[str], field_paths: Optional[Sequence[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        with self._lock:
+            if field_paths is not None:
+                return [project(self._read(path), field_paths) for path in paths]
+            return [copy.deepcopy(self._read(path)) for path in paths]
+
+    def _read(self, path: str) -> Optional[Dict[str, Any]]:
+        collection, doc_id = split_path(path)
+        return self._collections.get(collection, {}).get(doc_id)
+
+    def run_query(self, query: Query) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            documents = list(self._collections.get(query._path, {}).items())
+        return [(doc_id, copy.deepcopy(data)) for doc_id, data in match_documents(documents, query)]
+
+    def count(self, query: Query) -> int:
+        with self._lock:
+            documents = list(self._collections.get(query._path, {}).items())
+        return len(match_documents(documents, query))
+
+    def commit(self, writes: List[Write]) -> None:
+        with self._lock:
+            updated: Dict[str, Optional[Dict[str, Any]]] = {}
+            for write in writes:
+                path = write[1]
+                current = updated[path] if path in updated else self._read(path)
+                updated[path] = apply_write(current, write)
+            for path, document in updated.items():
+                collection, doc_id = split_path(path)
+                if document is None:
+                    documents = self._collections.get(collection, {})
+                    documents.pop(doc_id, None)
+                    if not documents:
+                        self._collections.pop(collection, None)
+                else:
+                    self._collections.setdefault(collection, {})[doc_id] = document
+
+    def list_document_ids(self, collection_path: str) -> List[str]:
+        prefix = collection_path + "/"
+        with self._lock:
+            ids = set(self._collections.get(collection_path, {}))
+            ids.update(path[len(prefix):].split("/", 1)[0] for path in self._collections if path.startswith(prefix))
+        return sorted(ids)
+
+    def descendant_paths(self, path: str) -> List[str]:
+        prefix = path + "/"
+        with self._lock:
+            return [
+                f"{collection}/{doc_id}"
+                for collection, documents in self._collections.items()
+                if collection == path or collection.startswith(prefix)
+                for doc_id in documents
+            ]
+
+    def begin_transaction(self) -> None:
+        self._lock.acquire()
+
+    def commit_transaction(self, writes: List[Write]) -> None:
+        try:
+            self.commit(writes)
+        finally:
+            self._lock.release()
+
+    def rollback_transaction(self) -> None:
+        self._lock.release()
+
+    def document_count(self) -> int:
+        with self._lock:
+            return sum(len(documents) for documents in self._collections.values())
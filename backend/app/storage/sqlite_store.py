@@ -0,0 +1,288 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .documents import DocumentStore, Query, Write, apply_write, split_path
+
+# Datetimes are stored as fixed-width UTC strings behind this marker, so they
+# round-trip as datetimes and still compare and sort correctly inside SQLite
+_DATETIME_MARKER = "\x1fdt:"
+_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    parent TEXT NOT NULL,
+    id TEXT NOT NULL,
+    collection_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (parent, id)
+) WITHOUT ROWID;
+
+-- Queries the services run, see review_scheduler, quiz_service and video_database_service
+CREATE INDEX IF NOT EXISTS idx_review_items_due ON documents (parent, json_extract(data, '$.due_at'))
+    WHERE collection_id = 'review_items';
+CREATE INDEX IF NOT EXISTS idx_review_items_video ON documents (parent, json_extract(data, '$.video_id'))
+    WHERE collection_id = 'review_items';
+CREATE INDEX IF NOT EXISTS idx_attempts_timestamp ON documents (parent, json_extract(data, '$.timestamp'))
+    WHERE collection_id = 'attempts';
+CREATE INDEX IF NOT EXISTS idx_library_added_at ON documents (parent, json_extract(data, '$.user_metadata.added_at'))
+    WHERE collection_id = 'videos';
+CREATE INDEX IF NOT EXISTS idx_videos_processed_count ON documents (json_extract(data, '$.metadata.processed_count'))
+    WHERE parent = 'videos';
+"""
+
+_OPERATORS = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return _encode_datetime(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not storable")
+
+
+def _encode_datetime(value: datetime) -> str:
+    # Naive datetimes are taken as UTC, as the Firestore client does
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return _DATETIME_MARKER + value.astimezone(timezone.utc).strftime(_DATETIME_FORMAT)
+
+
+def _encode_value(value: Any) -> Any:
+    """Query parameter in the form stored documents use"""
+    if isinstance(value, datetime):
+        return _encode_datetime(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_encode_default)
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, str):
+        if value.startswith(_DATETIME_MARKER):
+            return datetime.strptime(value[len(_DATETIME_MARKER):], _DATETIME_FORMAT).replace(tzinfo=timezone.utc)
+        return value
+    if isinstance(value, dict):
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+def _json_path(field_path: str) -> str:
+    parts = []
+    for part in field_path.split("."):
+        # Plain identifiers stay unquoted so the expressions match the indexes above
+        parts.append(part if part.isidentifier() else '"' + part.replace('"', '\\"') + '"')
+    return "$." + ".".join(parts)
+
+
+def _sql_json_path(field_path: str) -> str:
+    return "'" + _json_path(field_path).replace("'", "''") + "'"
+
+
+def _field_expression(field_path: str) -> str:
+    return f"json_extract(data, {_sql_json_path(field_path)})"
+
+
+class SQLiteDocumentStore(DocumentStore):
+    """Documents in a local SQLite database in WAL mode
+
+    Each document is one row holding its JSON, keyed by (collection path, id).
+    Filters and ordering run in SQL on json_extract, with expression indexes for
+    the queries the services issue. Every thread gets its own connection; WAL
+    lets readers proceed while a write is committing, also across processes.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit mode; writes open their own BEGIN IMMEDIATE transactions
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.in_transaction = False
+        return connection
+
+    @staticmethod
+    def _load(data: str) -> Dict[str, Any]:
+        return _decode(json.loads(data))
+
+    def read_many(self, paths: List[str], field_paths: Optional[Sequence[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        if not paths:
+            return []
+        keys = [split_path(path) for path in paths]
+        where = "(parent, id) IN (VALUES " + ",".join("(?, ?)" for _ in keys) + ")"
+        params = [value for key in keys for value in key]
+        if field_paths is not None:
+            return self._read_fields(keys, where, params, list(field_paths))
+        rows = self._connection().execute(f"SELECT parent, id, data FROM documents WHERE {where}", params).fetchall()
+        found = {(parent, doc_id): data for parent, doc_id, data in rows}
+        return [self._load(found[key]) if key in found else None for key in keys]
+
+    def _read_fields(self, keys: List[Tuple[str, str]], where: str, params: List[Any],
+                     field_paths: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Extract only the masked fields in SQL, so the rest of the JSON is never decoded"""
+        columns = "".join(
+            f", json_type(data, {_sql_json_path(field_path)}), json_extract(data, {_sql_json_path(field_path)})"
+            for field_path in field_paths
+        )
+        rows = self._connection().execute(f"SELECT parent, id{columns} FROM documents WHERE {where}", params).fetchall()
+        found = {}
+        for row in rows:
+            document: Dict[str, Any] = {}
+            for index, field_path in enumerate(field_paths):
+                kind, value = row[2 + 2 * index], row[3 + 2 * index]
+                if kind is None:
+                    continue
+                if kind in ("object", "array"):
+                    value = json.loads(value)
+                elif kind in ("true", "false"):
+                    value = kind == "true"
+                *parents, leaf = field_path.split(".")
+                target = document
+                for part in parents:
+                    target = target.setdefault(part, {})
+                target[leaf] = _decode(value)
+            found[(row[0], row[1])] = document
+        return [found.get(key) for key in keys]
+
+    def _where(self, query: Query) -> Tuple[str, List[Any]]:
+        clauses = ["parent = ?", "collection_id = ?"]
+        params: List[Any] = [query._path, query._path.rpartition("/")[2]]
+        for field_path, op, value in query._filters:
+            expression = _field_expression(field_path)
+            if op in ("in", "not-in"):
+                values = [_encode_value(item) for item in value]
+                clauses.append(f"{expression} {'NOT IN' if op == 'not-in' else 'IN'} ({','.join('?' for _ in values)})")
+                params.extend(values)
+            elif op in ("array_contains", "array_contains_any"):
+                values = [value] if op == "array_contains" else list(value)
+                clauses.append(
+                    f"EXISTS (SELECT 1 FROM json_each(data, {_sql_json_path(field_path)}) "
+                    f"WHERE json_each.value IN ({','.join('?' for _ in values)}))"
+                )
+                params.extend(_encode_value(item) for item in values)
+            elif op == "==" and value is None:
+                clauses.append(f"json_type(data, {_sql_json_path(field_path)}) = 'null'")
+            else:
+                clauses.append(f"{expression} {_OPERATORS[op]} ?")
+                params.append(_encode_value(value))
+        # As in Firestore, ordering on a field leaves out documents without it
+        for field_path, _ in query._orders:
+            clauses.append(f"{_field_expression(field_path)} IS NOT NULL")
+        return " AND ".join(clauses), params
+
+    def run_query(self, query: Query) -> List[Tuple[str, Dict[str, Any]]]:
+        where, params = self._where(query)
+        order = ", ".join(
+            f"{_field_expression(field_path)} {'DESC' if descending else 'ASC'}"
+            for field_path, descending in query._orders
+        )
+        sql = f"SELECT id, data FROM documents WHERE {where} ORDER BY {order + ', ' if order else ''}id"
+        if query._limit is not None:
+            sql += " LIMIT ?"
+            params.append(query._limit)
+        rows = self._connection().execute(sql, params).fetchall()
+        return [(doc_id, self._load(data)) for doc_id, data in rows]
+
+    def count(self, query: Query) -> int:
+        where, params = self._where(query)
+        sql = f"SELECT 1 FROM documents WHERE {where}"
+        if query._limit is not None:
+            sql += " LIMIT ?"
+            params.append(query._limit)
+        return self._connection().execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
+
+    def _apply(self, connection: sqlite3.Connection, writes: List[Write]) -> None:
+        updated: Dict[str, Optional[Dict[str, Any]]] = {}
+        for write in writes:
+            path = write[1]
+            if path not in updated:
+                updated[path] = None
+                # A plain set or delete does not depend on the current contents
+                if write[0] == "update" or write[3]:
+                    row = connection.execute(
+                        "SELECT data FROM documents WHERE parent = ? AND id = ?", split_path(path)
+                    ).fetchone()
+                    updated[path] = self._load(row[0]) if row else None
+            updated[path] = apply_write(updated[path], write)
+
+        for path, document in updated.items():
+            parent, doc_id = split_path(path)
+            if document is None:
+                connection.execute("DELETE FROM documents WHERE parent = ? AND id = ?", (parent, doc_id))
+            else:
+                connection.execute(
+                    "INSERT INTO documents (parent, id, collection_id, data) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (parent, id) DO UPDATE SET data = excluded.data",
+                    (parent, doc_id, parent.rpartition("/")[2],
+                     json.dumps(document, default=_encode_default, separators=(",", ":"))),
+                )
+
+    def commit(self, writes: List[Write]) -> None:
+        connection = self._connection()
+        if self._local.in_transaction:
+            self._apply(connection, writes)
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._apply(connection, writes)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def list_document_ids(self, collection_path: str) -> List[str]:
+        connection = self._connection()
+        ids = {row[0] for row in connection.execute("SELECT id FROM documents WHERE parent = ?", (collection_path,))}
+        # Documents that only exist as the parent of a subcollection
+        prefix = collection_path + "/"
+        for (parent,) in connection.execute(
+            "SELECT DISTINCT parent FROM documents WHERE parent >= ? AND parent < ?",
+            (prefix, collection_path + "0"),
+        ):
+            ids.add(parent[len(prefix):].split("/", 1)[0])
+        return sorted(ids)
+
+    def descendant_paths(self, path: str) -> List[str]:
+        # "0" sorts right after "/", so the range covers every path under the prefix
+        rows = self._connection().execute(
+            "SELECT parent, id FROM documents WHERE parent = ? OR (parent >= ? AND parent < ?)",
+            (path, path + "/", path + "0"),
+        ).fetchall()
+        return [f"{parent}/{doc_id}" for parent, doc_id in rows]
+
+    def begin_transaction(self) -> None:
+        # Takes the write lock up front so reads inside the transaction are isolated
+        self._connection().execute("BEGIN IMMEDIATE")
+        self._local.in_transaction = True
+
+    def commit_transaction(self, writes: List[Write]) -> None:
+        connection = self._connection()
+        try:
+            self._apply(connection, writes)
+        except BaseException:
+            self.rollback_transaction()
+            raise
+        connection.execute("COMMIT")
+        self._local.in_transaction = False
+
+    def rollback_transaction(self) -> None:
+        if self._local.in_transaction:
+            self._connection().execute("ROLLBACK")
+            self._local.in_transaction = False
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
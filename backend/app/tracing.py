@@ -0,0 +1,383 @@
+"""Lightweight request tracing with spans kept in an in-memory ring buffer.
+
+TracingMiddleware opens a root span per HTTP request and the current span is
+kept in a context variable, so spans opened by services (and in worker threads
+started with asyncio.to_thread) attach to the right request. Finished traces go
+into a bounded buffer; the slowest are served by the admin debug endpoints and,
+if TRACE_EXPORT_PATH is set, every trace is appended there as an OTLP/JSON line.
+"""
+import os
+import json
+import time
+import asyncio
+import secrets
+import threading
+import contextvars
+import functools
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, List, Optional
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "children",
+                 "started", "ended", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent: Optional["Span"] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.attributes = attributes or {}
+        self.children: List["Span"] = []
+        self.started = time.perf_counter()
+        self.ended: Optional[float] = None
+        self.error: Optional[str] = None
+        if parent is not None:
+            # list.append is atomic, so spans finished in worker threads are safe
+            parent.children.append(self)
+
+    @property
+    def duration_ms(self) -> float:
+        ended = self.ended if self.ended is not None else time.perf_counter()
+        return (ended - self.started) * 1000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if self.ended is None:
+            self.ended = time.perf_counter()
+            if error is not None:
+                self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "start_ms": round((self.started - self.trace.root.started) * 1000, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+class Trace:
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = secrets.token_hex(16)
+        self.start_time_ns = time.time_ns()
+        self.max_spans = int(os.getenv("TRACE_MAX_SPANS", "500"))
+        self.span_count = 1
+        self.dropped_spans = 0
+        self.root = Span(self, name, attributes=attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        return self.root.duration_ms
+
+    def start_span(self, name: str, parent: Span, attributes: Optional[Dict[str, Any]] = None) -> Optional[Span]:
+        # Bound memory for requests that fan out into many calls
+        if self.span_count >= self.max_spans:
+            self.dropped_spans += 1
+            return None
+        self.span_count += 1
+        return Span(self, name, parent, attributes)
+
+    def walk(self):
+        stack = [self.root]
+        while stack:
+            span = stack.pop()
+            yield span
+            stack.extend(reversed(span.children))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "status_code": self.root.attributes.get("http.status_code"),
+            "started_at": self.start_time_ns // 1_000_000,
+            "duration_ms": round(self.duration_ms, 3),
+            "span_count": self.span_count,
+            "dropped_spans": self.dropped_spans,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self.summary(), "root": self.root.to_dict()}
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("trace_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Record a child span of the current one; a no-op outside a traced request"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.trace.start_span(name, parent, attributes)
+    if child is None:
+        yield None
+        return
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.finish(e)
+        raise
+    finally:
+        child.finish()
+        _current_span.reset(token)
+
+
+def traced(name: str):
+    """Decorator wrapping every call of an async or sync function in a span"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TraceBuffer:
+    """Ring buffer of the most recent finished traces"""
+
+    def __init__(self, size: int):
+        self._traces: Deque[Trace] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace) -> None:
+        with self._lock:
+            self._traces.append(trace)
+
+    def slowest(self, limit: int = 20, name: Optional[str] = None) -> List[Trace]:
+        with self._lock:
+            traces = list(self._traces)
+        if name:
+            traces = [trace for trace in traces if name in trace.root.name]
+        return sorted(traces, key=lambda trace: trace.duration_ms, reverse=True)[:limit]
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            for trace in self._traces:
+                if trace.trace_id == trace_id:
+                    return trace
+        return None
+
+    def __len__(self) -> int:
+        return len(self._traces)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPFileExporter:
+    """Append traces as OTLP/JSON ExportTraceServiceRequest lines, one per trace"""
+
+    def __init__(self, path: str, service_name: str = "mercurious_ai_api"):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def _otlp_span(self, span: Span, trace: Trace) -> Dict[str, Any]:
+        start_ns = trace.start_time_ns + int((span.started - trace.root.started) * 1e9)
+        ended = span.ended if span.ended is not None else span.started
+        otlp_span = {
+            "traceId": trace.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 2 if span.parent_id is None else 1,  # SERVER for the root, INTERNAL otherwise
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(start_ns + int((ended - span.started) * 1e9)),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        return otlp_span
+
+    def export(self, trace: Trace) -> None:
+        record = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{
+                    "scope": {"name": "app.tracing"},
+                    "spans": [self._otlp_span(span, trace) for span in trace.walk()],
+                }],
+            }]
+        }
+        line = json.dumps(record, default=str)
+        try:
+            with self._lock, open(self.path, "a") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print(f"Failed to export trace {trace.trace_id}: {e}")
+
+
+trace_buffer = TraceBuffer(int(os.getenv("TRACE_BUFFER_SIZE", "500")))
+_export_path = os.getenv("TRACE_EXPORT_PATH")
+trace_exporter = OTLPFileExporter(_export_path) if _export_path else None
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the root span of every HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "")
+        trace = Trace(f"{method} {scope.get('path', '')}", {"http.method": method})
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                trace.root.set_attribute("http.status_code", message["status"])
+            await send(message)
+
+        token = _current_span.set(trace.root)
+        error = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current_span.reset(token)
+            trace.root.finish(error)
+            # Name by route template so traces of one endpoint group together
+            route = scope.get("route")
+            if route is not None:
+                trace.root.name = f"{method} {route.path}"
+                trace.root.set_attribute("http.target", scope.get("path", ""))
+            trace_buffer.add(trace)
+            if trace_exporter is not None:
+                asyncio.get_running_loop().run_in_executor(None, trace_exporter.export, trace)
+
+
+class TracedStream:
+    """Server-streaming RPC result whose span ends once the stream is consumed"""
+
+    def __init__(self, stream, stream_span: Span):
+        self._stream = stream
+        self._iterator = None
+        self._span = stream_span
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._iterator is None:
+            self._iterator = iter(self._stream)
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            self._span.finish()
+            raise
+        except Exception as e:
+            self._span.finish(e)
+            raise
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def _firestore_attributes(method_name: str, args, kwargs) -> Dict[str, Any]:
+    request = kwargs.get("request") or (args[1] if len(args) > 1 else None)
+    attributes: Dict[str, Any] = {}
+    if isinstance(request, dict):
+        for key in ("name", "parent"):
+            if request.get(key):
+                attributes[f"firestore.{key}"] = request[key]
+        if request.get("documents"):
+            attributes["firestore.documents"] = len(request["documents"])
+        if request.get("writes"):
+            attributes["firestore.writes"] = len(request["writes"])
+    return attributes
+
+
+def start_firestore_span(method_name: str, args, kwargs) -> Optional[Span]:
+    """Span for a Firestore RPC under the current span, or None outside a traced request
+
+    Opened by metrics.instrument_firestore, which wraps the Firestore client once
+    for both metrics and tracing.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return parent.trace.start_span(
+        f"firestore.{method_name}", parent, _firestore_attributes(method_name, args, kwargs)
+    )
+
+
+def _record_usage(gemini_span: Optional[Span], usage) -> None:
+    if gemini_span is None or usage is None:
+        return
+    for key, attribute in (("gemini.prompt_tokens", "prompt_token_count"),
+                           ("gemini.output_tokens", "candidates_token_count")):
+        value = getattr(usage, attribute, None)
+        if value:
+            gemini_span.set_attribute(key, value)
+
+
+def instrument_genai_client(client) -> None:
+    """Open a span for each generate call made through the client"""
+    models = client.models
+    generate_content = models.generate_content
+    generate_content_stream = models.generate_content_stream
+
+    def traced_generate(*args, **kwargs):
+        with span("gemini.generate_content", **{"gemini.model": kwargs.get("model", "")}) as gemini_span:
+            response = generate_content(*args, **kwargs)
+            _record_usage(gemini_span, getattr(response, "usage_metadata", None))
+            return response
+
+    def traced_stream(*args, **kwargs):
+        # The span is not made current: a generator may be closed from another context
+        parent = _current_span.get()
+        gemini_span = parent.trace.start_span(
+            "gemini.generate_content_stream", parent, {"gemini.model": kwargs.get("model", "")}
+        ) if parent is not None else None
+        usage = None
+        chunks = 0
+        error = None
+        try:
+            for chunk in generate_content_stream(*args, **kwargs):
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                chunks += 1
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if gemini_span is not None:
+                gemini_span.set_attribute("gemini.chunks", chunks)
+                _record_usage(gemini_span, usage)
+                gemini_span.finish(error)
+
+    models.generate_content = traced_generate
+    models.generate_content_stream = traced_stream
@@ -0,0 +1,96 @@
+import re
+import json
+from typing import Any, Dict, List, Optional
+
+_TRAILING_COMMA = re.compile(r',(\s*[}\]])')
+
+
+class JSONArrayItemParser:
+    """Pull complete top-level objects out of a JSON array as its text arrives
+
+    Text before the opening bracket (prose, markdown fences) and after the closing
+    bracket is ignored. Each object is decoded on its own, so one malformed item
+    is skipped and counted instead of failing the whole array.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._item_start: Optional[int] = None
+        self.finished = False
+        self.parsed_items = 0
+        self.failed_items = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Add text and return the objects completed by it"""
+        if self.finished or not chunk:
+            return []
+
+        self._buffer += chunk
+        buffer = self._buffer
+        items: List[Dict[str, Any]] = []
+        i = self._pos
+
+        while i < len(buffer):
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif not self._started:
+                if char == '[':
+                    self._started = True
+                    self._depth = 1
+            elif char == '"':
+                self._in_string = True
+            elif char in '[{':
+                self._depth += 1
+                if char == '{' and self._depth == 2:
+                    self._item_start = i
+            elif char in ']}':
+                self._depth -= 1
+                if char == '}' and self._depth == 1 and self._item_start is not None:
+                    item = self._decode(buffer[self._item_start:i + 1])
+                    if item is not None:
+                        items.append(item)
+                    self._item_start = None
+                elif self._depth <= 0:
+                    self.finished = True
+                    i += 1
+                    break
+            i += 1
+
+        # Drop text that can no longer be part of an item
+        keep_from = self._item_start if self._item_start is not None else i
+        self._buffer = buffer[keep_from:]
+        self._pos = i - keep_from
+        if self._item_start is not None:
+            self._item_start = 0
+        return items
+
+    def close(self) -> None:
+        """Finish parsing; an object still open at this point is counted as failed"""
+        if self._item_start is not None:
+            self.failed_items += 1
+            self._item_start = None
+        self.finished = True
+
+    def _decode(self, text: str) -> Optional[Dict[str, Any]]:
+        for candidate in (text, _TRAILING_COMMA.sub(r'\1', text)):
+            try:
+                item = json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(item, dict):
+                self.parsed_items += 1
+                return item
+            break
+        self.failed_items += 1
+        return None
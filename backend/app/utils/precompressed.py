@@ -0,0 +1,88 @@
+import zlib
+import struct
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # optional; responses fall back to gzip
+    brotli = None
+
+# Uncompressed blocks are limited to 64 KiB in both formats
+_BLOCK_SIZE = 65535
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """Pick "br", "gzip" or "identity" from an Accept-Encoding header"""
+    accepted: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return "identity"
+
+
+class PrecompressedPrefix:
+    """A large body prefix compressed once, completed per response with a small tail
+
+    The prefix is compressed and flushed to a byte boundary; each response then
+    appends its tail as uncompressed blocks and closes the stream. That costs a
+    copy of the compressed prefix, so responses that share most of their bytes
+    are only compressed once. Compressed forms are built on first use.
+    """
+
+    def __init__(self, prefix: bytes, gzip_level: int = 6, brotli_quality: int = 6):
+        self.prefix = prefix
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._gzip: Optional[bytes] = None
+        self._crc = zlib.crc32(prefix)
+        self._brotli: Optional[bytes] = None
+
+    def body(self, tail: bytes, encoding: str) -> bytes:
+        if encoding == "gzip":
+            return self.gzip(tail)
+        if encoding == "br":
+            return self.brotli(tail)
+        return self.prefix + tail
+
+    def gzip(self, tail: bytes) -> bytes:
+        if self._gzip is None:
+            compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+            self._gzip = compressor.compress(self.prefix) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        parts = [self._gzip]
+        # Stored deflate blocks: BFINAL/BTYPE byte, LEN, NLEN, then the raw bytes
+        chunks = [tail[start:start + _BLOCK_SIZE] for start in range(0, len(tail), _BLOCK_SIZE)] or [b""]
+        for index, chunk in enumerate(chunks):
+            parts.append(bytes([1 if index == len(chunks) - 1 else 0]))
+            parts.append(struct.pack("<HH", len(chunk), len(chunk) ^ 0xFFFF))
+            parts.append(chunk)
+        parts.append(struct.pack("<II", zlib.crc32(tail, self._crc), (len(self.prefix) + len(tail)) & 0xFFFFFFFF))
+        return b"".join(parts)
+
+    def brotli(self, tail: bytes) -> bytes:
+        if brotli is None:
+            raise RuntimeError("brotli is not installed")
+        if self._brotli is None:
+            compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=self.brotli_quality)
+            self._brotli = compressor.process(self.prefix) + compressor.flush()
+        parts = [self._brotli]
+        for start in range(0, len(tail), _BLOCK_SIZE):
+            chunk = tail[start:start + _BLOCK_SIZE]
+            # Uncompressed meta-block header (RFC 7932 9.2): ISLAST=0, MNIBBLES=4,
+            # MLEN-1 in 16 bits, ISUNCOMPRESSED=1, zero padding to the byte boundary
+            parts.append(((len(chunk) - 1) << 3 | 1 << 19).to_bytes(3, "little"))
+            parts.append(chunk)
+        # ISLAST=1, ISLASTEMPTY=1
+        parts.append(b"\x03")
+        return b"".join(parts)
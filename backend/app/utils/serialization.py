@@ -0,0 +1,120 @@
+import os
+import json
+import functools
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar, Union, get_args, get_origin
+
+import pydantic_core
+from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional; pydantic-core's encoder is used instead
+    orjson = None
+
+
+def to_primitives(model: BaseModel) -> Dict[str, Any]:
+    """A model as plain dicts, lists, strings and numbers, in one pass
+
+    Same output as json.loads(model.json()): URLs and datetimes become strings,
+    which is how documents have always been stored in Firestore.
+    """
+    return model.model_dump(mode="json")
+
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+# STRICT_READS=true also rejects stored fields the models do not declare, e.g. in tests
+strict_reads = os.getenv("STRICT_READS", "false").lower() == "true"
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@functools.lru_cache(maxsize=None)
+def _declared(model: Type[BaseModel]) -> Dict[str, Tuple[Optional[Type[BaseModel]], Any]]:
+    """Field name -> (model nested in it, list/dict/None for how it is held)"""
+    declared = {}
+    for name, field in model.model_fields.items():
+        annotation, container = field.annotation, None
+        while get_origin(annotation) in (Union, list, dict) and get_args(annotation):
+            if container is None and get_origin(annotation) is not Union:
+                container = get_origin(annotation)
+            annotation = next((arg for arg in get_args(annotation)[::-1] if arg is not type(None)), None)
+        nested = isinstance(annotation, type) and issubclass(annotation, BaseModel)
+        declared[name] = (annotation if nested else None, container)
+    return declared
+
+
+def _unknown_fields(model: Type[BaseModel], data: Any, prefix: str = "") -> List[str]:
+    """Dotted paths of keys in a stored document that the model does not declare"""
+    if not isinstance(data, dict):
+        return []
+    declared = _declared(model)
+    unknown = []
+    for key, value in data.items():
+        if key not in declared:
+            unknown.append(prefix + key)
+            continue
+        nested, container = declared[key]
+        if nested is None or value is None:
+            continue
+        if container is list:
+            items = value
+        elif container is dict:
+            items = value.values() if isinstance(value, dict) else []
+        else:
+            items = [value]
+        for item in items:
+            unknown.extend(_unknown_fields(nested, item, f"{prefix}{key}."))
+    return unknown
+
+
+def from_storage(model: Type[Model], data: Union[Dict[str, Any], bytes, str]) -> Model:
+    """Build a model from a document or cached JSON this service wrote itself
+
+    Goes straight to the model's compiled validator: stored strings are shared
+    rather than copied, so the cost does not grow with transcript length, and
+    cached JSON is decoded by orjson first. With STRICT_READS=true, fields the
+    model does not declare raise instead of being dropped.
+    """
+    if not isinstance(data, dict):
+        data = loads(data)
+    if strict_reads:
+        unknown = _unknown_fields(model, data)
+        if unknown:
+            raise ValueError(f"Stored {model.__name__} has undeclared fields: {', '.join(unknown)}")
+    return model.model_validate(data)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return pydantic_core.to_jsonable_python(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Encode to compact UTF-8 JSON; models and datetimes are handled without a round-trip"""
+    if isinstance(content, BaseModel):
+        # Straight from the model's compiled serializer
+        return pydantic_core.to_json(content)
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return pydantic_core.to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson (or pydantic-core), the app's default response class
+
+    Routes that return their response model directly can pass the model itself;
+    it is serialized once here instead of being dumped, re-validated against
+    response_model and dumped again by FastAPI.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,160 @@
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entries_accessed_at ON entries (accessed_at);
+"""
+
+
+def _default_path() -> str:
+    # /dev/shm is memory-backed on Linux, so the cache never touches disk
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "mercurious-cache.db")
+
+
+class SharedCache:
+    """Size-bounded cache shared by every worker process on a host
+
+    Entries are strings (callers store JSON) in a SQLite database in WAL mode,
+    by default under /dev/shm. Total size is kept under SHARED_CACHE_MAX_MB by
+    evicting the least recently read entries. Errors are logged and treated as
+    misses, so the cache can never fail a request.
+    """
+
+    # Reads refresh an entry's recency at most this often, to keep reads write-free
+    TOUCH_INTERVAL_SECONDS = 30
+    # Size is checked every this many writes
+    EVICTION_CHECK_INTERVAL = 64
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None, enabled: Optional[bool] = None):
+        self.enabled = enabled if enabled is not None else os.getenv("SHARED_CACHE_ENABLED", "true").lower() != "false"
+        self.path = path or os.getenv("SHARED_CACHE_PATH") or _default_path()
+        self.max_bytes = max_bytes or int(float(os.getenv("SHARED_CACHE_MAX_MB", "128")) * 1024 * 1024)
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+        if self.enabled:
+            try:
+                self._connection().executescript(_SCHEMA)
+            except sqlite3.Error as e:
+                print(f"Shared cache disabled, could not open {self.path}: {e}")
+                self.enabled = False
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Losing the newest entries on power loss is fine for a cache
+            connection.execute("PRAGMA synchronous=OFF")
+            self._local.connection = connection
+        return connection
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                "SELECT value, expires_at, accessed_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            now = time.time()
+            if row is None or (row[1] is not None and row[1] <= now):
+                self.misses += 1
+                return None
+            if now - row[2] > self.TOUCH_INTERVAL_SECONDS:
+                connection.execute(
+                    "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?", (now, namespace, key)
+                )
+            self.hits += 1
+            return row[0]
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Shared cache read failed for {namespace}/{key}: {e}")
+            return None
+
+    def set(self, namespace: str, key: str, value: str, ttl_seconds: Optional[float] = None) -> None:
+        if not self.enabled:
+            return
+        size = len(value)
+        if size > self.max_bytes // 10:
+            # One entry must not flush most of the cache
+            return
+        try:
+            now = time.time()
+            self._connection().execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, value, size, now + ttl_seconds if ttl_seconds else None, now),
+            )
+            self._writes += 1
+            if self._writes % self.EVICTION_CHECK_INTERVAL == 0:
+                self._evict()
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Shared cache write failed for {namespace}/{key}: {e}")
+
+    def delete(self, namespace: str, key: str) -> None:
+        if not self.enabled:
+            return
+        try:
+            self._connection().execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Shared cache delete failed for {namespace}/{key}: {e}")
+
+    def _evict(self) -> None:
+        """Drop expired entries, then the least recently read ones down to 90% of the limit"""
+        connection = self._connection()
+        connection.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        excess = total - int(self.max_bytes * 0.9)
+        if total <= self.max_bytes or excess <= 0:
+            return
+        victims = []
+        for namespace, key, size in connection.execute(
+            "SELECT namespace, key, size FROM entries ORDER BY accessed_at"
+        ):
+            victims.append((namespace, key))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", victims)
+        self.evictions += len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "enabled": self.enabled,
+            "path": self.path,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
+        if self.enabled:
+            try:
+                entries, size = self._connection().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+                ).fetchone()
+                stats.update(entries=entries, bytes=size)
+            except sqlite3.Error:
+                pass
+        return stats
@@ -0,0 +1,71 @@
+import re
+import zlib
+import random
+from typing import List, Set
+
+# Large Mersenne prime for the universal hash family used by MinHash
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Filler words shared by most quiz stems ("Which of the following best describes...")
+# that would otherwise make unrelated questions look alike
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "of", "in", "on", "to", "for",
+    "and", "or", "it", "this", "that", "what", "which", "who", "how", "why", "when",
+    "does", "do", "did", "following", "best", "statement", "main", "primary",
+    "describes", "describe", "according", "video",
+}
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Character shingles of normalized text with filler words removed"""
+    normalized = " ".join(word for word in normalize_text(text).split() if word not in _STOPWORDS)
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures for estimating Jaccard similarity between shingle sets"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, shingle_set: Set[str]) -> List[int]:
+        hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingle_set]
+        if not hashes:
+            return [_MAX_HASH] * self.num_perm
+        return [min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in self._params]
+
+    @staticmethod
+    def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        matches = sum(1 for a, b in zip(sig_a, sig_b) if a == b)
+        return matches / len(sig_a) if sig_a else 0.0
+
+
+_default_hasher = MinHasher()
+
+
+def deduplicate(texts: List[str], threshold: float = 0.5, hasher: MinHasher = None) -> List[int]:
+    """Return indices of texts to keep, dropping later near-duplicates of earlier ones"""
+    hasher = hasher or _default_hasher
+    kept: List[int] = []
+    kept_signatures: List[List[int]] = []
+
+    for index, text in enumerate(texts):
+        signature = hasher.signature(shingles(text))
+        if any(hasher.similarity(signature, other) >= threshold for other in kept_signatures):
+            continue
+        kept.append(index)
+        kept_signatures.append(signature)
+
+    return kept
@@ -0,0 +1,69 @@
+"""Measure cold-start time of the API the way Cloud Run sees it.
+
+Each run starts a fresh interpreter, imports app.main and serves the first
+/api/health request, so the numbers include every import-time side effect.
+
+Usage (from the backend directory):
+    python -m benchmarks.cold_start [runs]
+
+runs defaults to 10. Set COLD_START_SERVICES=true to also time building
+every service through the container (needs Firebase and Gemini credentials).
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_CHILD = r"""
+import json, os, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(app.main.app)
+response = client.get("/api/health")
+assert response.status_code == 200, response.text
+first_request = time.perf_counter()
+result = {
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (first_request - started) * 1000,
+    "modules": len(sys.modules),
+}
+if os.getenv("COLD_START_SERVICES", "false").lower() == "true":
+    from app.container import container
+    for name in ("video_service", "chat_service", "quiz_service", "auth_service"):
+        getattr(container, name)()
+    result["services_ms"] = (time.perf_counter() - started) * 1000
+print(json.dumps(result))
+"""
+
+
+def run_once() -> dict:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD],
+        cwd=backend_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(values):
+    values = sorted(values)
+    p95 = values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))]
+    return f"median {statistics.median(values):8.1f} ms   p95 {p95:8.1f} ms   max {values[-1]:8.1f} ms"
+
+
+def main(runs: int = 10):
+    results = [run_once() for _ in range(runs)]
+    print(f"Cold start over {runs} runs ({results[0]['modules']} modules loaded)")
+    for key in ("import_ms", "first_request_ms", "services_ms"):
+        if key in results[0]:
+            print(f"  {key:<18} {summarize([result[key] for result in results])}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
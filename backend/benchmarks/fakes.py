@@ -0,0 +1,191 @@
+"""Deterministic local stand-ins for Firestore, Gemini and YouTube used by the benchmarks.
+
+Every stand-in sleeps for a latency drawn from a configurable distribution, so
+the app spends its time where it would in production without spending quota.
+Firestore calls block the calling thread like the real synchronous client does,
+and are counted in app.metrics like every app.storage backend.
+"""
+import re
+import json
+import math
+import time
+import random
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from app.storage import MemoryDocumentStore
+
+
+class Latency:
+    """Lognormal latency from a median and a p99, both in milliseconds"""
+
+    def __init__(self, median_ms: float, p99_ms: float, rng: random.Random):
+        self.median_ms = median_ms
+        self.p99_ms = max(p99_ms, median_ms)
+        self._mu = math.log(max(median_ms, 0.001))
+        # 2.326 is the z-score of the 99th percentile
+        self._sigma = math.log(self.p99_ms / median_ms) / 2.326 if median_ms > 0 else 0.0
+        self._rng = rng
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: str, rng: random.Random) -> "Latency":
+        """Build from "median,p99" (or just "median") in milliseconds"""
+        parts = [float(part) for part in spec.split(",")]
+        return cls(parts[0], parts[1] if len(parts) > 1 else parts[0], rng)
+
+    def sample(self) -> float:
+        """Seconds to sleep for one call"""
+        if self.median_ms <= 0:
+            return 0.0
+        with self._lock:
+            value = self._rng.lognormvariate(self._mu, self._sigma)
+        return value / 1000
+
+    def wait(self) -> None:
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
+
+
+# Firestore
+
+class FakeFirestore(MemoryDocumentStore):
+    """The in-memory document store, with network latency added to every RPC"""
+
+    def __init__(self, latency: Latency):
+        super().__init__()
+        self.latency = latency
+        self.rpc_counts: Dict[str, int] = {}
+
+    @contextmanager
+    def rpc(self, method: str):
+        self.rpc_counts[method] = self.rpc_counts.get(method, 0) + 1
+        with super().rpc(method):
+            self.latency.wait()
+            yield
+
+
+# Gemini
+
+_WORDS = (
+    "photosynthesis chlorophyll energy gradient momentum velocity theorem proof lattice enzyme "
+    "protein market supply demand inflation algorithm recursion pointer compiler network packet "
+    "latency entropy circuit voltage current dynasty empire treaty revolution climate glacier "
+    "erosion sediment orbit gravity planet comet neuron synapse memory cortex vaccine antibody "
+    "genome mutation ecosystem predator habitat canopy volcano tectonic magma fossil"
+).split()
+
+
+class _Usage:
+    def __init__(self, prompt_tokens: int, output_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+        self.total_token_count = prompt_tokens + output_tokens
+
+
+class FakeGeminiResponse:
+    def __init__(self, text: str, prompt: str):
+        self.text = text
+        self.usage_metadata = _Usage(len(prompt) // 4, len(text) // 4)
+
+
+class _FakeModels:
+    def __init__(self, latency: Latency, seed: int):
+        self._latency = latency
+        self._seed = seed
+        self.calls = 0
+
+    def _rng(self, contents: Any) -> random.Random:
+        # Same prompt, same answer: content is reproducible across runs
+        return random.Random(f"{self._seed}:{contents}")
+
+    def _sentence(self, rng: random.Random) -> str:
+        return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 12))).capitalize() + "."
+
+    def _quiz(self, rng: random.Random, contents: str) -> str:
+        match = re.search(r"Create exactly (\d+)", contents)
+        count = int(match.group(1)) if match else 5
+        questions = []
+        for _ in range(count):
+            options = [" ".join(rng.sample(_WORDS, 3)) for _ in range(4)]
+            questions.append({
+                "question": " ".join(rng.sample(_WORDS, 9)).capitalize() + "?",
+                "options": options,
+                "correct_answer": options[rng.randrange(4)],
+                "explanation": self._sentence(rng),
+                "topic": rng.choice(_WORDS),
+            })
+        return json.dumps(questions)
+
+    def _respond(self, contents: Any, config: Any) -> str:
+        rng = self._rng(contents)
+        text = str(contents)
+        if getattr(config, "response_mime_type", None) == "application/json":
+            return self._quiz(rng, text)
+        return "\n".join(self._sentence(rng) for _ in range(rng.randint(4, 8)))
+
+    def generate_content(self, *, model: str, contents: Any, config: Any = None, **kwargs) -> FakeGeminiResponse:
+        self.calls += 1
+        self._latency.wait()
+        return FakeGeminiResponse(self._respond(contents, config), str(contents))
+
+    def generate_content_stream(self, *, model: str, contents: Any, config: Any = None, **kwargs):
+        self.calls += 1
+        text = self._respond(contents, config)
+        delay = self._latency.sample()
+        chunk_count = 8
+        size = max(1, math.ceil(len(text) / chunk_count))
+        for start in range(0, len(text), size):
+            time.sleep(delay / chunk_count)
+            yield FakeGeminiResponse(text[start:start + size], str(contents) if start == 0 else "")
+
+
+class FakeGenAIClient:
+    """Stands in for google.genai.Client; only client.models is used by the services"""
+
+    def __init__(self, latency: Latency, seed: int = 0):
+        self.models = _FakeModels(latency, seed)
+
+
+# YouTube
+
+class FakeYouTube:
+    """Data API responses for requests.get and transcripts for YouTubeTranscriptApi"""
+
+    def __init__(self, data_api_latency: Latency, transcript_latency: Latency,
+                 transcript_words: int = 3000, seed: int = 0):
+        self.data_api_latency = data_api_latency
+        self.transcript_latency = transcript_latency
+        self.transcript_words = transcript_words
+        self.seed = seed
+        self.data_api_calls = 0
+        self.transcript_calls = 0
+
+    def get(self, url: str, timeout: Optional[float] = None, **kwargs):
+        self.data_api_calls += 1
+        self.data_api_latency.wait()
+        video_id = re.search(r"[?&]id=([^&]+)", url).group(1)
+        rng = random.Random(f"{self.seed}:{video_id}")
+        item = {
+            "snippet": {
+                "title": " ".join(rng.sample(_WORDS, 5)).title(),
+                "channelTitle": rng.choice(_WORDS).title() + " Academy",
+                "description": " ".join(rng.choice(_WORDS) for _ in range(60)),
+                "thumbnails": {"high": {"url": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"}},
+                "publishedAt": "2024-01-01T00:00:00Z",
+            },
+            "contentDetails": {"duration": f"PT{rng.randint(3, 40)}M{rng.randint(0, 59)}S"},
+            "statistics": {"viewCount": str(rng.randint(1000, 10 ** 6)), "likeCount": str(rng.randint(10, 10 ** 4))},
+        }
+        return SimpleNamespace(raise_for_status=lambda: None, json=lambda: {"items": [item]})
+
+    def get_transcript(self, video_id: str, *args, **kwargs) -> List[Dict[str, Any]]:
+        self.transcript_calls += 1
+        self.transcript_latency.wait()
+        rng = random.Random(f"{self.seed}:transcript:{video_id}")
+        words = [rng.choice(_WORDS) for _ in range(self.transcript_words)]
+        return [{"text": " ".join(words[start:start + 12]), "start": start / 3, "duration": 4.0}
+                for start in range(0, len(words), 12)]
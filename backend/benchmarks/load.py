@@ -0,0 +1,373 @@
+"""End-to-end load benchmark against local Gemini, Firestore and YouTube stand-ins.
+
+Runs the FastAPI app in process and drives a weighted mix of process, dashboard,
+video, chat, quiz and submit traffic from concurrent virtual users. Reports
+p50/p95/p99 latency, throughput, and Firestore/Gemini calls per request for each
+endpoint. No quota is spent: every external call goes to benchmarks.fakes.
+
+Usage (from the backend directory):
+    python -m benchmarks.load [--duration 30] [--concurrency 10] [--users 20]
+        [--mix process=1,dashboard=4,video=3,chat=3,quiz=2,submit=1]
+        [--gemini-latency 800,3000] [--firestore-latency 8,40]
+        [--json results.json] [--baseline previous.json --max-regression 0.2]
+
+Latencies are "median,p99" in milliseconds. With --firestore emulator the app
+talks to the emulator at FIRESTORE_EMULATOR_HOST instead of the in-memory fake,
+and with --firestore sqlite to a SQLite store in a temporary directory.
+With --baseline the run exits non-zero if an endpoint's p95 latency or calls
+per request grew by more than --max-regression.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import Any, Dict, List, Optional, Tuple
+
+# Read by app modules at import time
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("YOUTUBE_DATA_API", "benchmark")
+os.environ.setdefault("QUIZ_ID_SECRET", "benchmark")
+os.environ.setdefault("QUIZ_PREWARM_ENABLED", "false")
+# Virtual users call far faster than the per-user limits allow; set to "true" to measure them
+os.environ.setdefault("RATE_LIMITS_ENABLED", "false")
+
+# operation -> (method, route template); counts in app.metrics are keyed by route template
+OPERATIONS: Dict[str, Tuple[str, str]] = {
+    "process": ("POST", "/api/videos/process"),
+    "dashboard": ("GET", "/api/videos/dashboard"),
+    "video": ("GET", "/api/videos/{video_id}"),
+    "chat": ("POST", "/api/chat/send"),
+    "quiz": ("POST", "/api/quiz/generate"),
+    "submit": ("POST", "/api/quiz/submit"),
+}
+DEFAULT_MIX = "process=1,dashboard=4,video=3,chat=3,quiz=2,submit=1"
+CHAT_QUESTIONS = (
+    "What is the main idea of this video?",
+    "Can you summarize the key points?",
+    "Explain the most important concept in simple terms.",
+    "What should I remember for an exam?",
+    "Give me an example that applies this idea.",
+)
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise SystemExit(f"Unknown operation in --mix: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class VirtualUser:
+    def __init__(self, uid: str):
+        self.uid = uid
+        self.headers = {"Authorization": f"Bearer {uid}"}
+        self.library: List[str] = []
+        self.pending_quiz: Optional[Dict[str, Any]] = None
+
+
+class LoadBenchmark:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.mix = parse_mix(args.mix)
+        self.latencies: Dict[str, List[float]] = {name: [] for name in OPERATIONS}
+        self.errors: Dict[str, int] = {name: 0 for name in OPERATIONS}
+        self.users = [VirtualUser(f"bench-user-{index}") for index in range(args.users)]
+        self.catalog = [f"vid{index:08d}" for index in range(args.videos)]
+        self.new_videos = 0
+
+    def install_fakes(self):
+        """Point the container at the stand-ins before any service is built"""
+        import requests
+        from types import SimpleNamespace
+        from .fakes import FakeFirestore, FakeGenAIClient, FakeYouTube, Latency
+        from app import metrics, tracing
+        from app.container import container, metrics_enabled, tracing_enabled
+        from app.config.firebase_config import firebase_config
+        from app.services import video_services, transcript_services
+
+        args = self.args
+        rng = random.Random(args.seed)
+        if args.firestore == "emulator":
+            from google.auth.credentials import AnonymousCredentials
+            from google.cloud import firestore
+            if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+                raise SystemExit("--firestore emulator needs FIRESTORE_EMULATOR_HOST")
+            metrics.instrument_firestore(count=metrics_enabled(), trace=tracing_enabled())
+            self.db = firestore.Client(project="mercurious-benchmark", credentials=AnonymousCredentials())
+        elif args.firestore == "sqlite":
+            import tempfile
+            from app.storage import SQLiteDocumentStore
+            self.db = SQLiteDocumentStore(os.path.join(tempfile.mkdtemp(), "benchmark.db"))
+        else:
+            self.db = FakeFirestore(Latency.parse(args.firestore_latency, rng))
+        container.override("firestore", self.db)
+        # A fresh host cache, so earlier runs don't warm this one
+        import tempfile
+        from app.utils.shared_cache import SharedCache
+        container.override("shared_cache", SharedCache(os.path.join(tempfile.mkdtemp(), "shared-cache.db")))
+
+        self.gemini = FakeGenAIClient(Latency.parse(args.gemini_latency, rng), args.seed)
+        if metrics_enabled():
+            metrics.instrument_genai_client(self.gemini)
+        if tracing_enabled():
+            tracing.instrument_genai_client(self.gemini)
+        container.override("genai_client", self.gemini)
+
+        self.youtube = FakeYouTube(
+            Latency.parse(args.youtube_latency, rng),
+            Latency.parse(args.transcript_latency, rng),
+            args.transcript_words,
+            args.seed,
+        )
+        video_services.requests = SimpleNamespace(get=self.youtube.get, exceptions=requests.exceptions)
+        transcript_services.YouTubeTranscriptApi.get_transcript = self.youtube.get_transcript
+
+        # Bearer tokens are the user ids
+        firebase_config.verify_token = lambda token: {"uid": token, "email": f"{token}@example.com"}
+
+    async def request(self, client, operation: str, user: VirtualUser) -> Tuple[str, float, bool]:
+        method, _ = OPERATIONS[operation]
+        if operation == "process":
+            if self.rng.random() < self.args.new_video_ratio:
+                self.new_videos += 1
+                video_id = f"new{self.new_videos:08d}"
+            else:
+                video_id = self.rng.choice(self.catalog)
+            path, body = "/api/videos/process", {"url": f"https://www.youtube.com/watch?v={video_id}"}
+        elif operation == "dashboard":
+            path, body = "/api/videos/dashboard", None
+        elif operation == "video":
+            path, body = f"/api/videos/{self.rng.choice(user.library)}", None
+        elif operation == "chat":
+            path = "/api/chat/send"
+            body = {"video_id": self.rng.choice(user.library), "message": self.rng.choice(CHAT_QUESTIONS)}
+        elif operation == "quiz":
+            path = "/api/quiz/generate"
+            body = {"video_id": self.rng.choice(user.library), "num_questions": self.args.quiz_questions}
+        else:
+            quiz = user.pending_quiz
+            user.pending_quiz = None
+            path = "/api/quiz/submit"
+            body = {
+                "video_id": quiz["video_id"],
+                "quiz_id": quiz["quiz_id"],
+                "answers": [
+                    {"question_index": index, "selected_answer": self.rng.choice(question["options"])}
+                    for index, question in enumerate(quiz["questions"])
+                ],
+            }
+
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body, headers=user.headers)
+            ok = response.status_code < 400
+        except Exception as e:
+            print(f"{operation} failed: {e}")
+            response, ok = None, False
+        elapsed = time.perf_counter() - started
+
+        if ok and operation == "process":
+            video_id = response.json()["video_id"]
+            if video_id not in user.library:
+                user.library.append(video_id)
+        elif ok and operation == "quiz":
+            user.pending_quiz = response.json()
+        return operation, elapsed, ok
+
+    def pick_operation(self, user: VirtualUser) -> str:
+        operations = list(self.mix)
+        operation = self.rng.choices(operations, weights=[self.mix[name] for name in operations])[0]
+        # Fall back to whatever the user can do in their current state
+        if operation == "submit" and user.pending_quiz is None:
+            operation = "quiz"
+        if operation in ("video", "chat", "quiz") and not user.library:
+            operation = "process"
+        return operation
+
+    async def seed(self, client) -> None:
+        """Process the catalog once, then give every user a starting library"""
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+
+        async def add(user: VirtualUser, video_id: str):
+            async with semaphore:
+                url = f"https://www.youtube.com/watch?v={video_id}"
+                response = await client.post("/api/videos/process", json={"url": url}, headers=user.headers)
+                while response.status_code == 503 and "Retry-After" in response.headers:
+                    # Shed by admission control while the catalog is being ingested
+                    await asyncio.sleep(float(response.headers["Retry-After"]))
+                    response = await client.post("/api/videos/process", json={"url": url}, headers=user.headers)
+                if response.status_code >= 400:
+                    raise SystemExit(f"Seeding failed for {video_id}: {response.status_code} {response.text}")
+                user.library.append(video_id)
+
+        await asyncio.gather(*(add(self.users[index % len(self.users)], video_id)
+                               for index, video_id in enumerate(self.catalog)))
+        await asyncio.gather(*(
+            add(user, video_id)
+            for user in self.users
+            for video_id in self.rng.sample(self.catalog, min(self.args.library_size, len(self.catalog)))
+            if video_id not in user.library
+        ))
+
+    async def run(self) -> Dict[str, Any]:
+        import httpx
+        from app.main import app
+        from app import metrics
+
+        self.install_fakes()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            print(f"Seeding {len(self.catalog)} videos for {len(self.users)} users...")
+            await self.seed(client)
+
+            before_firestore = metrics.http_firestore_calls.totals()
+            before_gemini = metrics.http_gemini_calls.totals()
+            deadline = time.perf_counter() + self.args.duration
+            remaining = {"requests": self.args.requests}
+
+            async def worker():
+                while time.perf_counter() < deadline:
+                    if self.args.requests:
+                        if remaining["requests"] <= 0:
+                            return
+                        remaining["requests"] -= 1
+                    user = self.rng.choice(self.users)
+                    operation, elapsed, ok = await self.request(client, self.pick_operation(user), user)
+                    self.latencies[operation].append(elapsed)
+                    if not ok:
+                        self.errors[operation] += 1
+
+            print(f"Running {self.args.concurrency} concurrent clients for up to {self.args.duration}s...")
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+            elapsed = time.perf_counter() - started
+
+        return self.report(elapsed, before_firestore, before_gemini,
+                           metrics.http_firestore_calls.totals(), metrics.http_gemini_calls.totals())
+
+    def report(self, elapsed: float, before_firestore, before_gemini, after_firestore, after_gemini) -> Dict[str, Any]:
+        def calls_per_request(before, after, route):
+            total, count = after.get((route,), (0, 0))
+            base_total, base_count = before.get((route,), (0, 0))
+            return (total - base_total) / (count - base_count) if count > base_count else 0.0
+
+        endpoints = {}
+        for operation, (method, route) in OPERATIONS.items():
+            values = self.latencies[operation]
+            if not values:
+                continue
+            endpoints[operation] = {
+                "endpoint": f"{method} {route}",
+                "requests": len(values),
+                "errors": self.errors[operation],
+                "throughput_rps": len(values) / elapsed,
+                "p50_ms": percentile(values, 0.50) * 1000,
+                "p95_ms": percentile(values, 0.95) * 1000,
+                "p99_ms": percentile(values, 0.99) * 1000,
+                # Per route, so endpoints sharing a route template share these
+                "firestore_calls_per_request": calls_per_request(before_firestore, after_firestore, route),
+                "gemini_calls_per_request": calls_per_request(before_gemini, after_gemini, route),
+            }
+        total = sum(len(values) for values in self.latencies.values())
+        return {
+            "config": {key: value for key, value in vars(self.args).items() if key not in ("json", "baseline")},
+            "elapsed_s": elapsed,
+            "requests": total,
+            "throughput_rps": total / elapsed if elapsed else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"\n{result['requests']} requests in {result['elapsed_s']:.1f}s ({result['throughput_rps']:.1f} req/s)\n")
+    header = f"{'endpoint':<28} {'reqs':>6} {'errs':>5} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'fs/req':>7} {'gem/req':>7}"
+    print(header)
+    print("-" * len(header))
+    for stats in result["endpoints"].values():
+        print(f"{stats['endpoint']:<28} {stats['requests']:>6} {stats['errors']:>5} {stats['throughput_rps']:>7.1f} "
+              f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} "
+              f"{stats['firestore_calls_per_request']:>7.2f} {stats['gemini_calls_per_request']:>7.2f}")
+
+
+def find_regressions(result: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    regressions = []
+    for operation, stats in result["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(operation)
+        if not previous:
+            continue
+        for key in ("p95_ms", "firestore_calls_per_request", "gemini_calls_per_request"):
+            # Small absolute slack keeps near-zero values from flagging on noise
+            limit = previous[key] * (1 + max_regression) + (1.0 if key == "p95_ms" else 0.05)
+            if stats[key] > limit:
+                regressions.append(f"{stats['endpoint']}: {key} {previous[key]:.2f} -> {stats[key]:.2f}")
+    return regressions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load benchmark against local stand-ins")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of measured traffic")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests (0: no limit)")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--videos", type=int, default=10, help="videos processed before the run")
+    parser.add_argument("--library-size", type=int, default=3, help="videos in each user's library before the run")
+    parser.add_argument("--new-video-ratio", type=float, default=0.1, help="share of process calls for unseen videos")
+    parser.add_argument("--quiz-questions", type=int, default=5)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--firestore", choices=("fake", "sqlite", "emulator"), default="fake",
+                        help="in-memory fake with --firestore-latency, a local SQLite store, or the emulator")
+    parser.add_argument("--firestore-latency", default="8,40")
+    parser.add_argument("--gemini-latency", default="800,3000")
+    parser.add_argument("--youtube-latency", default="150,600")
+    parser.add_argument("--transcript-latency", default="300,1200")
+    parser.add_argument("--transcript-words", type=int, default=3000)
+    parser.add_argument("--gemini-rpm", type=int, default=0,
+                        help="GEMINI_REQUESTS_PER_MINUTE for the run (0: unlimited)")
+    parser.add_argument("--admission-target", type=float,
+                        help="ADMISSION_LATENCY_TARGET_SECONDS for the run (0: no load shedding)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    os.environ["GEMINI_REQUESTS_PER_MINUTE"] = str(args.gemini_rpm)
+    if args.admission_target is not None:
+        os.environ["ADMISSION_LATENCY_TARGET_SECONDS"] = str(args.admission_target)
+    result = asyncio.run(LoadBenchmark(args).run())
+    print_report(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(result, json.load(f), args.max_regression)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Response size and latency of GET /api/videos/{id} and the dashboard with ?fields= projections.
+
+Seeds a library through the load benchmark's stand-ins, then requests the same
+videos with each projection and reports the mean uncompressed body size and
+p50/p95 latency next to the full response.
+
+Usage (from the backend directory):
+    python -m benchmarks.projection [--requests 200] [--firestore sqlite]
+        [--transcript-words 6000] [--firestore-latency 8,40]
+
+Set SHARED_CACHE_ENABLED=false to measure field masks against storage alone;
+otherwise global videos already in the host cache are projected from there.
+"""
+import time
+import asyncio
+import argparse
+from typing import List, Optional
+
+from .load import LoadBenchmark, VirtualUser, build_parser, percentile
+
+VIDEO_PROJECTIONS = (
+    None,
+    "info,content.summary",
+    "info,content.summary,content.main_points,content.key_concepts,progress",
+    "info.title,info.thumbnail_url,progress,last_watched",
+    "content.study_guide,content.vocabulary",
+)
+DASHBOARD_PROJECTIONS = (
+    None,
+    "video_id,title,thumbnail_url,progress",
+)
+
+
+async def measure(client, user: VirtualUser, paths: List[str], fields: Optional[str], requests: int):
+    sizes, latencies = [], []
+    params = {"fields": fields} if fields else None
+    # Uncompressed sizes, so projections and the full body compare like for like
+    headers = dict(user.headers, **{"Accept-Encoding": "identity"})
+    for index in range(requests):
+        started = time.perf_counter()
+        response = await client.get(paths[index % len(paths)], params=params, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise SystemExit(f"{paths[index % len(paths)]}?fields={fields} failed: {response.status_code} {response.text}")
+        sizes.append(len(response.content))
+    return sum(sizes) / len(sizes), percentile(latencies, 0.5) * 1000, percentile(latencies, 0.95) * 1000
+
+
+async def run(args) -> None:
+    import httpx
+    from app.main import app
+
+    benchmark = LoadBenchmark(args)
+    benchmark.install_fakes()
+    user = benchmark.users[0]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        print(f"Seeding {len(benchmark.catalog)} videos...")
+        for video_id in benchmark.catalog:
+            response = await client.post("/api/videos/process", headers=user.headers,
+                                         json={"url": f"https://www.youtube.com/watch?v={video_id}"})
+            if response.status_code >= 400:
+                raise SystemExit(f"Seeding failed for {video_id}: {response.status_code} {response.text}")
+            user.library.append(video_id)
+
+        print(f"\n{'endpoint / fields':68} {'bytes':>9} {'size':>6} {'p50 ms':>8} {'p95 ms':>8}")
+        print("-" * 103)
+        for label, paths, projections in (
+            ("GET /api/videos/{video_id}", [f"/api/videos/{video_id}" for video_id in user.library], VIDEO_PROJECTIONS),
+            ("GET /api/videos/dashboard", ["/api/videos/dashboard"], DASHBOARD_PROJECTIONS),
+        ):
+            full_size = None
+            for fields in projections:
+                size, p50, p95 = await measure(client, user, paths, fields, args.requests)
+                full_size = full_size or size
+                name = f"{label} {fields or '(full)'}"
+                print(f"{name[:68]:68} {size:9.0f} {size / full_size:6.1%} {p50:8.2f} {p95:8.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure ?fields= projections against local stand-ins")
+    parser.add_argument("--requests", type=int, default=200, help="requests per projection")
+    parser.add_argument("--videos", type=int, default=10)
+    parser.add_argument("--firestore", choices=("fake", "sqlite", "emulator"), default="sqlite")
+    parser.add_argument("--firestore-latency", default="8,40")
+    parser.add_argument("--transcript-words", type=int, default=6000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    # Everything else as in the load benchmark; only storage latency matters here
+    settings = vars(build_parser().parse_args([]))
+    settings.update(vars(args))
+    settings.update(gemini_latency="0", youtube_latency="0", transcript_latency="0")
+    asyncio.run(run(argparse.Namespace(**settings)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Microbenchmark of model serialization for Firestore writes, API responses and reads.
+
+Compares, on videos with realistic transcript lengths:
+    write:    json.loads(model.json())  vs  to_primitives(model)
+    response: FastAPI's response_model path (dump, re-validate, dump, json.dumps)
+              vs FastJSONResponse(model)
+    read:     Model(**document) / Model.model_validate_json(cached)  vs  from_storage(Model, ...)
+              with CPU time and bytes allocated per read
+
+Usage (from the backend directory):
+    python -m benchmarks.serialization [--words 1500,6000,20000] [--repeat 200]
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+import warnings
+import statistics
+import tracemalloc
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from starlette.responses import JSONResponse
+
+from pydantic import BaseModel
+from app.models.quiz import QuizQuestion, QuizResponse
+from app.models.video import GlobalVideo, UserVideoMetadata, VideoInfo, VideoContent, VideoMetadata, VideoResponse
+from app.utils import serialization
+from app.utils.serialization import FastJSONResponse, to_primitives, from_storage, orjson
+
+_WORDS = ("energy momentum theorem protein market inflation algorithm recursion compiler "
+          "network entropy voltage treaty climate glacier orbit gravity neuron vaccine genome").split()
+
+
+def make_video(words: int, rng: random.Random) -> GlobalVideo:
+    def text(count: int) -> str:
+        return " ".join(rng.choice(_WORDS) for _ in range(count))
+
+    return GlobalVideo(
+        video_id="dQw4w9WgXcQ",
+        info=VideoInfo(
+            title=text(6), author=text(2), description=text(120), duration="18:42",
+            thumbnail_url="https://i.ytimg.com/vi/dQw4w9WgXcQ/hqdefault.jpg", publish_date="2024-01-01",
+            views=1234567, likes=45678, video_url="https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        ),
+        content=VideoContent(
+            transcript=text(words), summary=text(words // 20), main_points=[text(20) for _ in range(8)],
+            key_concepts=[text(3) for _ in range(12)], study_guide=text(words // 8),
+            analysis=text(words // 10), vocabulary=[text(2) for _ in range(20)],
+        ),
+        metadata=VideoMetadata(created_at=datetime.now(), processed_count=3, last_accessed=datetime.now()),
+    )
+
+
+def timed(func: Callable[[], object], repeat: int) -> float:
+    """Median microseconds per call"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1e6
+
+
+def allocated(func: Callable[[], object]) -> int:
+    """Peak bytes allocated by one call"""
+    func()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def make_quiz(questions: int, rng: random.Random) -> QuizResponse:
+    def text(count: int) -> str:
+        return " ".join(rng.choice(_WORDS) for _ in range(count))
+
+    return QuizResponse(
+        questions=[QuizQuestion(question=text(25), options=[text(6) for _ in range(4)], correct_answer=text(6),
+                                explanation=text(50), topic=text(3)) for _ in range(questions)],
+        video_id="dQw4w9WgXcQ", generated_at=datetime.now(), quiz_id="q15-1",
+    )
+
+
+def read_samples(words: List[int], rng: random.Random) -> List[Tuple[str, BaseModel]]:
+    samples = [(f"GlobalVideo {count}w", make_video(count, rng)) for count in words]
+    samples.append(("UserVideoMetadata", UserVideoMetadata(added_at=datetime.now(), last_watched=datetime.now(),
+                                                            progress=0.4, notes="rewatch the proof")))
+    samples.append(("QuizResponse 15q", make_quiz(15, rng)))
+    return samples
+
+
+def compare_reads(words: List[int], rng: random.Random, repeat: int) -> None:
+    print(f"\n{'read':20} {'KB':>6} {'document':>9} {'trusted':>8} {'strict':>7} {'json':>7} {'trusted':>8}"
+          f" {'alloc doc':>10} {'alloc json':>11}   (median us, bytes per read)")
+    for label, model in read_samples(words, rng):
+        model_type = type(model)
+        document, cached = to_primitives(model), model.model_dump_json()
+        assert from_storage(model_type, document) == model_type(**document) == from_storage(model_type, cached)
+
+        document_before = timed(lambda: model_type(**document), repeat)
+        document_after = timed(lambda: from_storage(model_type, document), repeat)
+        json_before = timed(lambda: model_type.model_validate_json(cached), repeat)
+        json_after = timed(lambda: from_storage(model_type, cached), repeat)
+        serialization.strict_reads = True
+        try:
+            document_strict = timed(lambda: from_storage(model_type, document), repeat)
+        finally:
+            serialization.strict_reads = False
+        print(f"{label:20} {len(cached) / 1024:6.1f} {document_before:9.1f} {document_after:8.1f}"
+              f" {document_strict:7.1f} {json_before:7.1f} {json_after:8.1f}"
+              f" {allocated(lambda: from_storage(model_type, document)):10d}"
+              f" {allocated(lambda: from_storage(model_type, cached)):11d}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GlobalVideo serialization microbenchmark")
+    parser.add_argument("--words", default="1500,6000,20000", help="transcript lengths to test")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    # The "before" path is the deprecated model.json() the services used
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    rng = random.Random(1)
+    field = create_model_field("Response_get_video", VideoResponse, mode="serialization")
+    loop = asyncio.new_event_loop()
+    print(f"response encoder: {'orjson' if orjson else 'pydantic-core'}\n")
+    print(f"{'words':>6} {'json KB':>8} {'write before':>13} {'write after':>12} {'speedup':>8}"
+          f" {'resp before':>12} {'resp after':>11} {'speedup':>8}   (median us)")
+
+    word_counts = [int(value) for value in args.words.split(",")]
+    for words in word_counts:
+        video = make_video(words, rng)
+        response = VideoResponse(
+            video_id=video.video_id, info=video.info, content=video.content,
+            created_at=video.metadata.created_at, progress=0.4,
+        )
+        assert to_primitives(video) == json.loads(video.json())
+        assert json.loads(FastJSONResponse(response).body) == json.loads(JSONResponse(
+            loop.run_until_complete(serialize_response(field=field, response_content=response))).body)
+
+        write_before = timed(lambda: json.loads(video.json()), args.repeat)
+        write_after = timed(lambda: to_primitives(video), args.repeat)
+        response_before = timed(lambda: JSONResponse(loop.run_until_complete(
+            serialize_response(field=field, response_content=response))), args.repeat)
+        response_after = timed(lambda: FastJSONResponse(response), args.repeat)
+        print(f"{words:6d} {len(video.model_dump_json()) / 1024:8.1f} {write_before:13.0f} {write_after:12.0f}"
+              f" {write_before / write_after:7.1f}x {response_before:12.0f} {response_after:11.0f}"
+              f" {response_before / response_after:7.1f}x")
+    loop.close()
+    compare_reads(word_counts, rng, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import the app package from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("QUIZ_ID_SECRET", "test")
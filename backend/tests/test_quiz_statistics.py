@@ -0,0 +1,124 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from app.models.quiz import QuizAnswer, QuizQuestion, QuizResponse, QuizResult, QuizSubmission
+from app.services.quiz_service import QuizService
+from app.services.quiz_statistics import QuizStatisticsStore
+from app.services.video_database_service import VideoDatabase
+from app.storage import SQLiteDocumentStore
+from app.utils.shared_cache import SharedCache
+
+USER_ID = "user-1"
+VIDEO_ID = "video-1"
+SUBMISSIONS = 24
+QUESTIONS = 5
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "documents.db")
+
+
+def in_parallel(func, items):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        return list(pool.map(func, items))
+
+
+def per_thread(factory):
+    """One instance per worker thread, each with its own store on the same file, like separate workers"""
+    local = threading.local()
+
+    def get():
+        if not hasattr(local, "instance"):
+            local.instance = factory()
+        return local.instance
+    return get
+
+
+def assert_counts(db_path: str, scores):
+    # Read back through a fresh store, so only what was committed to the file counts
+    store = SQLiteDocumentStore(db_path)
+    stats = QuizStatisticsStore(store)
+
+    video_doc = store.collection('users').document(USER_ID).collection('quizzes').document(VIDEO_ID).get()
+    video_stats = video_doc.to_dict()['statistics']
+    assert video_stats['total_attempts'] == len(scores)
+    assert video_stats['total_score'] == sum(scores)
+    assert video_stats['total_questions'] == QUESTIONS * len(scores)
+    assert video_stats['best_score'] == max(scores)
+
+    summary = stats.get_summary(USER_ID)
+    assert summary['total_attempts'] == len(scores)
+    assert summary['total_score'] == sum(scores)
+    assert summary['total_questions'] == QUESTIONS * len(scores)
+    assert stats.video_totals(USER_ID) == (1, max(scores))
+
+    attempts = video_doc.reference.collection('attempts').get()
+    assert len(attempts) == len(scores)
+
+
+def record(stats: QuizStatisticsStore, video_id: str, score: int):
+    result = QuizResult(video_id=video_id, score=score, total_questions=QUESTIONS,
+                        correct_answers=list(range(score)), user_answers=[], submitted_at=datetime.now(),
+                        time_taken=300)
+    stats.record_attempt(USER_ID, result, {'result': result.model_dump(mode="json"), 'timestamp': datetime.now()})
+
+
+def test_parallel_record_attempt_keeps_every_update(db_path):
+    stats = per_thread(lambda: QuizStatisticsStore(SQLiteDocumentStore(db_path)))
+    scores = [index % 6 for index in range(SUBMISSIONS)]
+
+    in_parallel(lambda score: record(stats(), VIDEO_ID, score), scores)
+    assert_counts(db_path, scores)
+
+
+def test_remove_video_subtracts_its_totals(db_path):
+    stats = QuizStatisticsStore(SQLiteDocumentStore(db_path))
+    for score in (2, 5):
+        record(stats, VIDEO_ID, score)
+    for score in (1, 3, 4):
+        record(stats, "video-2", score)
+
+    stats.remove_video(USER_ID, "video-2")
+
+    stats = QuizStatisticsStore(SQLiteDocumentStore(db_path))
+    summary = stats.get_summary(USER_ID)
+    assert summary['total_attempts'] == 2
+    assert summary['total_score'] == 7
+    assert summary['total_questions'] == 2 * QUESTIONS
+    assert stats.video_totals(USER_ID) == (1, 5)
+
+
+def test_parallel_submit_quiz_keeps_every_update(db_path, tmp_path):
+    def build_service():
+        store = SQLiteDocumentStore(db_path)
+        video_db = VideoDatabase(db=store, cache=SharedCache(str(tmp_path / "cache.db"), enabled=False))
+        return QuizService(client=object(), video_db=video_db)
+
+    setup = build_service()
+    setup.video_db.db.collection('users').document(USER_ID).collection('videos').document(VIDEO_ID).set(
+        {'added_at': datetime.now()}
+    )
+    questions = [
+        QuizQuestion(question=f"Question {index}?", options=["A", "B", "C", "D"], correct_answer="A",
+                     explanation="A is correct")
+        for index in range(QUESTIONS)
+    ]
+    quiz = QuizResponse(questions=questions, video_id=VIDEO_ID, generated_at=datetime.now(), quiz_id="s-parallel")
+    assert asyncio.run(setup.quiz_store.save_quiz(quiz))
+
+    service = per_thread(build_service)
+    scores = [index % 6 for index in range(SUBMISSIONS)]
+
+    def submit(score):
+        answers = [QuizAnswer(question_index=index, selected_answer="A" if index < score else "B")
+                   for index in range(len(questions))]
+        submission = QuizSubmission(video_id=VIDEO_ID, answers=answers, quiz_id=quiz.quiz_id)
+        return asyncio.run(service().submit_quiz(submission, USER_ID)).result.score
+
+    assert in_parallel(submit, scores) == scores
+    assert_counts(db_path, scores)
@@ -218,7 +218,8 @@ export default function QuizInterface({
 
     const submission: QuizSubmission = {
       video_id: quiz.video_id,
-      answers: quizState.answers
+      answers: quizState.answers,
+      quiz_id: quiz.quiz_id
     };
 
     try {
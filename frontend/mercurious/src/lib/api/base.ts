@@ -127,6 +127,42 @@ export class BaseAPIClient {
     });
   }
 
+  /**
+   * POST and return the raw response, for endpoints that stream their body
+   */
+  protected async makeStreamRequest(endpoint: string, data: any): Promise<Response> {
+    const headers: Record<string, string> = {
+      'Content-Type': 'application/json',
+      'Accept': 'text/event-stream',
+    };
+
+    if (typeof window !== 'undefined') {
+      const token = await this.getAuthToken();
+      if (token) {
+        headers['Authorization'] = `Bearer ${token}`;
+      }
+    }
+
+    const response = await fetch(`${this.baseURL}${endpoint}`, {
+      method: 'POST',
+      headers,
+      body: JSON.stringify(data),
+    });
+
+    if (!response.ok || !response.body) {
+      let errorMessage = `HTTP ${response.status}`;
+      try {
+        const error: APIError = await response.json();
+        errorMessage = error.detail || errorMessage;
+      } catch {
+        // If JSON parsing fails, use the default error message
+      }
+      throw new Error(errorMessage);
+    }
+
+    return response;
+  }
+
   async checkHealth(): Promise<{ status: string; service: string; message: string }> {
     return this.makeGetRequest('/api/health');
   }
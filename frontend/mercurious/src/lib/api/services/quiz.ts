@@ -6,7 +6,12 @@ import {
   QuizResult,
   QuizResultResponse,
   QuizStatistics,
-  QuizAvailability
+  QuizAvailability,
+  QuizQuestion,
+  QuizStreamQuestionEvent,
+  ReviewSession,
+  ReviewSubmission,
+  ReviewResultResponse
 } from '../types/quiz';
 
 export class QuizAPIService extends BaseAPIClient {
@@ -22,6 +27,58 @@ export class QuizAPIService extends BaseAPIClient {
     return this.makePostRequest<QuizResponse>('/api/quiz/generate', request);
   }
 
+  /**
+   * Generate a quiz over server-sent events, calling onQuestion as each question arrives.
+   * Resolves with the persisted quiz, whose quiz_id is used for submission.
+   */
+  async streamQuiz(
+    videoId: string,
+    numQuestions: number = 5,
+    onQuestion: (question: QuizQuestion, index: number) => void = () => {}
+  ): Promise<QuizResponse> {
+    const request: QuizGenerateRequest = {
+      video_id: videoId,
+      num_questions: numQuestions
+    };
+
+    const response = await this.makeStreamRequest('/api/quiz/generate/stream', request);
+    const reader = response.body!.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const message = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        let event = 'message';
+        let data = '';
+        for (const line of message.split('\n')) {
+          if (line.startsWith('event: ')) event = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        }
+        if (!data) continue;
+
+        const payload = JSON.parse(data);
+        if (event === 'question') {
+          const { question, index } = payload as QuizStreamQuestionEvent;
+          onQuestion(question, index);
+        } else if (event === 'complete') {
+          return payload as QuizResponse;
+        } else if (event === 'error') {
+          throw new Error(payload.detail || 'Error generating quiz');
+        }
+      }
+    }
+
+    throw new Error('Quiz stream ended before the quiz was complete');
+  }
+
   /**
    * Submit quiz answers and get detailed results
    */
@@ -29,6 +86,21 @@ export class QuizAPIService extends BaseAPIClient {
     return this.makePostRequest<QuizResultResponse>('/api/quiz/submit', submission);
   }
 
+  /**
+   * Get missed questions due for review across the user's library
+   */
+  async getReviewSession(limit?: number): Promise<ReviewSession> {
+    const query = limit ? `?limit=${limit}` : '';
+    return this.makeGetRequest<ReviewSession>(`/api/quiz/review/due${query}`);
+  }
+
+  /**
+   * Submit review answers and reschedule the reviewed questions
+   */
+  async submitReview(submission: ReviewSubmission): Promise<ReviewResultResponse> {
+    return this.makePostRequest<ReviewResultResponse>('/api/quiz/review/submit', submission);
+  }
+
   /**
    * Get quiz attempt history for a specific video
    */
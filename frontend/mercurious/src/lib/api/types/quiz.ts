@@ -3,6 +3,7 @@ export interface QuizQuestion {
   options: string[];
   correct_answer: string;
   explanation: string;
+  topic?: string | null;
 }
 
 export interface QuizGenerateRequest {
@@ -14,6 +15,12 @@ export interface QuizResponse {
   questions: QuizQuestion[];
   video_id: string;
   generated_at: string;
+  quiz_id?: string | null;
+}
+
+export interface QuizStreamQuestionEvent {
+  index: number;
+  question: QuizQuestion;
 }
 
 export interface QuizAnswer {
@@ -24,6 +31,7 @@ export interface QuizAnswer {
 export interface QuizSubmission {
   video_id: string;
   answers: QuizAnswer[];
+  quiz_id?: string | null;
 }
 
 export interface QuizResult {
@@ -47,6 +55,13 @@ export interface QuizStatistics {
   overall_average_score: number;
   best_overall_score: number;
   completion_rate: number;
+  periods?: Record<'daily' | 'weekly' | 'monthly', Record<string, QuizPeriodStatistics>>;
+}
+
+export interface QuizPeriodStatistics {
+  attempts: number;
+  average_score: number;
+  total_questions: number;
 }
 
 export interface QuizAvailability {
@@ -54,6 +69,47 @@ export interface QuizAvailability {
   quiz_available: boolean;
   quiz_fresh: boolean;
   generated_at: string | null;
+  bank_size?: number;
+}
+
+export interface ReviewItem {
+  item_id: string;
+  video_id: string;
+  question: QuizQuestion;
+  repetitions: number;
+  interval_days: number;
+  ease_factor: number;
+  lapses: number;
+  due_at: string;
+  last_reviewed_at: string | null;
+}
+
+export interface ReviewSession {
+  items: ReviewItem[];
+  due_count: number;
+}
+
+export interface ReviewAnswer {
+  item_id: string;
+  selected_answer: string;
+}
+
+export interface ReviewSubmission {
+  answers: ReviewAnswer[];
+}
+
+export interface ReviewResult {
+  item_id: string;
+  correct: boolean;
+  correct_answer: string;
+  explanation: string;
+  next_due_at: string;
+}
+
+export interface ReviewResultResponse {
+  results: ReviewResult[];
+  score: number;
+  total_questions: number;
 }
 
 // UI-specific types for better user experience